@@ -1,6 +1,11 @@
 from django.contrib import admin
-from .models import CustomUser, RoomType, Room, Booking, Payment, Order, OrderItem, Menu
+from django.forms.models import BaseInlineFormSet
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from .models import CustomUser, RoomType, RoomRate, Room, Booking, Payment, Order, OrderItem, Menu, StockMovement, NightAuditRun, RoomCharge
 from django.contrib.auth.admin import UserAdmin
+from django.db.models import Q
+from api import inventory, search, slow_queries
 # ------------------------------
 # CustomUser
 # ------------------------------
@@ -15,12 +20,40 @@ class CustomUserAdmin(UserAdmin):
         ('Custom Fields', {'fields': ('role',)}),
     )
 
+# ------------------------------
+# Capped inlines
+# ------------------------------
+class CappedInlineFormSet(BaseInlineFormSet):
+    """
+    Inline formset that only loads the first `limit` related rows, so a
+    room with years of bookings doesn't render (and query) all of them.
+    """
+    limit = 20
+
+    def get_queryset(self):
+        if not hasattr(self, "_capped_queryset"):
+            self._capped_queryset = super().get_queryset()[: self.limit]
+        return self._capped_queryset
+
+
+class CappedInlineMixin:
+    formset = CappedInlineFormSet
+    inline_limit = 20
+
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        formset.limit = self.inline_limit
+        return formset
+
+
 # ------------------------------
 # Payment Inline for Booking
 # ------------------------------
-class PaymentInline(admin.TabularInline):
+class PaymentInline(CappedInlineMixin, admin.TabularInline):
     model = Payment
     extra = 1
+    inline_limit = 20
+    verbose_name_plural = "Payments (latest 20)"
     readonly_fields = ('created_at', 'updated_at', 'paid_at', 'transaction_reference')
     fields = (
         'payment_type',
@@ -35,14 +68,19 @@ class PaymentInline(admin.TabularInline):
     )
     show_change_link = True
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).order_by('-created_at')
+
 
 # ------------------------------
 # Booking Inline for Room
 # ------------------------------
-class BookingInline(admin.TabularInline):
+class BookingInline(CappedInlineMixin, admin.TabularInline):
     model = Booking
     fk_name = 'room'
-    extra = 1
+    extra = 0
+    inline_limit = 20
+    verbose_name_plural = "Bookings (latest 20)"
     readonly_fields = (
         'guest_name', 'email', 'contact_number',
         'check_in', 'check_out', 'adults', 'children',
@@ -53,18 +91,31 @@ class BookingInline(admin.TabularInline):
     show_change_link = True
     inlines = [PaymentInline]  # Optional if using nested admin
 
+    def get_queryset(self, request):
+        # assigned_room is shown via Room.__str__, which reads room_type.name
+        return (
+            super().get_queryset(request)
+            .select_related('assigned_room__room_type')
+            .order_by('-check_in')
+        )
+
 
 # ------------------------------
 # Room Inline for RoomType
 # ------------------------------
-class RoomInline(admin.TabularInline):
+class RoomInline(CappedInlineMixin, admin.TabularInline):
     model = Room
     extra = 1
+    inline_limit = 50
+    verbose_name_plural = "Rooms (first 50)"
     readonly_fields = ('status',)
     fields = ('room_number', 'status')
     show_change_link = True
     inlines = [BookingInline]  # Optional: requires django-nested-admin
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).order_by('room_number')
+
 
 # ------------------------------
 # RoomType Admin
@@ -76,14 +127,30 @@ class RoomTypeAdmin(admin.ModelAdmin):
     inlines = [RoomInline]
 
 
+# ------------------------------
+# RoomRate Admin (rate calendar)
+# ------------------------------
+@admin.register(RoomRate)
+class RoomRateAdmin(admin.ModelAdmin):
+    list_display = ('room_type', 'date', 'price', 'extra_adult_fee', 'extra_child_fee', 'note')
+    list_select_related = ('room_type',)
+    list_filter = ('room_type',)
+    autocomplete_fields = ('room_type',)
+    date_hierarchy = 'date'
+    ordering = ('room_type', 'date')
+
+
 # ------------------------------
 # Room Admin
 # ------------------------------
 @admin.register(Room)
 class RoomAdmin(admin.ModelAdmin):
     list_display = ('room_number', 'room_type', 'status')
+    list_select_related = ('room_type',)
     list_filter = ('status', 'room_type')
     search_fields = ('room_number', 'room_type__name')
+    autocomplete_fields = ('room_type',)
+    show_full_result_count = False
     inlines = [BookingInline]
 
 
@@ -101,8 +168,14 @@ class BookingAdmin(admin.ModelAdmin):
         'total_price',
         
     )
+    # room is rendered with Room.__str__, which reads room_type.name
+    list_select_related = ('room__room_type',)
     list_filter = ('status', 'check_in', 'check_out')
     search_fields = ('guest_name', 'email', 'contact_number', 'room__room_number')
+    autocomplete_fields = ('room', 'assigned_room')
+    date_hierarchy = 'check_in'
+    # Skip the unfiltered COUNT(*) the changelist runs for "N total"
+    show_full_result_count = False
     inlines = [PaymentInline]
     readonly_fields = ('created_at', 'updated_at')
     fieldsets = (
@@ -117,6 +190,16 @@ class BookingAdmin(admin.ModelAdmin):
         }),
     )
 
+    # Most results the search index returns to the changelist
+    search_limit = 500
+
+    def get_search_results(self, request, queryset, search_term):
+        """Search the guest search index (api/search.py) instead of icontains scans."""
+        if not search_term.strip():
+            return queryset, False
+        ids = search.search_booking_ids(search_term, limit=self.search_limit)
+        return queryset.filter(Q(pk__in=ids) | Q(room__room_number=search_term.strip())), False
+
 
 
 @admin.register(Menu)
@@ -132,6 +215,30 @@ class MenuAdmin(admin.ModelAdmin):
     list_filter = ("category", "is_available")
     search_fields = ("name",)
 
+    def save_model(self, request, obj, form, change):
+        # Stock edited here goes into the inventory ledger (api/inventory.py)
+        previous_stock = Menu.objects.values_list("stock", flat=True).get(pk=obj.pk) if change else 0
+        super().save_model(request, obj, form, change)
+        inventory.record_adjustments({obj.pk: (previous_stock, obj.stock)}, user_id=request.user.pk, note="Admin edit")
+
+
+@admin.register(StockMovement)
+class StockMovementAdmin(admin.ModelAdmin):
+    # Append-only ledger: corrections are new adjustments (change the item's stock)
+    list_display = ("id", "menu", "kind", "quantity", "order", "note", "created_by", "created_at")
+    list_filter = ("kind",)
+    list_select_related = ("menu", "created_by")
+    date_hierarchy = "created_at"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
 
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
@@ -139,6 +246,9 @@ class OrderItemInline(admin.TabularInline):
     autocomplete_fields = ["menu"]
     readonly_fields = ("menu_name", "price", "subtotal")
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("menu")
+
 
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
@@ -150,6 +260,9 @@ class OrderAdmin(admin.ModelAdmin):
         "created_at",
     )
     list_filter = ("order_type", "order_status")
+    autocomplete_fields = ("booking",)
+    date_hierarchy = "created_at"
+    show_full_result_count = False
     inlines = [OrderItemInline]
     readonly_fields = ("total_amount",)
 
@@ -162,4 +275,52 @@ class OrderAdmin(admin.ModelAdmin):
         order.save(update_fields=["total_amount"])
 
 
-        
\ No newline at end of file
+
+# ------------------------------
+# Slow query log (not model backed)
+# ------------------------------
+def slow_query_log_view(request):
+    """
+    Show the slow queries recorded by SlowQueryMiddleware in this process.
+    POST clears the buffer.
+    """
+    if request.method == "POST":
+        slow_queries.clear()
+        return redirect("slow-query-log")
+
+    context = {
+        **admin.site.each_context(request),
+        "title": "Slow queries",
+        "entries": slow_queries.get_entries(),
+        "threshold_ms": slow_queries.get_threshold_ms(),
+    }
+    return TemplateResponse(request, "admin/api/slow_queries.html", context)
+
+
+@admin.register(NightAuditRun)
+class NightAuditRunAdmin(admin.ModelAdmin):
+    list_display = (
+        "business_date",
+        "expired",
+        "no_shows",
+        "in_house",
+        "overstays",
+        "room_charges",
+        "room_revenue",
+        "finished_at",
+    )
+    date_hierarchy = "business_date"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(RoomCharge)
+class RoomChargeAdmin(admin.ModelAdmin):
+    list_display = ("booking", "room", "date", "amount")
+    list_select_related = ("room",)
+    search_fields = ("booking__id",)
+    date_hierarchy = "date"
@@ -0,0 +1,134 @@
+"""
+JWT authentication without a user query per request.
+
+Access tokens carry the user's role, username, email, is_staff,
+is_superuser and role_version (see CustomTokenObtainPairSerializer).
+`ClaimsJWTAuthentication` verifies the token and builds a `ClaimsUser` from
+those claims instead of loading the CustomUser row.
+
+What the token cannot know, whether the account is still active and
+whether its role changed since the token was issued, comes from a small
+per-process cache of user state that expires after
+settings.JWT_USER_STATE_TTL seconds. A cache miss costs one query. A
+deactivated user is therefore locked out within the TTL at most (at once on
+the worker that saved the change). A changed role bumps
+CustomUser.role_version, which rejects older tokens until the client
+refreshes them.
+
+Views only get the user's id and claims: writes take `request.user.id`
+(e.g. `created_by_id=request.user.id`), not the user instance.
+
+Async views (api/views/async_reads.py) call `aauthenticate`, which only
+leaves the event loop to load a user state that is not cached.
+"""
+import threading
+import time
+from collections import namedtuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.functional import cached_property
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+
+UserState = namedtuple("UserState", "is_active role_version role is_staff is_superuser username email")
+
+_lock = threading.Lock()
+_states = {}  # str(user id) -> (expires at, UserState or None); tokens carry the id as a string
+
+
+def get_user_state(user_id):
+    """The cached UserState of a user (None if the user does not exist)."""
+    now = time.monotonic()
+    cached = _states.get(str(user_id))
+    if cached is not None and cached[0] > now:
+        return cached[1]
+
+    row = get_user_model().objects.filter(pk=user_id).values_list(*UserState._fields).first()
+    state = UserState(*row) if row else None
+    with _lock:
+        _states[str(user_id)] = (now + getattr(settings, "JWT_USER_STATE_TTL", 30), state)
+    return state
+
+
+async def aget_user_state(user_id):
+    """get_user_state for async code: a cache hit doesn't leave the event loop."""
+    cached = _states.get(str(user_id))
+    if cached is not None and cached[0] > time.monotonic():
+        return cached[1]
+    return await sync_to_async(get_user_state)(user_id)
+
+
+def invalidate_user_state(user_id=None):
+    """Forget this worker's cached state of one user (all users by default)."""
+    with _lock:
+        if user_id is None:
+            _states.clear()
+        else:
+            _states.pop(str(user_id), None)
+
+
+def set_user_claims(token, state):
+    """Copy a user's (or UserState's) role related fields into a token."""
+    token["role"] = state.role
+    token["username"] = state.username
+    token["email"] = state.email
+    token["is_staff"] = state.is_staff
+    token["is_superuser"] = state.is_superuser
+    token["role_version"] = state.role_version
+    return token
+
+
+class ClaimsUser(TokenUser):
+    """A user backed by verified token claims; no database row is loaded."""
+
+    @cached_property
+    def role(self):
+        return self.token.get("role", "")
+
+    @cached_property
+    def email(self):
+        return self.token.get("email", "")
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    async def aauthenticate(self, request):
+        """authenticate() for async views."""
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        state = await aget_user_state(self._user_id(validated_token))
+        return self._claims_user(validated_token, state), validated_token
+
+    def get_user(self, validated_token):
+        return self._claims_user(validated_token, get_user_state(self._user_id(validated_token)))
+
+    def _user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise AuthenticationFailed("Token contained no recognizable user identification", code="token_not_valid")
+
+    def _claims_user(self, validated_token, state):
+        if state is None:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        if not state.is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        self._check_role_version(validated_token, state.role_version)
+
+        return ClaimsUser(validated_token)
+
+    def _check_role_version(self, validated_token, role_version):
+        # Tokens issued before role_version existed carry none; they match version 0
+        if validated_token.get("role_version", 0) != role_version:
+            raise AuthenticationFailed("Token is outdated, please refresh it", code="token_outdated")
@@ -0,0 +1,309 @@
+"""
+In-process availability index.
+
+For each RoomType a worker keeps, per physical Room, the sorted intervals of
+its active (pending / confirmed / checked-in) bookings plus a running
+maximum of their end dates. "Is this room free for [check_in, check_out)?"
+is then one bisect: among the intervals that start before check_out, the
+room is taken iff the largest end date is after check_in.
+
+Indexes are loaded lazily, the first time a room type is searched. Every
+change to a room type's rooms or active bookings bumps its
+AvailabilityVersion row in the same transaction (see api/signals.py), and
+each lookup compares that version with the cached one, so all workers
+notice each other's writes. The writing worker replaces its own index
+after commit with a patched copy instead of reloading it.
+
+Code that changes bookings or rooms without save() (bulk_create,
+queryset.update, bulk_update) must call `bump_versions` itself.
+"""
+import copy
+import threading
+from bisect import bisect_left, insort
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from api.models import AvailabilityVersion, Booking, Room, RoomType
+
+
+ACTIVE_STATUSES = (
+    Booking.Status.PENDING,
+    Booking.Status.CONFIRMED,
+    Booking.Status.CHECKED_IN,
+)
+
+AVAILABLE = str(Room.Status.AVAILABLE)
+
+# Fields of a room as returned by RoomSerializer (api/serializers/booking_serializer.py)
+ROOM_FIELDS = ("id", "room_number", "status", "floor", "room_type")
+
+_lock = threading.Lock()
+_indexes = {}
+
+
+def is_enabled():
+    return getattr(settings, "AVAILABILITY_CACHE_ENABLED", True)
+
+
+class RoomIntervals:
+    """
+    Booking intervals of one room as date ordinals, sorted by start.
+    `max_ends[i]` is the largest end among intervals 0..i, which keeps the
+    overlap test correct even if two bookings of a room overlap.
+
+    Instances are never mutated once published; `with_booking` and
+    `without_booking` return copies.
+    """
+    __slots__ = ("intervals", "starts", "max_ends")
+
+    def __init__(self, intervals=()):
+        self.intervals = sorted(intervals)  # (start, end, booking_id)
+        self.starts = [start for start, _, _ in self.intervals]
+        self.max_ends = []
+        running = None
+        for _, end, _ in self.intervals:
+            running = end if running is None or end > running else running
+            self.max_ends.append(running)
+
+    def overlaps(self, start, end):
+        i = bisect_left(self.starts, end)
+        return i > 0 and self.max_ends[i - 1] > start
+
+    def with_booking(self, start, end, booking_id):
+        intervals = list(self.intervals)
+        insort(intervals, (start, end, booking_id))
+        return RoomIntervals(intervals)
+
+    def without_booking(self, booking_id):
+        return RoomIntervals(item for item in self.intervals if item[2] != booking_id)
+
+    def __len__(self):
+        return len(self.intervals)
+
+
+EMPTY = RoomIntervals()
+
+
+class RoomTypeIndex:
+    """
+    Rooms of one room type and the active booking intervals of each.
+    Instances are never mutated once published; `with_booking` returns a copy.
+    """
+
+    def __init__(self, room_type_id, version, rooms, bookings):
+        self.room_type_id = room_type_id
+        self.version = version
+        self.rooms = sorted(rooms, key=lambda room: room["id"])
+
+        per_room = {}
+        self.booking_rooms = {}
+        for booking_id, room_id, check_in, check_out in bookings:
+            per_room.setdefault(room_id, []).append((check_in.toordinal(), check_out.toordinal(), booking_id))
+            self.booking_rooms[booking_id] = room_id
+        self.intervals = {room_id: RoomIntervals(items) for room_id, items in per_room.items()}
+
+    def available_rooms(self, check_in, check_out):
+        """Rooms (as RoomSerializer dicts) that are AVAILABLE and free for the stay, ordered by id."""
+        start, end = check_in.toordinal(), check_out.toordinal()
+        intervals = self.intervals
+        free = []
+        # Hot loop: RoomIntervals.overlaps() inlined
+        for room in self.rooms:
+            if room["status"] != AVAILABLE:
+                continue
+            booked = intervals.get(room["id"])
+            if booked is not None:
+                i = bisect_left(booked.starts, end)
+                if i and booked.max_ends[i - 1] > start:
+                    continue
+            free.append(room)
+        return free
+
+    def with_booking(self, booking_id, room_id, check_in, check_out, active, version):
+        """A copy at `version` with what it knows about one booking replaced. Unchanged rooms are shared."""
+        index = copy.copy(self)
+        index.version = version
+        index.intervals = dict(self.intervals)
+        index.booking_rooms = dict(self.booking_rooms)
+
+        previous_room = index.booking_rooms.pop(booking_id, None)
+        if previous_room is not None:
+            index.intervals[previous_room] = index.intervals[previous_room].without_booking(booking_id)
+
+        if active and any(room["id"] == room_id for room in index.rooms):
+            current = index.intervals.get(room_id, EMPTY)
+            index.intervals[room_id] = current.with_booking(check_in.toordinal(), check_out.toordinal(), booking_id)
+            index.booking_rooms[booking_id] = room_id
+        return index
+
+
+def _load(room_type_id, version):
+    rooms = list(Room.objects.filter(room_type_id=room_type_id).values(*ROOM_FIELDS))
+    bookings = Booking.objects.filter(
+        room__room_type_id=room_type_id,
+        status__in=ACTIVE_STATUSES,
+    ).values_list("id", "room_id", "check_in", "check_out")
+    return RoomTypeIndex(room_type_id, version, rooms, bookings)
+
+
+def get_index(room_type_id):
+    """
+    Return the up-to-date index for a room type, or None if the room type
+    does not exist. Costs one primary key lookup when the cached index is
+    current.
+    """
+    version = (
+        RoomType.objects.filter(pk=room_type_id)
+        .values_list("availability_version__version", flat=True)
+        .first()
+    )
+    if version is None:
+        if not RoomType.objects.filter(pk=room_type_id).exists():
+            return None
+        # Room type created without save() (e.g. bulk import)
+        version = AvailabilityVersion.objects.get_or_create(room_type_id=room_type_id)[0].version
+
+    index = _indexes.get(room_type_id)
+    if index is not None and index.version == version:
+        return index
+
+    index = _load(room_type_id, version)
+    with _lock:
+        _indexes[room_type_id] = index
+    return index
+
+
+def available_rooms(room_type_id, check_in, check_out):
+    """
+    Available rooms of a room type for [check_in, check_out), as
+    RoomSerializer dicts ordered by id. None if the room type does not exist.
+    """
+    index = get_index(room_type_id)
+    if index is None:
+        return None
+    return index.available_rooms(check_in, check_out)
+
+
+async def aavailable_rooms(room_type_id, check_in, check_out):
+    """
+    available_rooms for async views: the version check uses the async ORM,
+    and only loading a stale or missing index runs in a thread.
+    """
+    version = await (
+        RoomType.objects.filter(pk=room_type_id)
+        .values_list("availability_version__version", flat=True)
+        .afirst()
+    )
+    index = _indexes.get(room_type_id)
+    if version is None or index is None or index.version != version:
+        index = await sync_to_async(get_index)(room_type_id)
+        if index is None:
+            return None
+    return index.available_rooms(check_in, check_out)
+
+
+def allocate_rooms(stays):
+    """
+    Pick a different free room for each (room_type_id, check_in, check_out)
+    stay of a group, so that the group's own stays never share a room on the
+    same night either. Returns room dicts in the order of `stays`, with None
+    for stays that could not be placed (unknown room types have no rooms).
+
+    Each room type is read once, from the index when it is enabled and from
+    the database otherwise.
+    """
+    indexes = {}
+    for room_type_id, _, _ in stays:
+        if room_type_id not in indexes:
+            indexes[room_type_id] = get_index(room_type_id) if is_enabled() else _load(room_type_id, None)
+
+    taken = {}  # room id -> RoomIntervals of this group's stays
+    allocated = []
+    for room_type_id, check_in, check_out in stays:
+        index = indexes[room_type_id]
+        if index is None:
+            allocated.append(None)
+            continue
+
+        start, end = check_in.toordinal(), check_out.toordinal()
+        room = next(
+            (
+                room for room in index.available_rooms(check_in, check_out)
+                if not taken.get(room["id"], EMPTY).overlaps(start, end)
+            ),
+            None,
+        )
+        if room is not None:
+            taken[room["id"]] = taken.get(room["id"], EMPTY).with_booking(start, end, None)
+        allocated.append(room)
+    return allocated
+
+
+def invalidate(room_type_ids=None):
+    """Drop this worker's cached indexes (all of them by default)."""
+    with _lock:
+        if room_type_ids is None:
+            _indexes.clear()
+        else:
+            for room_type_id in room_type_ids:
+                _indexes.pop(room_type_id, None)
+
+
+def _bump(room_type_id):
+    # Every RoomType gets its row on creation (see api/signals.py)
+    AvailabilityVersion.objects.filter(room_type_id=room_type_id).update(version=F("version") + 1)
+
+
+def bump_versions(room_type_ids):
+    """
+    Mark room types as changed for every worker. Call inside the
+    transaction that made the change so the new version commits with it.
+    This worker's cached indexes for them are dropped after commit.
+    """
+    room_type_ids = set(room_type_ids) - {None}
+    for room_type_id in room_type_ids:
+        _bump(room_type_id)
+    if room_type_ids:
+        transaction.on_commit(lambda: invalidate(room_type_ids))
+
+
+def booking_changed(booking, room_type_id, previous_room_type_id=None):
+    """
+    Bump the versions for a saved booking and, after commit, patch this
+    worker's index in place instead of reloading it, provided no other
+    change to the room type happened in between.
+    """
+    room_type_ids = {room_type_id, previous_room_type_id} - {None}
+
+    expected = {}
+    for type_id in room_type_ids:
+        index = _indexes.get(type_id)
+        if index is not None:
+            expected[type_id] = index.version + 1
+        _bump(type_id)
+
+    booking_id, room_id = booking.pk, booking.room_id
+    check_in, check_out = booking.check_in, booking.check_out
+    active = booking.status in ACTIVE_STATUSES
+
+    def patch():
+        versions = dict(
+            AvailabilityVersion.objects.filter(room_type_id__in=room_type_ids).values_list("room_type_id", "version")
+        )
+        for type_id in room_type_ids:
+            index = _indexes.get(type_id)
+            if index is None:
+                continue
+            if versions.get(type_id) != expected.get(type_id) or index.version + 1 != versions[type_id]:
+                invalidate([type_id])
+                continue
+            # Readers keep using the index they hold; the copy is swapped in whole
+            patched = index.with_booking(booking_id, room_id, check_in, check_out, active and type_id == room_type_id, versions[type_id])
+            with _lock:
+                if _indexes.get(type_id) is index:
+                    _indexes[type_id] = patched
+
+    transaction.on_commit(patch)
@@ -0,0 +1,67 @@
+"""
+HTTP side of optimistic concurrency control (VersionedModel).
+
+Responses for versioned rows carry `ETag: "<version>"` (and the version in
+the body). A client that sends `If-Match: "<version>"` when changing the
+row gets 409 if someone saved it in the meantime, instead of silently
+overwriting their change. Without If-Match the check still covers the
+time between the view reading the row and saving it.
+"""
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import exception_handler as drf_exception_handler, set_rollback
+
+from api.models import StaleVersionError
+
+
+def if_match_version(request):
+    """The version in the If-Match header, or None (also for "*" or a malformed value)."""
+    value = request.headers.get("If-Match", "").strip()
+    if value.startswith("W/"):
+        value = value[2:]
+    value = value.strip('"')
+    return int(value) if value.isdigit() else None
+
+
+def apply_if_match(request, instance):
+    """Make the next save of `instance` conditional on the version the client sent."""
+    version = if_match_version(request)
+    if version is not None:
+        instance.version = version
+    return instance
+
+
+class UpdateFieldsMixin:
+    """
+    For ModelSerializers: update() saves only the fields that were sent
+    (plus updated_at), so concurrent edits of other columns survive.
+    """
+
+    def update(self, instance, validated_data):
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        fields = set(validated_data)
+        if any(field.name == "updated_at" for field in instance._meta.concrete_fields):
+            fields.add("updated_at")
+        instance.save(update_fields=fields)
+        return instance
+
+
+def set_etag(response, version):
+    response["ETag"] = f'"{version}"'
+    return response
+
+
+def exception_handler(exc, context):
+    """DRF's handler, plus 409 for StaleVersionError."""
+    if isinstance(exc, StaleVersionError):
+        current = exc.current_version
+        set_rollback()
+        response = Response(
+            {"detail": f"{exc} Reload it and try again.", "current_version": current},
+            status=status.HTTP_409_CONFLICT,
+        )
+        if current is not None:
+            set_etag(response, current)
+        return response
+    return drf_exception_handler(exc, context)
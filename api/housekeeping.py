@@ -0,0 +1,160 @@
+"""
+Housekeeping task queue.
+
+A room that becomes DIRTY gets an open cleaning task, one that goes into
+MAINTENANCE an open maintenance task (`sync_room_tasks`, called by the Room
+post_save signal and by bulk writers). Open tasks of a kind the room no
+longer needs (e.g. the front desk marked it available) are cancelled.
+
+Staff devices call `claim_tasks`, which hands out up to `count` open tasks
+from one floor, oldest first, and a claim token. Two devices claiming at
+once never get the same task:
+
+* PostgreSQL (and other databases with SKIP LOCKED): the candidates are
+  selected FOR UPDATE SKIP LOCKED, so a concurrent claimer skips them.
+* SQLite: the candidates are picked and claimed by one UPDATE
+  (... WHERE status = 'open' AND id IN (SELECT ... LIMIT n)), which runs
+  under SQLite's write lock, so claims are applied one after the other.
+
+Claiming a cleaning task moves the room to CLEANING; completing a task
+makes the room AVAILABLE; releasing it puts it back in the queue.
+"""
+import uuid
+from collections import namedtuple
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from api import availability
+from api.models import HousekeepingTask, Room
+
+
+Kind = HousekeepingTask.Kind
+TaskStatus = HousekeepingTask.Status
+
+# Room status -> the task it needs
+TASK_FOR_ROOM_STATUS = {
+    Room.Status.DIRTY: Kind.CLEANING,
+    Room.Status.MAINTENANCE: Kind.MAINTENANCE,
+}
+# Room status -> kinds of open tasks that stay open (a room being cleaned keeps its cleaning task)
+KEEP_FOR_ROOM_STATUS = {
+    Room.Status.DIRTY: {Kind.CLEANING},
+    Room.Status.CLEANING: {Kind.CLEANING},
+    Room.Status.MAINTENANCE: {Kind.MAINTENANCE},
+}
+# Room status while a claimed task of this kind is worked on, and once it is done
+ROOM_STATUS_WHILE = {Kind.CLEANING: (Room.Status.DIRTY, Room.Status.CLEANING)}
+ROOM_STATUS_WHEN_DONE = {
+    Kind.CLEANING: ((Room.Status.DIRTY, Room.Status.CLEANING), Room.Status.AVAILABLE),
+    Kind.MAINTENANCE: ((Room.Status.MAINTENANCE,), Room.Status.AVAILABLE),
+}
+
+# Columns of the open queue index (HousekeepingTask.Meta.indexes)
+QUEUE_FIELDS = ("id", "room_id", "room_number", "floor", "kind", "created_at")
+
+Claim = namedtuple("Claim", "token tasks")
+
+
+def sync_room_tasks(room_ids):
+    """Open and cancel tasks to match the current status of these rooms."""
+    rooms = list(Room.objects.filter(pk__in=room_ids).values_list("pk", "floor", "room_number", "status"))
+    if not rooms:
+        return
+
+    HousekeepingTask.objects.bulk_create(
+        [
+            HousekeepingTask(room_id=pk, floor=floor, room_number=room_number, kind=TASK_FOR_ROOM_STATUS[status])
+            for pk, floor, room_number, status in rooms
+            if status in TASK_FOR_ROOM_STATUS
+        ],
+        # The room already has an active task of that kind
+        ignore_conflicts=True,
+    )
+
+    for kind in Kind.values:
+        stale = [pk for pk, _, _, status in rooms if kind not in KEEP_FOR_ROOM_STATUS.get(status, ())]
+        if stale:
+            HousekeepingTask.objects.filter(room_id__in=stale, kind=kind, status=TaskStatus.OPEN).update(
+                status=TaskStatus.CANCELLED
+            )
+
+
+def open_queue(kind=None, floor=None):
+    """Open tasks by floor, oldest first, as dicts of QUEUE_FIELDS (read from the queue index)."""
+    tasks = HousekeepingTask.objects.filter(status=TaskStatus.OPEN)
+    if kind:
+        tasks = tasks.filter(kind=kind)
+    if floor is not None:
+        tasks = tasks.filter(floor=floor)
+    return tasks.order_by("kind", "floor", "created_at", "id").values(*QUEUE_FIELDS)
+
+
+def claim_tasks(user_id, kind, count=1, floor=None):
+    """
+    Claim up to `count` open tasks of `kind` on one floor (the given one, else
+    the floor of the oldest open task) for `user_id`. Returns a Claim whose
+    tasks may be fewer than `count`, or empty.
+    """
+    token = uuid.uuid4()
+    queue = HousekeepingTask.objects.filter(status=TaskStatus.OPEN, kind=kind)
+
+    if floor is None:
+        floor = queue.order_by("created_at", "id").values_list("floor", flat=True).first()
+        if floor is None:
+            return Claim(token, [])
+    candidates = queue.filter(floor=floor).order_by("created_at", "id").values_list("id", flat=True)
+
+    with transaction.atomic():
+        if connection.features.has_select_for_update_skip_locked:
+            ids = list(candidates.select_for_update(skip_locked=True)[:count])
+        else:
+            # One statement, so SQLite takes the write lock before reading the candidates
+            ids = candidates[:count]
+        now = timezone.now()
+        # Conditional on status: rows another device claimed in between are left alone
+        HousekeepingTask.objects.filter(pk__in=ids, status=TaskStatus.OPEN).update(
+            status=TaskStatus.CLAIMED, claimed_by_id=user_id, claim_token=token, claimed_at=now
+        )
+
+        tasks = list(HousekeepingTask.objects.filter(claimed_by_id=user_id, claim_token=token).order_by("created_at", "id"))
+        cleaning_rooms = [task.room_id for task in tasks if task.kind in ROOM_STATUS_WHILE]
+        if cleaning_rooms:
+            from_status, to_status = ROOM_STATUS_WHILE[Kind.CLEANING]
+            _set_room_status(cleaning_rooms, [from_status], to_status)
+
+    return Claim(token, tasks)
+
+
+def complete_task(task_id, token):
+    """Mark a claimed task done and the room available. Returns the task, or None if the token doesn't hold it."""
+    with transaction.atomic():
+        task = _finish(task_id, token, status=TaskStatus.DONE, completed_at=timezone.now())
+        if task is not None:
+            from_statuses, to_status = ROOM_STATUS_WHEN_DONE[task.kind]
+            _set_room_status([task.room_id], from_statuses, to_status)
+    return task
+
+
+def release_task(task_id, token):
+    """Put a claimed task back in the queue. Returns the task, or None if the token doesn't hold it."""
+    with transaction.atomic():
+        task = _finish(task_id, token, status=TaskStatus.OPEN, claimed_by=None, claim_token=None, claimed_at=None)
+        if task is not None and task.kind in ROOM_STATUS_WHILE:
+            to_status, from_status = ROOM_STATUS_WHILE[task.kind]
+            _set_room_status([task.room_id], [from_status], to_status)
+    return task
+
+
+def _finish(task_id, token, **changes):
+    updated = HousekeepingTask.objects.filter(pk=task_id, status=TaskStatus.CLAIMED, claim_token=token).update(**changes)
+    return HousekeepingTask.objects.get(pk=task_id) if updated else None
+
+
+def _set_room_status(room_ids, from_statuses, to_status):
+    rooms = Room.objects.filter(pk__in=room_ids, status__in=from_statuses)
+    room_type_ids = set(rooms.values_list("room_type_id", flat=True))
+    # update() skips the Room signals: the tasks are already in the right state
+    if rooms.update(status=to_status, updated_at=timezone.now(), version=F("version") + 1):
+        availability.bump_versions(room_type_ids)
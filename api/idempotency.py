@@ -0,0 +1,173 @@
+"""
+Idempotency-Key support for POSTs that must not run twice.
+
+    class CheckInGuestView(APIView):
+        @idempotent
+        def post(self, request, booking_id):
+            ...
+
+A client that sends `Idempotency-Key: <uuid>` and retries with the same
+key gets the first response back (with `Idempotent-Replayed: true`)
+instead of a second booking, order or payment. Keys are scoped to the
+user (anonymous clients: to their IP address, as throttling identifies
+them), the method and the path. The record keeps a hash of the request
+data; reusing a key for a different request gets 422 instead of the other
+request's response.
+
+The first request inserts an IdempotencyRecord without a status; the
+unique key makes that insert the lock. A retry arriving while the first is
+still running waits up to settings.IDEMPOTENCY_WAIT_SECONDS for its
+response, then gets 409. Responses below 500 are kept for
+settings.IDEMPOTENCY_TTL_SECONDS; server errors and exceptions release the
+key so the retry runs the view again. Expired records are removed by
+`manage.py purge_idempotency_keys`.
+"""
+import functools
+import hashlib
+import json
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.request import is_form_media_type
+from rest_framework.response import Response
+from rest_framework.throttling import BaseThrottle
+from rest_framework.utils.encoders import JSONEncoder
+
+from api.models import IdempotencyRecord
+
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+POLL_INTERVAL = 0.05
+
+
+class IdempotencyConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "A request with this Idempotency-Key is still being processed."
+    default_code = "idempotency_conflict"
+
+
+class IdempotencyKeyReused(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = "This Idempotency-Key was already used for a different request."
+    default_code = "idempotency_key_reused"
+
+
+def idempotent(view_method):
+    """Decorate an APIView / ViewSet handler method (self, request, ...)."""
+
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        client_key = request.headers.get(HEADER)
+        if not client_key:
+            return view_method(self, request, *args, **kwargs)
+        if len(client_key) > MAX_KEY_LENGTH:
+            raise ValidationError({HEADER: [f"Ensure this header has no more than {MAX_KEY_LENGTH} characters."]})
+
+        key = _record_key(request, client_key)
+        replay = _acquire(key, _request_hash(request))
+        if replay is not None:
+            return replay
+
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except BaseException:
+            _release(key)
+            raise
+
+        if response.status_code >= 500:
+            _release(key)
+        else:
+            IdempotencyRecord.objects.filter(key=key).update(
+                status_code=response.status_code,
+                body=json.dumps(response.data, cls=JSONEncoder),
+            )
+        return response
+
+    return wrapper
+
+
+def _record_key(request, client_key):
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        owner = f"user:{user.pk}"
+    else:
+        # Guests posting bookings must not share keys (and each other's responses)
+        owner = f"anonymous:{BaseThrottle().get_ident(request)}"
+    raw = "\n".join((owner, request.method, request.path, client_key))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _request_hash(request):
+    """
+    sha256 of the parsed request data and uploaded files. Parsed, not the
+    raw body: throttling may have read the body stream already.
+    """
+    if is_form_media_type(request.content_type or ""):
+        data = {name: values for name, values in request.POST.lists()}
+    else:
+        data = request.data
+    digest = hashlib.sha256(json.dumps(data, cls=JSONEncoder, sort_keys=True).encode())
+    for name, files in sorted(request.FILES.lists()):
+        for uploaded in files:
+            digest.update(f"\n{name}:{uploaded.name}:{uploaded.size}\n".encode())
+            for chunk in uploaded.chunks():
+                digest.update(chunk)
+            uploaded.seek(0)
+    return digest.hexdigest()
+
+
+def _acquire(key, request_hash):
+    """
+    Lock `key` for this request (returns None) or return the stored
+    response of the request that holds it, waiting for it if needed.
+    """
+    deadline = time.monotonic() + getattr(settings, "IDEMPOTENCY_WAIT_SECONDS", 10)
+    while True:
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                IdempotencyRecord.objects.create(
+                    key=key,
+                    request_hash=request_hash,
+                    expires_at=now + timedelta(seconds=getattr(settings, "IDEMPOTENCY_TTL_SECONDS", 86400)),
+                )
+            return None
+        except IntegrityError:
+            pass
+
+        record = (
+            IdempotencyRecord.objects.filter(key=key)
+            .values_list("status_code", "body", "created_at", "expires_at", "request_hash")
+            .first()
+        )
+        if record is None:
+            continue  # released in between; try to take it
+        status_code, body, created_at, expires_at, stored_hash = record
+
+        stale = now - timedelta(seconds=getattr(settings, "IDEMPOTENCY_LOCK_TIMEOUT_SECONDS", 300))
+        if expires_at <= now or (status_code is None and created_at < stale):
+            # Expired, or held by a worker that died mid-request
+            IdempotencyRecord.objects.filter(key=key, created_at=created_at).delete()
+            continue
+
+        if stored_hash != request_hash:
+            raise IdempotencyKeyReused()
+
+        if status_code is not None:
+            response = Response(json.loads(body), status=status_code)
+            response["Idempotent-Replayed"] = "true"
+            return response
+
+        if time.monotonic() >= deadline:
+            raise IdempotencyConflict()
+        time.sleep(POLL_INTERVAL)
+
+
+def _release(key):
+    IdempotencyRecord.objects.filter(key=key, status_code__isnull=True).delete()
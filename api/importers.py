@@ -0,0 +1,231 @@
+"""
+CSV import of room types, rooms and menu items.
+
+The file is read row by row (csv.DictReader over the open file). Every row
+is validated before anything is written, and all errors are reported
+together. Valid files are then upserted with
+bulk_create(update_conflicts=True) in chunks, inside one transaction, on
+each model's natural key:
+
+    room-types   name
+    rooms        room_number (room_type given by name)
+    menu         name + category
+
+Only the cells given in a row are updated on existing rows: a file with
+just `room_number,room_type,status` leaves floors and notes alone, and so
+does an empty floor or note cell. Rows are upserted in groups of the same
+given fields for that.
+
+Example rooms.csv:
+
+    room_number,room_type,floor,status
+    101,Deluxe,1,available
+    102,Deluxe,1,available
+"""
+import csv
+from collections import namedtuple
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from api import availability, housekeeping, inventory, rollups
+from api.models import AvailabilityVersion, Menu, Room, RoomType
+from api.serializers.import_serializers import MenuRowSerializer, RoomRowSerializer, RoomTypeRowSerializer
+
+
+CHUNK_SIZE = 1000
+
+ImportResult = namedtuple("ImportResult", "kind rows created updated")
+
+
+class CSVImportError(Exception):
+    """The file did not validate. `errors` is a list of {"row": n, "errors": ...}."""
+
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} row(s) failed validation.")
+        self.errors = errors
+
+
+class Importer:
+    model = None
+    serializer_class = None
+    key = ()
+
+    def __init__(self):
+        self.existing = {}
+
+    def load_existing(self):
+        """{natural key: (pk, ...extra)} of the rows already in the database."""
+        return {row[1:]: row for row in self.model.objects.values_list("pk", *self.key).iterator()}
+
+    def resolve(self, data):
+        """Turn a validated row into model field values. Raise ValidationError to reject it."""
+        return data
+
+    def build(self, values):
+        return self.model(**values)
+
+    def after_upsert(self, objects):
+        pass
+
+    def key_of(self, values):
+        return tuple(values[field] for field in self.key)
+
+    def validate(self, reader):
+        """Validate every row; return the list of field dicts or raise CSVImportError."""
+        # One serializer for every row: building its fields again per row would dominate the run time
+        row_serializer = self.serializer_class()
+        required = {name for name, field in row_serializer.fields.items() if field.required}
+        missing = required - set(reader.fieldnames or ())
+        if missing:
+            raise CSVImportError([{"row": 1, "errors": {"columns": [f"Missing column(s): {', '.join(sorted(missing))}."]}}])
+
+        self.existing = self.load_existing()
+        rows, errors, seen = [], [], {}
+
+        # Row 1 is the header
+        for line, raw in enumerate(reader, start=2):
+            raw = {name: value.strip() for name, value in raw.items() if name and value is not None}
+            # Empty optional cells mean "not given"
+            raw = {name: value for name, value in raw.items() if value != "" or name in required}
+
+            try:
+                values = self.resolve(dict(row_serializer.run_validation(raw)))
+            except serializers.ValidationError as exc:
+                errors.append({"row": line, "errors": exc.detail})
+                continue
+
+            key = self.key_of(values)
+            if key in seen:
+                errors.append({"row": line, "errors": {"non_field_errors": [f"Duplicate of row {seen[key]}."]}})
+                continue
+            seen[key] = line
+            rows.append(values)
+
+        if errors:
+            raise CSVImportError(errors)
+        return rows
+
+    def count_new(self, rows):
+        return sum(1 for values in rows if self.key_of(values) not in self.existing)
+
+    def upsert(self, rows):
+        # Rows without a cell would otherwise overwrite the existing value with the model default
+        groups = {}
+        for values in rows:
+            groups.setdefault(frozenset(values), []).append(values)
+        now = timezone.now()
+
+        with transaction.atomic():
+            for given, group in groups.items():
+                update_fields = [
+                    self.model._meta.get_field(name).name for name in sorted(given) if name not in self.key
+                ] + ["updated_at"]
+                for start in range(0, len(group), CHUNK_SIZE):
+                    objects = [self.build(values) for values in group[start:start + CHUNK_SIZE]]
+                    for obj in objects:
+                        obj.updated_at = now
+                    self.model.objects.bulk_create(
+                        objects,
+                        update_conflicts=True,
+                        unique_fields=list(self.key),
+                        update_fields=update_fields,
+                    )
+                    self.after_upsert(objects)
+
+
+class RoomTypeImporter(Importer):
+    model = RoomType
+    serializer_class = RoomTypeRowSerializer
+    key = ("name",)
+
+    def after_upsert(self, objects):
+        # RoomTypes made by bulk_create skip the signal that creates this row
+        ids = RoomType.objects.filter(name__in=[obj.name for obj in objects]).values_list("id", flat=True)
+        AvailabilityVersion.objects.bulk_create(
+            [AvailabilityVersion(room_type_id=room_type_id) for room_type_id in ids],
+            ignore_conflicts=True,
+        )
+        # Room type fields are not part of the availability index, no bump needed
+
+
+class RoomImporter(Importer):
+    model = Room
+    serializer_class = RoomRowSerializer
+    key = ("room_number",)
+
+    def load_existing(self):
+        self.room_types = dict(RoomType.objects.values_list("name", "id"))
+        return {
+            (room_number,): (pk, room_type_id)
+            for pk, room_number, room_type_id in Room.objects.values_list("pk", "room_number", "room_type_id").iterator()
+        }
+
+    def resolve(self, data):
+        room_type_id = self.room_types.get(data.pop("room_type"))
+        if room_type_id is None:
+            raise serializers.ValidationError({"room_type": ["No room type with this name. Import room types first."]})
+        data["room_type_id"] = room_type_id
+        return data
+
+    def after_upsert(self, objects):
+        # bulk_create skips the Room signals; rooms may have moved between room types
+        room_type_ids = {obj.room_type_id for obj in objects}
+        room_type_ids.update(
+            self.existing[(obj.room_number,)][1] for obj in objects if (obj.room_number,) in self.existing
+        )
+        availability.bump_versions(room_type_ids)
+        rollups.schedule_inventory_refresh(room_type_ids)
+        housekeeping.sync_room_tasks(
+            Room.objects.filter(room_number__in=[obj.room_number for obj in objects]).values_list("pk", flat=True)
+        )
+
+
+class MenuImporter(Importer):
+    model = Menu
+    serializer_class = MenuRowSerializer
+    key = ("name", "category")
+
+    def load_existing(self):
+        return {
+            (name, category): (pk, stock)
+            for pk, name, category, stock in Menu.objects.values_list("pk", "name", "category", "stock").iterator()
+        }
+
+    def after_upsert(self, objects):
+        # Stock set by the file goes into the inventory ledger (api/inventory.py)
+        keys = {(obj.name, obj.category) for obj in objects}
+        rows = Menu.objects.filter(name__in={name for name, _ in keys}).values_list("pk", "name", "category", "stock")
+        inventory.record_adjustments(
+            {
+                pk: (self.existing[(name, category)][1] if (name, category) in self.existing else 0, stock)
+                for pk, name, category, stock in rows
+                if (name, category) in keys
+            },
+            note="CSV import",
+        )
+
+
+IMPORTERS = {
+    "room-types": RoomTypeImporter,
+    "rooms": RoomImporter,
+    "menu": MenuImporter,
+}
+
+
+def import_csv(kind, text_file, dry_run=False):
+    """
+    Import an open text file of the given kind (a key of IMPORTERS).
+    Raises CSVImportError listing every invalid row; nothing is written then.
+    With dry_run the file is only validated.
+    """
+    importer = IMPORTERS[kind]()
+    reader = csv.DictReader(text_file)
+    rows = importer.validate(reader)
+
+    created = importer.count_new(rows)
+    if not dry_run:
+        importer.upsert(rows)
+
+    return ImportResult(kind, len(rows), created, len(rows) - created)
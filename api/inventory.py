@@ -0,0 +1,198 @@
+"""
+Stock ledger of menu items.
+
+Every change of Menu.stock is also written as a StockMovement: sales by
+order creation (one bulk insert per order), restocks and spoilage by the
+inventory staff, and adjustments for stock set directly (menu edits, CSV
+import, admin). The ledger is append-only.
+
+Summing a long ledger is slow, so `take_snapshots()` (manage.py
+snapshot_stock, e.g. nightly) stores every item's stock up to the newest
+movement. Stock per the ledger is the item's latest snapshot plus the
+movements after it (a few rows, found through the (menu, id) index);
+stock at an earlier moment starts from the latest snapshot before it.
+
+Menu.stock stays the number orders are checked against. `reconcile()`
+(manage.py reconcile_stock) lists the items whose Menu.stock and ledger
+disagree.
+"""
+from collections import namedtuple
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from api.models import Menu, StockMovement, StockSnapshot
+
+
+Kind = StockMovement.Kind
+
+# Movements returned by one history request
+HISTORY_LIMIT = 500
+
+Mismatch = namedtuple("Mismatch", "menu_id name stock ledger_stock")
+
+
+def record(movements):
+    """Append movements (unsaved StockMovement objects) in one query."""
+    if movements:
+        StockMovement.objects.bulk_create(movements)
+
+
+def record_adjustments(changes, user_id=None, note=""):
+    """Record ADJUSTMENT movements for stock set directly. `changes`: {menu_id: (old stock, new stock)}."""
+    record([
+        StockMovement(menu_id=menu_id, kind=Kind.ADJUSTMENT, quantity=new - old, created_by_id=user_id, note=note)
+        for menu_id, (old, new) in changes.items()
+        if new != old
+    ])
+
+
+def change_stock(menu_id, kind, quantity, user_id=None, note=""):
+    """
+    Apply a restock / spoilage / adjustment to Menu.stock and record it.
+    `quantity` is added for restocks and adjustments (which may be negative)
+    and taken away for spoilage. Returns the movement, or None if the stock
+    would go below zero.
+    """
+    delta = -quantity if kind == Kind.SPOILAGE else quantity
+    with transaction.atomic():
+        # Write first: one conditional UPDATE, no read-then-write race
+        if not Menu.objects.filter(pk=menu_id, stock__gte=-delta).update(
+            stock=F("stock") + delta, updated_at=timezone.now()
+        ):
+            return None
+        Menu.objects.filter(pk=menu_id, stock=0).update(is_available=False)
+        return StockMovement.objects.create(menu_id=menu_id, kind=kind, quantity=delta, created_by_id=user_id, note=note)
+
+
+# ------------------------------
+# Reading the ledger
+# ------------------------------
+def with_ledger_stock(menus, before_id=None):
+    """
+    Annotate a Menu queryset with `ledger_stock`: the latest snapshot plus
+    the movements after it. With `before_id`, only movements with a smaller
+    id count (the stock just before that movement).
+    """
+    snapshots = StockSnapshot.objects.filter(menu=OuterRef("pk"))
+    movements = StockMovement.objects.filter(menu=OuterRef("pk"), id__gt=OuterRef("snapshot_cutoff"))
+    if before_id is not None:
+        snapshots = snapshots.filter(last_movement_id__lt=before_id)
+        movements = movements.filter(id__lt=before_id)
+    latest = snapshots.order_by("-last_movement_id")
+    since_snapshot = movements.order_by().values("menu").annotate(total=Sum("quantity")).values("total")
+
+    return menus.annotate(
+        snapshot_cutoff=Coalesce(Subquery(latest.values("last_movement_id")[:1]), Value(0)),
+    ).annotate(
+        ledger_stock=Coalesce(Subquery(latest.values("stock")[:1]), Value(0))
+        + Coalesce(Subquery(since_snapshot), Value(0)),
+    )
+
+
+def first_movement_id(moment):
+    """Id of the first movement at or after `moment` (one past the newest if there is none)."""
+    first = StockMovement.objects.filter(created_at__gte=moment).order_by("created_at", "id").values_list("id", flat=True).first()
+    if first is None:
+        first = (StockMovement.objects.aggregate(last=Max("id"))["last"] or 0) + 1
+    return first
+
+
+def history(menu_id, since=None, until=None, limit=HISTORY_LIMIT):
+    """
+    (opening stock, movements, has_more) of one item, oldest first: the
+    movements from `since`, or the newest `limit` ones, up to `until`. Each
+    movement gets `balance`, the stock after it.
+    """
+    movements = StockMovement.objects.filter(menu_id=menu_id)
+    if until:
+        movements = movements.filter(id__lt=first_movement_id(until))
+    if since:
+        start_id = first_movement_id(since)
+    else:
+        # Movement ids start at 1, so 1 means "from the opening snapshot"
+        start_id = movements.order_by("-id").values_list("id", flat=True)[limit - 1:limit].first() or 1
+
+    opening = with_ledger_stock(Menu.objects.filter(pk=menu_id), before_id=start_id).values_list("ledger_stock", flat=True).get()
+    movements = list(movements.filter(id__gte=start_id).select_related("created_by").order_by("id")[:limit + 1])
+    has_more = len(movements) > limit
+    movements = movements[:limit]
+
+    balance = opening
+    for movement in movements:
+        balance += movement.quantity
+        movement.balance = balance
+    return opening, movements, has_more
+
+
+def valuation(as_of=None):
+    """
+    Ledger stock and its value at the current menu prices, per item and in
+    total, now or at `as_of`.
+    """
+    before_id = first_movement_id(as_of) if as_of else None
+    items = [
+        {
+            "menu_id": pk,
+            "name": name,
+            "category": category,
+            "stock": stock,
+            "price": price,
+            "value": price * stock,
+        }
+        for pk, name, category, price, stock in with_ledger_stock(Menu.objects.order_by("category", "name"), before_id)
+        .values_list("pk", "name", "category", "price", "ledger_stock")
+    ]
+
+    categories = {}
+    for item in items:
+        totals = categories.setdefault(item["category"], {"stock": 0, "value": Decimal("0")})
+        totals["stock"] += item["stock"]
+        totals["value"] += item["value"]
+
+    return {
+        "as_of": as_of,
+        "items": items,
+        "categories": categories,
+        "total_value": sum((item["value"] for item in items), Decimal("0")),
+    }
+
+
+# ------------------------------
+# Snapshots and reconciliation
+# ------------------------------
+def take_snapshots():
+    """Store every item's ledger stock up to the newest movement. Returns (cutoff movement id, items)."""
+    with transaction.atomic():
+        # Writers (Menu.deduct_stock for orders, change_stock) change Menu.stock
+        # with an UPDATE, which holds the row lock, before recording their
+        # movements, so once the item rows are locked every movement below
+        # the cutoff is committed
+        list(Menu.objects.select_for_update().values_list("pk", flat=True))
+        cutoff = StockMovement.objects.aggregate(last=Max("id"))["last"] or 0
+        levels = with_ledger_stock(Menu.objects.all(), before_id=cutoff + 1).values_list("pk", "ledger_stock")
+        snapshots = [StockSnapshot(menu_id=pk, last_movement_id=cutoff, stock=stock) for pk, stock in levels]
+        # Items already snapshotted at this cutoff are unchanged
+        StockSnapshot.objects.bulk_create(snapshots, ignore_conflicts=True)
+    return cutoff, len(snapshots)
+
+
+def reconcile():
+    """Items whose Menu.stock differs from the ledger."""
+    return [
+        Mismatch(*row)
+        for row in with_ledger_stock(Menu.objects.order_by("pk"))
+        .exclude(stock=F("ledger_stock"))
+        .values_list("pk", "name", "stock", "ledger_stock")
+    ]
+
+
+def fix_mismatches(mismatches):
+    """Record adjustments that bring the ledger in line with Menu.stock."""
+    record_adjustments(
+        {mismatch.menu_id: (mismatch.ledger_stock, mismatch.stock) for mismatch in mismatches},
+        note="Reconciled with Menu.stock",
+    )
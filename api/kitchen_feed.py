@@ -0,0 +1,130 @@
+"""
+Kitchen display feed.
+
+Every Order gets a new `feed_seq` from the "kitchen" FeedSequence when it
+is created and whenever its order_status changes (Order post_save signal).
+The number is taken after the order's transaction commits, in a short
+transaction of its own: the counter row is locked only for that increment,
+not for the whole order transaction, so order creation is not serialized,
+and numbers still become visible in order. An order whose worker dies
+between its commit and that increment is missing from the change feed
+until its next status change; a tablet starting up still sees it, since
+the snapshot reads open orders by status.
+
+A tablet first asks for the open orders (PENDING / PREPARING) and keeps the
+returned cursor. Afterwards it asks for the orders whose feed_seq is above
+its cursor, which includes orders that left the kitchen (SERVED /
+CANCELLED) so the tablet can drop them. With `wait`, the request is held
+until something changes or the wait runs out (long-polling).
+
+Long-polls belong on the ASGI workers (AsyncOrderFeedView in
+api/views/async_reads.py), where a waiting tablet costs a coroutine, up to
+MAX_WAIT seconds. Under WSGI every waiting tablet holds a worker thread, so
+the wait is capped at SYNC_MAX_WAIT; size the WSGI pool for one thread per
+tablet on top of the regular traffic if tablets are routed there. Changes
+made by this worker wake sync waiters at once; otherwise the counter row is
+re-read every POLL_INTERVAL seconds.
+"""
+import asyncio
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import F
+
+from api.models import FeedSequence, Order
+
+
+SEQUENCE = "kitchen"
+OPEN_STATUSES = (Order.OrderStatus.PENDING, Order.OrderStatus.PREPARING)
+POLL_INTERVAL = 1.0
+MAX_WAIT = 30
+SYNC_MAX_WAIT = 5
+
+_changed = threading.Condition()
+
+
+def next_seq():
+    """Take the next kitchen sequence number. Locks the counter row until the transaction ends."""
+    sequence, _ = FeedSequence.objects.get_or_create(name=SEQUENCE)
+    FeedSequence.objects.filter(pk=sequence.pk).update(value=F("value") + 1)
+    return FeedSequence.objects.values_list("value", flat=True).get(pk=sequence.pk)
+
+
+def current_seq():
+    return FeedSequence.objects.filter(name=SEQUENCE).values_list("value", flat=True).first() or 0
+
+
+async def acurrent_seq():
+    return await FeedSequence.objects.filter(name=SEQUENCE).values_list("value", flat=True).afirst() or 0
+
+
+def order_changed(order):
+    """Give `order` the next sequence number once the caller's transaction commits, then wake waiting feeds."""
+    transaction.on_commit(lambda: _assign_seq(order.pk))
+
+
+def _assign_seq(order_id):
+    with transaction.atomic():
+        # Not a user edit, so Order.version is left alone (the caller's instance stays current)
+        Order.objects.filter(pk=order_id).update(feed_seq=next_seq())
+    with _changed:
+        _changed.notify_all()
+
+
+def wait_for_changes(since, timeout):
+    """Block until the kitchen sequence passes `since` or `timeout` seconds pass. Returns the sequence."""
+    deadline = time.monotonic() + timeout
+    while True:
+        seq = current_seq()
+        remaining = deadline - time.monotonic()
+        if seq > since or remaining <= 0:
+            return seq
+        with _changed:
+            _changed.wait(min(POLL_INTERVAL, remaining))
+
+
+async def await_changes(since, timeout):
+    """wait_for_changes without holding a thread: polls the counter row."""
+    deadline = time.monotonic() + timeout
+    while True:
+        seq = await acurrent_seq()
+        remaining = deadline - time.monotonic()
+        if seq > since or remaining <= 0:
+            return seq
+        await asyncio.sleep(min(POLL_INTERVAL, remaining))
+
+
+def _orders():
+    return Order.objects.select_related("booking__room").prefetch_related("items")
+
+
+def snapshot():
+    """(cursor, open orders oldest first) for a tablet starting up."""
+    # Read the cursor first: a change committed in between is sent again next time, never lost
+    cursor = current_seq()
+    return cursor, list(_orders().filter(order_status__in=OPEN_STATUSES).order_by("created_at"))
+
+
+def orders_between(since, cursor):
+    """Orders changed after `since` up to `cursor`, in feed order."""
+    if cursor <= since:
+        return []
+    return list(_orders().filter(feed_seq__gt=since, feed_seq__lte=cursor).order_by("feed_seq"))
+
+
+def changes_since(since, wait=0):
+    """(cursor, orders changed after `since` in feed order), waiting up to `wait` seconds (SYNC_MAX_WAIT at most)."""
+    cursor = wait_for_changes(since, min(wait, SYNC_MAX_WAIT)) if wait else current_seq()
+    if cursor <= since:
+        return since, []
+    return cursor, orders_between(since, cursor)
+
+
+async def achanges_since(since, wait=0):
+    """changes_since for async views, waiting up to MAX_WAIT seconds."""
+    cursor = await await_changes(since, min(wait, MAX_WAIT)) if wait else await acurrent_seq()
+    if cursor <= since:
+        return since, []
+    return cursor, await sync_to_async(orders_between)(since, cursor)
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from api import menu_sales
+
+
+class Command(BaseCommand):
+    help = (
+        "Fold new order items into the menu sales table and recompute Menu.isBestSeller. "
+        "Only items added since the last run are read; schedule it (e.g. every few minutes) with cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=menu_sales.DEFAULT_BATCH_SIZE)
+        parser.add_argument("--rebuild", action="store_true", help="Discard the table and aggregate all order items again.")
+        parser.add_argument("--skip-best-sellers", action="store_true", help="Don't recompute Menu.isBestSeller.")
+        parser.add_argument("--window-days", type=int, help="Best seller window (defaults to settings.BEST_SELLER_WINDOW_DAYS).")
+        parser.add_argument("--count", type=int, help="Number of best sellers (defaults to settings.BEST_SELLER_COUNT).")
+
+    def handle(self, *args, **options):
+        if options["rebuild"]:
+            processed = menu_sales.rebuild()
+        else:
+            processed = menu_sales.aggregate_new_order_items(batch_size=options["batch_size"])
+        self.stdout.write(f"Aggregated {processed} order items.")
+
+        if not options["skip_best_sellers"]:
+            top = menu_sales.refresh_best_sellers(options["window_days"], options["count"])
+            self.stdout.write(f"Best sellers: {top}")
+
+        self.stdout.write(self.style.SUCCESS("Done."))
@@ -0,0 +1,140 @@
+import asyncio
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from api.models import RoomType
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the read endpoints through Django's own handlers, in process: "
+        "WSGI with a pool of threads (as a threaded WSGI server) vs. ASGI with "
+        "concurrent requests on one event loop (the async views of "
+        "backend/urls_asgi.py). No network or server involved."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2_000, help="Requests per endpoint and handler.")
+        parser.add_argument("--concurrency", type=int, default=100, help="Threads (WSGI) / requests in flight (ASGI).")
+        parser.add_argument("--path", action="append", dest="paths", help="Endpoint to request (repeatable).")
+
+    def handle(self, *args, **options):
+        count = options["requests"]
+        concurrency = options["concurrency"]
+        paths = options["paths"] or self._default_paths()
+
+        wsgi = WSGIHandler()
+        # The async views are opt-in (settings.ASYNC_READ_VIEWS); the middleware is chosen here
+        with override_settings(ASYNC_READ_VIEWS=True):
+            asgi = ASGIHandler()
+
+        for path in paths:
+            # Warm up both (url resolvers, caches, availability index)
+            self._check(path, "WSGI", self._wsgi_request(wsgi, path))
+            self._check(path, "ASGI", asyncio.run(self._asgi_request(asgi, path)))
+
+            wsgi_seconds = self._run_wsgi(wsgi, path, count, concurrency)
+            asgi_seconds = asyncio.run(self._run_asgi(asgi, path, count, concurrency))
+
+            self.stdout.write(path)
+            self.stdout.write(f"  {'WSGI, ' + str(concurrency) + ' threads':<28} {count / wsgi_seconds:8.0f} requests/s")
+            self.stdout.write(f"  {'ASGI, ' + str(concurrency) + ' concurrent':<28} {count / asgi_seconds:8.0f} requests/s")
+
+    def _default_paths(self):
+        paths = ["/api/room_type/", "/api/menu/"]
+        room_type_id = RoomType.objects.values_list("pk", flat=True).first()
+        if room_type_id is not None:
+            paths.append(f"/api/room-types/{room_type_id}/available-rooms/?check_in=2030-01-01&check_out=2030-01-04")
+        return paths
+
+    def _check(self, path, handler, status):
+        if status != 200:
+            raise CommandError(f"{handler} GET {path} returned {status}")
+
+    # ------------------------------
+    # WSGI
+    # ------------------------------
+    def _wsgi_request(self, handler, path):
+        path_info, _, query_string = path.partition("?")
+        environ = {
+            "REQUEST_METHOD": "GET",
+            "PATH_INFO": path_info,
+            "QUERY_STRING": query_string,
+            "SERVER_NAME": "localhost",
+            "SERVER_PORT": "80",
+            "SERVER_PROTOCOL": "HTTP/1.1",
+            "wsgi.url_scheme": "http",
+            "wsgi.input": io.BytesIO(),
+            "wsgi.errors": io.StringIO(),
+        }
+        status = []
+        response = handler(environ, lambda status_line, headers: status.append(status_line))
+        b"".join(response)
+        response.close()
+        return int(status[0].split()[0])
+
+    def _run_wsgi(self, handler, path, count, concurrency):
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            started = time.perf_counter()
+            statuses = list(pool.map(lambda _: self._wsgi_request(handler, path), range(count)))
+            seconds = time.perf_counter() - started
+        self._check(path, "WSGI", max(statuses))
+        return seconds
+
+    # ------------------------------
+    # ASGI
+    # ------------------------------
+    async def _asgi_request(self, handler, path):
+        path_info, _, query_string = path.partition("?")
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path_info,
+            "raw_path": path_info.encode(),
+            "query_string": query_string.encode(),
+            "headers": [(b"host", b"localhost")],
+            "server": ("localhost", 80),
+            "client": ("127.0.0.1", 50000),
+        }
+        disconnect = asyncio.Event()
+
+        async def receive():
+            if not hasattr(receive, "sent"):
+                receive.sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            # The handler also listens for a disconnect; it comes once the response is sent
+            await disconnect.wait()
+            return {"type": "http.disconnect"}
+
+        status = []
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                status.append(message["status"])
+            elif not message.get("more_body"):
+                disconnect.set()
+
+        await handler(scope, receive, send)
+        return status[0]
+
+    async def _run_asgi(self, handler, path, count, concurrency):
+        in_flight = asyncio.Semaphore(concurrency)
+
+        async def one():
+            async with in_flight:
+                return await self._asgi_request(handler, path)
+
+        started = time.perf_counter()
+        statuses = await asyncio.gather(*(one() for _ in range(count)))
+        seconds = time.perf_counter() - started
+        self._check(path, "ASGI", max(statuses))
+        return seconds
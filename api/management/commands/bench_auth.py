@@ -0,0 +1,79 @@
+import timeit
+
+from django.db import transaction
+from django.core.management.base import BaseCommand
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from api.authentication import ClaimsJWTAuthentication, invalidate_user_state
+from api.models import CustomUser
+from api.permissions import FRONT_DESK, RESTAURANT, HasRole
+from api.serializers.auth import CustomTokenObtainPairSerializer
+
+
+class _OrdersView(APIView):
+    allowed_roles = {"list": (RESTAURANT, FRONT_DESK), "*": (RESTAURANT,)}
+    action = "list"
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark per-request authentication and role permission overhead: "
+        "database-backed JWT authentication vs. claims-based authentication "
+        "plus HasRole. Uses a throwaway user that is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=20_000)
+
+    def handle(self, *args, **options):
+        count = options["requests"]
+
+        with transaction.atomic():
+            user = CustomUser.objects.create_user("bench-auth-user", password=None, role=FRONT_DESK)
+            token = str(CustomTokenObtainPairSerializer.get_token(user).access_token)
+            results = self._run(token, count)
+            transaction.set_rollback(True)
+        invalidate_user_state(user.pk)
+
+        for label, micros in results:
+            self.stdout.write(f"{label:<42} {micros:8.1f} us/request")
+
+    def _run(self, token, count):
+        factory = APIRequestFactory()
+        view = _OrdersView()
+        db_auth = JWTAuthentication()
+        claims_auth = ClaimsJWTAuthentication()
+        permission = HasRole()
+
+        def make_request():
+            request = Request(factory.get("/api/order/", HTTP_AUTHORIZATION=f"Bearer {token}"))
+            request.parser_context = {"view": view}
+            return request
+
+        requests = [make_request() for _ in range(count)]
+        claims_auth.authenticate(requests[0])  # fill the user state cache
+
+        def db_only():
+            for request in requests:
+                db_auth.authenticate(request)
+
+        def claims_only():
+            for request in requests:
+                claims_auth.authenticate(request)
+
+        def claims_and_permission():
+            for request in requests:
+                request.user, request.auth = claims_auth.authenticate(request)
+                permission.has_permission(request, view)
+
+        def per_request_us(func):
+            return min(timeit.repeat(func, number=1, repeat=3)) / count * 1_000_000
+
+        return [
+            ("JWTAuthentication (user query)", per_request_us(db_only)),
+            ("ClaimsJWTAuthentication", per_request_us(claims_only)),
+            ("ClaimsJWTAuthentication + HasRole", per_request_us(claims_and_permission)),
+        ]
@@ -0,0 +1,70 @@
+import datetime
+import random
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from api.availability import RoomTypeIndex
+from api.models import Room
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the in-memory availability index on synthetic data "
+        "(no database access): builds an index of N bookings and times lookups."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--bookings", type=int, default=100_000)
+        parser.add_argument("--rooms", type=int, default=50, help="Physical rooms in the room type.")
+        parser.add_argument("--lookups", type=int, default=20_000)
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        room_count = options["rooms"]
+        per_room = max(1, options["bookings"] // room_count)
+        first_day = datetime.date(2020, 1, 1)
+
+        rooms = [
+            {"id": room_id, "room_number": str(100 + room_id), "status": Room.Status.AVAILABLE, "floor": 1, "room_type": 1}
+            for room_id in range(1, room_count + 1)
+        ]
+
+        # Back-to-back stays of 1-4 nights with random gaps, per room
+        bookings = []
+        booking_id = 0
+        for room in rooms:
+            day = first_day
+            for _ in range(per_room):
+                day += datetime.timedelta(days=rng.randint(0, 2))
+                nights = rng.randint(1, 4)
+                booking_id += 1
+                bookings.append((f"BKG-{booking_id}", room["id"], day, day + datetime.timedelta(days=nights)))
+                day += datetime.timedelta(days=nights)
+        last_day = max(check_out for _, _, _, check_out in bookings)
+
+        build_start = timeit.default_timer()
+        index = RoomTypeIndex(1, 0, rooms, bookings)
+        build_seconds = timeit.default_timer() - build_start
+
+        span = (last_day - first_day).days
+        stays = []
+        for _ in range(options["lookups"]):
+            check_in = first_day + datetime.timedelta(days=rng.randint(0, span))
+            stays.append((check_in, check_in + datetime.timedelta(days=rng.randint(1, 7))))
+
+        def per_call_us(func, calls):
+            seconds = min(timeit.repeat(func, number=1, repeat=3))
+            return seconds / calls * 1_000_000
+
+        room_intervals = index.intervals[rooms[0]["id"]]
+        ordinals = [(a.toordinal(), b.toordinal()) for a, b in stays]
+
+        single_room_us = per_call_us(lambda: [room_intervals.overlaps(a, b) for a, b in ordinals], len(ordinals))
+        room_type_us = per_call_us(lambda: [index.available_rooms(a, b) for a, b in stays], len(stays))
+
+        self.stdout.write(f"bookings indexed:         {len(bookings):,} across {room_count} rooms")
+        self.stdout.write(f"index build:              {build_seconds * 1000:.1f} ms")
+        self.stdout.write(f"single room overlap test: {single_room_us:.2f} us/lookup ({len(room_intervals):,} intervals)")
+        self.stdout.write(f"room type availability:   {room_type_us:.2f} us/lookup ({room_count} rooms)")
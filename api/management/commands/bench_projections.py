@@ -0,0 +1,141 @@
+import datetime
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from api import projections
+from api.models import Booking, Menu, Order, OrderItem, Payment, Room, RoomType
+from api.serializers.booking_serializer import BookingSerializer, CheckedInBookingSerializer
+from api.serializers.menu_serializer import OrderSerializer
+from api.serializers.room_serializers import RoomOperationSerializer
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the list projections (api/projections.py) against the serializers they "
+        "replace, on synthetic bookings, orders and rooms created in a transaction that is "
+        "rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--bookings", type=int, default=2_000)
+        parser.add_argument("--orders", type=int, default=2_000)
+        parser.add_argument("--rooms", type=int, default=200)
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._create(options)
+                self._run(options["repeat"])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, repeat):
+        bookings = Booking.objects.select_related("room__room_type").prefetch_related("payments")
+        orders = Order.objects.order_by("-created_at")
+        rooms = Room.objects.select_related("room_type").order_by("floor", "room_number")
+        checked_in = (
+            Booking.objects.filter(status=Booking.Status.CHECKED_IN)
+            .select_related("assigned_room", "assigned_room__room_type")
+            .order_by("assigned_room__room_number")
+        )
+        endpoints = [
+            ("GET /api/booking-list/", bookings, BookingSerializer, projections.bookings),
+            ("GET /api/order/", orders, OrderSerializer, projections.orders),
+            ("GET /api/room-operations/", rooms, RoomOperationSerializer, projections.room_operations),
+            ("GET /api/bookings/list/checked-in/", checked_in, CheckedInBookingSerializer, projections.checked_in_bookings),
+        ]
+
+        self.stdout.write(f"{'endpoint':<36} {'rows':>6} {'serializer ms':>14} {'queries':>8} {'projection ms':>14} {'queries':>8}")
+        for label, queryset, serializer_class, project in endpoints:
+            # .all(): a fresh queryset per run, not the previous run's cached rows
+            baseline, serializer_ms, serializer_queries = self._time(
+                lambda: serializer_class(queryset.all(), many=True).data, repeat
+            )
+            result, projection_ms, projection_queries = self._time(lambda: project(queryset.all()), repeat)
+            if result != baseline:
+                raise CommandError(f"{label}: the projection differs from the serializer.")
+            self.stdout.write(
+                f"{label:<36} {len(result):>6} {serializer_ms:>14.1f} {serializer_queries:>8} "
+                f"{projection_ms:>14.1f} {projection_queries:>8}"
+            )
+
+    def _time(self, build, repeat):
+        """(result, best time in ms, queries of one run)"""
+        best = None
+        for _ in range(repeat):
+            queries = []
+            # Counted with a wrapper: the debug query log only keeps the last 9000
+            with connection.execute_wrapper(lambda execute, sql, *args: queries.append(sql) or execute(sql, *args)):
+                started = time.perf_counter()
+                result = build()
+                elapsed = (time.perf_counter() - started) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        return result, best, len(queries)
+
+    def _create(self, options):
+        """Synthetic rows with bulk_create (no signals: search index, kitchen feed, ...)."""
+        room_types = RoomType.objects.bulk_create(
+            RoomType(name=f"Bench type {i}", price=Decimal("2500.00")) for i in range(5)
+        )
+        rooms = Room.objects.bulk_create(
+            Room(room_number=f"B{i:04d}", floor=1 + i % 10, room_type=room_types[i % 5], note="Bench" if i % 7 == 0 else None)
+            for i in range(options["rooms"])
+        )
+
+        statuses = (Booking.Status.CONFIRMED, Booking.Status.CHECKED_IN, Booking.Status.CHECKED_OUT)
+        bookings = []
+        for i in range(options["bookings"]):
+            check_in = datetime.date(2030, 1, 1) + datetime.timedelta(days=i % 365)
+            bookings.append(Booking(
+                id=f"BKG-BENCH-{i:06d}",
+                room=rooms[i % len(rooms)],
+                assigned_room=rooms[i % len(rooms)] if i % 3 else None,
+                guest_name=f"Bench guest {i}",
+                email=f"bench{i}@example.com",
+                contact_number="09170000000",
+                check_in=check_in,
+                check_out=check_in + datetime.timedelta(days=2),
+                adults=2,
+                children=i % 2,
+                total_price=Decimal("5000.00"),
+                status=statuses[i % 3],
+            ))
+        Booking.objects.bulk_create(bookings)
+
+        payments = []
+        for i, booking in enumerate(bookings):
+            payments.append(Payment(
+                booking=booking, amount=Decimal("1000.00"), payment_type=Payment.PaymentCategory.DOWNPAYMENT,
+                status=Payment.PaymentStatus.PAID, transaction_reference=f"GC{i:010d}", receipt=f"payment_receipts/bench_{i}.jpg",
+            ))
+            if i % 2:
+                payments.append(Payment(
+                    booking=booking, amount=Decimal("4000.00"), payment_type=Payment.PaymentCategory.REMAINING,
+                    status=Payment.PaymentStatus.PAID,
+                ))
+        Payment.objects.bulk_create(payments)
+
+        menus = Menu.objects.bulk_create(
+            Menu(name=f"Bench dish {i}", category="MAIN", price=Decimal("150.00") + i, stock=1000) for i in range(10)
+        )
+        orders = Order.objects.bulk_create(
+            Order(booking=bookings[i % len(bookings)] if bookings and i % 2 else None, total_amount=Decimal("450.00"))
+            for i in range(options["orders"])
+        )
+        OrderItem.objects.bulk_create(
+            OrderItem(
+                order=order, menu=menus[(i + j) % 10], menu_name=menus[(i + j) % 10].name,
+                price=menus[(i + j) % 10].price, quantity=1 + j, subtotal=menus[(i + j) % 10].price * (1 + j),
+            )
+            for i, order in enumerate(orders)
+            for j in range(3)
+        )
@@ -0,0 +1,80 @@
+import datetime
+import timeit
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnList
+
+from api import renderers
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the response renderers (api/renderers.py) against DRF's JSONRenderer "
+        "on a synthetic GET /api/booking-list/ payload (no database access)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--bookings", type=int, default=10_000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        data = ReturnList([self._booking(index) for index in range(options["bookings"])], serializer=None)
+
+        baseline = JSONRenderer().render(data)
+        if renderers.FastJSONRenderer().render(data) != baseline:
+            raise CommandError("FastJSONRenderer output differs from JSONRenderer.")
+
+        candidates = [("JSONRenderer (json module)", JSONRenderer())]
+        if renderers.orjson is not None:
+            candidates.append(("FastJSONRenderer (orjson)", renderers.FastJSONRenderer()))
+        else:
+            self.stdout.write("orjson is not installed: FastJSONRenderer falls back to JSONRenderer.")
+        if renderers.msgpack is not None:
+            candidates.append(("MessagePackRenderer", renderers.MessagePackRenderer()))
+        else:
+            self.stdout.write("msgpack is not installed: MessagePackRenderer skipped.")
+
+        self.stdout.write(f"{options['bookings']} bookings")
+        for label, renderer in candidates:
+            seconds = min(timeit.repeat(lambda: renderer.render(data), number=1, repeat=options["repeat"]))
+            size = len(renderer.render(data))
+            self.stdout.write(f"  {label:<28} {seconds * 1000:8.1f} ms {size / 1024 / 1024:8.2f} MB")
+
+    def _booking(self, index):
+        """One booking as BookingSerializer returns it."""
+        check_in = datetime.date(2030, 1, 1) + datetime.timedelta(days=index % 365)
+        total = Decimal(3000 + index % 500) + Decimal("0.50")
+        downpayment = (total * Decimal("0.20")).quantize(Decimal("0.01"))
+        return {
+            "id": f"BKG-300101-{index:04d}",
+            "guestName": f"Guest {index}",
+            "guestEmail": f"guest{index}@example.com",
+            "guestPhone": "09170000000",
+            "status": "confirmed",
+            "checkIn": check_in.isoformat(),
+            "checkOut": (check_in + datetime.timedelta(days=2)).isoformat(),
+            "roomType": "Deluxe",
+            "roomTypeId": 1,
+            "assignedRoom": str(100 + index % 50),
+            "nights": 2,
+            "totalAmount": str(total),
+            "downpayment": downpayment,
+            "remainingBalance": total - downpayment,
+            "additionalFee": [],
+            "payments": [
+                {
+                    "id": index,
+                    "amount": str(downpayment),
+                    "payment_type": "downpayment",
+                    "status": "paid",
+                    "description": "Downpayment via GCash",
+                    "paid_at": "2029-12-01T08:30:00Z",
+                }
+            ],
+            "paymentRef": f"GC{index:010d}",
+            "paymentReceiptUrl": f"/payment_receipts/receipt_{index}.jpg",
+            "guests": 2,
+            "version": 1,
+        }
@@ -0,0 +1,125 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.http import HttpResponse
+from django.urls import path
+
+
+PROFILES = (
+    ("full (admin + API)", "backend.settings"),
+    ("API only", "backend.settings_api"),
+)
+
+
+def _ping(request):
+    return HttpResponse(b"{}", content_type="application/json")
+
+
+# Resolved for the timed requests, so only the middleware and the handler are measured
+urlpatterns = [path("ping/", _ping)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the full settings profile (backend.settings) with the API-only one "
+        "(backend.settings_api): startup time (django.setup, WSGI application, URLconf "
+        "and views), loaded apps and modules, RSS after startup and middleware overhead per "
+        "request. Each profile is measured in a fresh Python process."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=20_000, help="Requests timed per profile.")
+        parser.add_argument("--runs", type=int, default=3, help="Processes started per profile (best run is shown).")
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'profile':<20} {'startup ms':>10} {'apps':>5} {'modules':>8} {'RSS MB':>12} {'middleware us/req':>18}"
+        )
+        for label, settings_module in PROFILES:
+            runs = [self._measure_in_child(settings_module, options["requests"]) for _ in range(options["runs"])]
+            result = min(runs, key=lambda run: run["startup_ms"])
+            rss = f"{result['rss_mb']:.1f}" if result["rss_mb"] is not None else "n/a"
+            self.stdout.write(
+                f"{label:<20} {result['startup_ms']:>10.0f} {result['apps']:>5} {result['modules']:>8} "
+                f"{rss:>12} {min(run['middleware_us'] for run in runs):>18.1f}"
+            )
+
+    def _measure_in_child(self, settings_module, requests):
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": settings_module}
+        completed = subprocess.run(
+            [sys.executable, "-m", __name__, str(requests)],
+            env=env,
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+        )
+        if completed.returncode:
+            raise CommandError(f"{settings_module}: {completed.stderr.strip()}")
+        return json.loads(completed.stdout)
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _measure(requests):
+    """Run in the child process: cold start, then the timed requests."""
+    started = time.perf_counter()
+    import django
+    django.setup()
+    from django.core.wsgi import get_wsgi_application
+    from django.urls import get_resolver
+
+    handler = get_wsgi_application()
+    # Imports every view, as the first request would
+    get_resolver().url_patterns
+    startup_ms = (time.perf_counter() - started) * 1000
+    rss_mb = _peak_rss_mb()
+
+    from django.apps import apps
+    from django.test import RequestFactory
+
+    factory = RequestFactory()
+    this_module = sys.modules[__name__]
+
+    def make_request():
+        request = factory.get("/ping/", HTTP_AUTHORIZATION="Bearer token")
+        request.urlconf = this_module
+        return request
+
+    batch = [make_request() for _ in range(requests)]
+    handler.get_response(make_request())  # warm up the middleware and resolver
+
+    timed = time.perf_counter()
+    for request in batch:
+        handler.get_response(request)
+    through_handler = time.perf_counter() - timed
+
+    batch = [make_request() for _ in range(requests)]
+    timed = time.perf_counter()
+    for request in batch:
+        _ping(request)
+    view_only = time.perf_counter() - timed
+
+    return {
+        "startup_ms": startup_ms,
+        "apps": len(apps.get_app_configs()),
+        "modules": len(sys.modules),
+        "rss_mb": rss_mb,
+        "middleware_us": (through_handler - view_only) / requests * 1_000_000,
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(_measure(int(sys.argv[1]))))
@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api import openapi
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate the OpenAPI schema served at /api/schema/ and write it to "
+        "settings.API_SCHEMA_FILE (api/openapi.py). Run it at build / deploy time; "
+        "--check only reports whether the file matches the current code."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--file", help="Write here instead of settings.API_SCHEMA_FILE.")
+        parser.add_argument(
+            "--check", action="store_true", help="Exit with status 1 if the file is missing or out of date."
+        )
+
+    def handle(self, *args, **options):
+        path = options["file"] or settings.API_SCHEMA_FILE
+        version = openapi.code_version()
+
+        if options["check"]:
+            file_version, schema = openapi.read(path)
+            if schema is None or file_version != version:
+                raise CommandError(f"{path} is missing or out of date. Run generate_schema.")
+            self.stdout.write(self.style.SUCCESS(f"{path} is up to date."))
+            return
+
+        openapi.write(openapi.generate(), version, path)
+        self.stdout.write(self.style.SUCCESS(f"Wrote the schema for code version {version[:12]} to {path}."))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.importers import IMPORTERS, CSVImportError, import_csv
+
+
+class Command(BaseCommand):
+    help = (
+        "Create or update room types, rooms or menu items from a CSV file. "
+        "The whole file is validated first; nothing is written if any row is invalid."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=list(IMPORTERS))
+        parser.add_argument("path", help="CSV file with a header row.")
+        parser.add_argument("--dry-run", action="store_true", help="Only validate the file.")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options["path"], newline="", encoding="utf-8-sig") as text_file:
+                result = import_csv(options["kind"], text_file, dry_run=options["dry_run"])
+        except OSError as exc:
+            raise CommandError(f"Cannot read {options['path']}: {exc}")
+        except CSVImportError as exc:
+            for error in exc.errors:
+                messages = "; ".join(
+                    f"{field}: {' '.join(str(message) for message in field_errors)}"
+                    for field, field_errors in error["errors"].items()
+                )
+                self.stderr.write(f"Row {error['row']}: {messages}")
+            raise CommandError(str(exc))
+
+        action = "Validated" if options["dry_run"] else "Imported"
+        self.stdout.write(self.style.SUCCESS(
+            f"{action} {result.rows} {result.kind} row(s): {result.created} new, {result.updated} existing."
+        ))
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from api import night_audit
+
+
+class Command(BaseCommand):
+    help = (
+        "Close business dates (api/night_audit.py): expire unverified pending bookings, mark no-shows "
+        "and post nightly room charges. Audits every date from the current business date through "
+        "--date (default yesterday); an already audited --date is re-run, which is safe. "
+        "Schedule it after midnight with cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", help="Last business date to close (YYYY-MM-DD). Defaults to yesterday.")
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        if options["date"]:
+            last = parse_date(options["date"])
+            if last is None:
+                raise CommandError("--date must be YYYY-MM-DD.")
+        else:
+            last = today - night_audit.ONE_DAY
+        if last > today:
+            raise CommandError(f"{last} has not started yet.")
+
+        day = night_audit.business_date()
+        if day > last:
+            if not options["date"]:
+                self.stdout.write(f"Nothing to audit; the business date is {day}.")
+                return
+            # Re-run of an audited date
+            day = last
+
+        while day <= last:
+            audit = night_audit.run(day)
+            self.stdout.write(self.style.SUCCESS(
+                f"{audit.business_date}: {audit.expired} expired, {audit.no_shows} no-shows, "
+                f"{audit.room_charges} room charges (₱{audit.room_revenue}) for {audit.in_house} in-house, "
+                f"{audit.overstays} overstays."
+            ))
+            day += night_audit.ONE_DAY
@@ -0,0 +1,47 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from api import rollups
+from api.models import Booking, Payment
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily KPI rollup tables (room type stats and payment mix) from bookings and payments."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", help="First day to rebuild (YYYY-MM-DD). Defaults to the earliest booking/payment.")
+        parser.add_argument("--end", help="Last day to rebuild, inclusive (YYYY-MM-DD). Defaults to the latest booking/payment.")
+
+    def handle(self, *args, **options):
+        start = self._parse(options["start"], "--start")
+        end = self._parse(options["end"], "--end")
+
+        if start is None or end is None:
+            bounds = Booking.objects.aggregate(first=Min("check_in"), last=Max("check_out"))
+            payments = Payment.objects.aggregate(first=Min("created_at"), last=Max("created_at"))
+            candidates_start = [bounds["first"]] + ([timezone.localdate(payments["first"])] if payments["first"] else [])
+            candidates_end = [bounds["last"]] + ([timezone.localdate(payments["last"])] if payments["last"] else [])
+
+            start = start or min((d for d in candidates_start if d), default=None)
+            end = end or max((d for d in candidates_end if d), default=None)
+
+        if start is None or end is None:
+            self.stdout.write("Nothing to rebuild.")
+            return
+        if start > end:
+            raise CommandError("--start must not be after --end.")
+
+        rollups.rebuild(start, end + datetime.timedelta(days=1))
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt rollups for {start} to {end}."))
+
+    def _parse(self, value, name):
+        if value is None:
+            return None
+        parsed = parse_date(value)
+        if parsed is None:
+            raise CommandError(f"{name} must be a date in YYYY-MM-DD format.")
+        return parsed
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from api import search
+from api.models import Booking, BookingSearchDocument
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the guest search index (api/search.py) from the bookings. "
+        "It is kept up to date automatically; run this after loading bookings with raw SQL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        bookings = Booking.objects.only("id", "guest_name", "email", "contact_number").order_by()
+
+        with transaction.atomic():
+            BookingSearchDocument.objects.all().delete()
+            batch = []
+            for booking in bookings.iterator(chunk_size=batch_size):
+                batch.append(booking)
+                if len(batch) == batch_size:
+                    search.index_bookings(batch)
+                    batch = []
+            search.index_bookings(batch)
+
+        if connection.vendor == "sqlite":
+            with connection.cursor() as cursor:
+                cursor.execute(f"INSERT INTO {search.FTS_TABLE}({search.FTS_TABLE}) VALUES ('optimize')")
+
+        count = BookingSearchDocument.objects.count()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} bookings."))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api import inventory
+
+
+class Command(BaseCommand):
+    help = (
+        "Check Menu.stock against the stock ledger (api/inventory.py) and list the items that differ. "
+        "With --fix, record adjustments that bring the ledger in line with Menu.stock."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fix", action="store_true", help="Record reconciling adjustments.")
+
+    def handle(self, *args, **options):
+        mismatches = inventory.reconcile()
+        for mismatch in mismatches:
+            self.stdout.write(
+                f"{mismatch.menu_id} {mismatch.name}: Menu.stock {mismatch.stock}, ledger {mismatch.ledger_stock}"
+            )
+
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS("Menu.stock matches the ledger for every item."))
+        elif options["fix"]:
+            inventory.fix_mismatches(mismatches)
+            self.stdout.write(self.style.SUCCESS(f"Recorded adjustments for {len(mismatches)} item(s)."))
+        else:
+            raise CommandError(f"{len(mismatches)} item(s) differ from the ledger. Run with --fix to adjust the ledger.")
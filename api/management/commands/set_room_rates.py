@@ -0,0 +1,101 @@
+import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from api.models import RoomRate, RoomType
+
+
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+
+class Command(BaseCommand):
+    help = "Set (or clear) per-night rates of a room type for a date range in the rate calendar."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--room-type", required=True, help="RoomType id or name.")
+        parser.add_argument("--start", required=True, help="First night (YYYY-MM-DD).")
+        parser.add_argument("--end", required=True, help="Last night, inclusive (YYYY-MM-DD).")
+        parser.add_argument("--price", help="Nightly price. Defaults to the room type's price.")
+        parser.add_argument("--extra-adult-fee", help="Per extra adult per night. Defaults to the room type's fee.")
+        parser.add_argument("--extra-child-fee", help="Per extra child per night. Defaults to the room type's fee.")
+        parser.add_argument("--weekdays", help="Only these nights, e.g. fri,sat.")
+        parser.add_argument("--note", default="", help="Shown in the admin, e.g. 'Holiday season'.")
+        parser.add_argument("--clear", action="store_true", help="Delete the rates instead (back to the room type's price).")
+
+    def handle(self, *args, **options):
+        room_type = self._room_type(options["room_type"])
+        start = self._date(options["start"], "--start")
+        end = self._date(options["end"], "--end")
+        if start > end:
+            raise CommandError("--start must not be after --end.")
+
+        weekdays = self._weekdays(options["weekdays"])
+        days = []
+        day = start
+        while day <= end:
+            if weekdays is None or day.weekday() in weekdays:
+                days.append(day)
+            day += datetime.timedelta(days=1)
+
+        if options["clear"]:
+            deleted, _ = RoomRate.objects.filter(room_type=room_type, date__in=days).delete()
+            self.stdout.write(self.style.SUCCESS(f"Cleared {deleted} rate(s) of {room_type.name}."))
+            return
+
+        price = self._amount(options["price"], room_type.price, "--price")
+        adult_fee = self._amount(options["extra_adult_fee"], room_type.extra_adult_fee, "--extra-adult-fee")
+        child_fee = self._amount(options["extra_child_fee"], room_type.extra_child_fee, "--extra-child-fee")
+
+        RoomRate.objects.bulk_create(
+            [
+                RoomRate(
+                    room_type=room_type,
+                    date=day,
+                    price=price,
+                    extra_adult_fee=adult_fee,
+                    extra_child_fee=child_fee,
+                    note=options["note"],
+                )
+                for day in days
+            ],
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=["room_type", "date"],
+            update_fields=["price", "extra_adult_fee", "extra_child_fee", "note", "updated_at"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Set {len(days)} rate(s) of {room_type.name} to {price}."))
+
+    def _room_type(self, value):
+        room_types = RoomType.objects.filter(pk=value) if value.isdigit() else RoomType.objects.filter(name=value)
+        room_type = room_types.first()
+        if room_type is None:
+            raise CommandError(f"Room type '{value}' not found.")
+        return room_type
+
+    def _date(self, value, name):
+        parsed = parse_date(value)
+        if parsed is None:
+            raise CommandError(f"{name} must be a date in YYYY-MM-DD format.")
+        return parsed
+
+    def _weekdays(self, value):
+        if not value:
+            return None
+        names = [name.strip().lower()[:3] for name in value.split(",") if name.strip()]
+        unknown = [name for name in names if name not in WEEKDAYS]
+        if unknown:
+            raise CommandError(f"Unknown weekday(s): {', '.join(unknown)}.")
+        return {WEEKDAYS.index(name) for name in names}
+
+    def _amount(self, value, default, name):
+        if value is None:
+            return default
+        try:
+            amount = Decimal(value)
+        except InvalidOperation:
+            raise CommandError(f"{name} must be a number.")
+        if amount < 0:
+            raise CommandError(f"{name} must not be negative.")
+        return amount
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api import inventory
+
+
+class Command(BaseCommand):
+    help = (
+        "Store every menu item's stock per the stock ledger (api/inventory.py), so stock "
+        "and history reads only sum the movements since. Schedule it (e.g. nightly) with cron."
+    )
+
+    def handle(self, *args, **options):
+        cutoff, count = inventory.take_snapshots()
+        self.stdout.write(self.style.SUCCESS(f"Snapshotted {count} menu items up to movement {cutoff}."))
@@ -0,0 +1,162 @@
+"""
+Restaurant sales aggregation.
+
+`aggregate_new_order_items` folds OrderItems newer than the "menu_sales"
+checkpoint into `MenuSalesStats` (menu item x day x hour), so each run only
+reads the rows added since the previous one. Ids are not committed in
+order (on PostgreSQL a transaction can commit after one with a higher id),
+so a run stops at the first item younger than
+settings.MENU_SALES_SAFETY_LAG_SECONDS; it is picked up by a later run.
+The lag must be longer than any order-creating transaction. Items of
+cancelled orders are skipped; cancelling or re-opening an order that was
+already aggregated is applied as a delta by the Order signal handler.
+
+`refresh_best_sellers` recomputes `Menu.isBestSeller` from the stats table.
+"""
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum
+from django.db.models.functions import ExtractHour, TruncDate
+from django.utils import timezone
+
+from api.models import AggregationCheckpoint, Menu, MenuSalesStats, Order, OrderItem
+
+
+CHECKPOINT = "menu_sales"
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_SAFETY_LAG_SECONDS = 60
+
+
+def _grouped_items(items):
+    return (
+        items.annotate(day=TruncDate("created_at"), hour=ExtractHour("created_at"))
+        .values("menu_id", "menu__category", "day", "hour")
+        .annotate(quantity=Sum("quantity"), revenue=Sum("subtotal"))
+        .order_by()
+    )
+
+
+def _apply(rows, sign=1):
+    """
+    Add (sign=1) or subtract (sign=-1) grouped item rows to MenuSalesStats.
+    New keys are bulk inserted, existing ones incremented in place.
+    """
+    rows = list(rows)
+    if not rows:
+        return
+
+    existing = set(
+        MenuSalesStats.objects.filter(
+            menu_id__in={row["menu_id"] for row in rows},
+            date__in={row["day"] for row in rows},
+        ).values_list("menu_id", "date", "hour")
+    )
+
+    new_rows = []
+    for row in rows:
+        key = (row["menu_id"], row["day"], row["hour"])
+        if key in existing:
+            MenuSalesStats.objects.filter(menu_id=key[0], date=key[1], hour=key[2]).update(
+                quantity=F("quantity") + sign * row["quantity"],
+                revenue=F("revenue") + sign * row["revenue"],
+            )
+        elif sign > 0:
+            new_rows.append(MenuSalesStats(
+                menu_id=row["menu_id"],
+                date=row["day"],
+                hour=row["hour"],
+                category=row["menu__category"],
+                quantity=row["quantity"],
+                revenue=row["revenue"],
+            ))
+
+    MenuSalesStats.objects.bulk_create(new_rows, batch_size=1000)
+
+
+def aggregate_new_order_items(batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Fold the OrderItems past the checkpoint into MenuSalesStats, batch_size
+    ids at a time, up to the first one created within the safety lag (see
+    the module docstring). Returns the number of items read.
+
+    Each batch claims its id range by moving the checkpoint with a
+    conditional UPDATE, so two concurrent runs never count the same items.
+    """
+    AggregationCheckpoint.objects.get_or_create(name=CHECKPOINT)
+    lag = getattr(settings, "MENU_SALES_SAFETY_LAG_SECONDS", DEFAULT_SAFETY_LAG_SECONDS)
+    settled_before = timezone.now() - datetime.timedelta(seconds=lag)
+    processed = 0
+
+    while True:
+        with transaction.atomic():
+            last_id = AggregationCheckpoint.objects.values_list("last_id", flat=True).get(name=CHECKPOINT)
+            pending = OrderItem.objects.filter(id__gt=last_id)
+            # Items with a lower id may still be uncommitted while this one is recent
+            first_recent = (
+                pending.filter(created_at__gte=settled_before).order_by("id").values_list("id", flat=True).first()
+            )
+            if first_recent is not None:
+                pending = pending.filter(id__lt=first_recent)
+            ids = list(pending.order_by("id").values_list("id", flat=True)[:batch_size])
+            if not ids:
+                return processed
+
+            claimed = AggregationCheckpoint.objects.filter(name=CHECKPOINT, last_id=last_id).update(
+                last_id=ids[-1], updated_at=timezone.now()
+            )
+            if not claimed:
+                # Another run got here first
+                return processed
+
+            items = OrderItem.objects.filter(id__gt=last_id, id__lte=ids[-1]).exclude(
+                order__order_status=Order.OrderStatus.CANCELLED
+            )
+            _apply(_grouped_items(items))
+            processed += len(ids)
+
+
+def apply_order_cancellation(order, cancelled):
+    """
+    Remove (cancelled=True) or restore an already aggregated order's items.
+    Items past the checkpoint are left to the next aggregation run.
+    """
+    last_id = AggregationCheckpoint.objects.filter(name=CHECKPOINT).values_list("last_id", flat=True).first()
+    if not last_id:
+        return
+    items = OrderItem.objects.filter(order=order, id__lte=last_id)
+    _apply(_grouped_items(items), sign=-1 if cancelled else 1)
+
+
+@transaction.atomic
+def rebuild():
+    """Throw away the stats table and aggregate every OrderItem again."""
+    MenuSalesStats.objects.all().delete()
+    AggregationCheckpoint.objects.filter(name=CHECKPOINT).delete()
+    return aggregate_new_order_items()
+
+
+def best_seller_ids(window_days=None, count=None):
+    """Ids of the menu items that sold the most units in the rolling window."""
+    window_days = window_days or settings.BEST_SELLER_WINDOW_DAYS
+    count = count or settings.BEST_SELLER_COUNT
+    since = timezone.localdate() - datetime.timedelta(days=window_days - 1)
+
+    return list(
+        MenuSalesStats.objects.filter(date__gte=since)
+        .values("menu_id")
+        .annotate(sold=Sum("quantity"))
+        .filter(sold__gt=0)
+        .order_by("-sold", "menu_id")
+        .values_list("menu_id", flat=True)[:count]
+    )
+
+
+@transaction.atomic
+def refresh_best_sellers(window_days=None, count=None):
+    """Set Menu.isBestSeller for the top sellers and clear it for everything else."""
+    top = best_seller_ids(window_days, count)
+    Menu.objects.filter(id__in=top, isBestSeller=False).update(isBestSeller=True)
+    Menu.objects.exclude(id__in=top).filter(isBestSeller=True).update(isBestSeller=False)
+    return top
@@ -0,0 +1,73 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from api import slow_queries
+
+
+class SlowQueryMiddleware:
+    """
+    Times every query issued while handling a request and records the slow
+    ones (with their EXPLAIN plan) in the slow query buffer. Async-capable
+    so it doesn't push ASGI requests through a thread, but only WSGI
+    requests are recorded.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        slow_queries.set_current_view(None)
+        with slow_queries.capture_slow_queries():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        # Not recorded: under ASGI the queries of all requests run on the
+        # shared sync_to_async thread's connections, not this request's
+        return await self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # as_view() keeps a reference to the class on the returned function
+        view = getattr(view_func, "view_class", None) or getattr(view_func, "cls", None) or view_func
+        name = f"{view.__module__}.{view.__qualname__}"
+
+        # ViewSets: include the action, e.g. "...BookingViewSet.create"
+        actions = getattr(view_func, "actions", None)
+        if actions and request.method.lower() in actions:
+            name = f"{name}.{actions[request.method.lower()]}"
+
+        slow_queries.set_current_view(name)
+
+
+class ASGIUrlconfMiddleware:
+    """
+    Under ASGI, resolves requests with settings.ASGI_URLCONF, which serves
+    the read-heavy endpoints with async views (api/views/async_reads.py).
+    WSGI requests keep ROOT_URLCONF. Off unless settings.ASYNC_READ_VIEWS.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "ASYNC_READ_VIEWS", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        request.urlconf = settings.ASGI_URLCONF
+        return await self.get_response(request)
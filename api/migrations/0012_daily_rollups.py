@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-19 05:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_room_note'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyPaymentStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('payment_type', models.CharField(choices=[('downpayment', 'Downpayment'), ('remaining', 'Remaining Balance'), ('additional', 'Additional Fee')], max_length=20)),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('date', 'payment_type'), name='unique_daily_payment_stats')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyRoomTypeStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('rooms_available', models.PositiveIntegerField(default=0)),
+                ('rooms_sold', models.PositiveIntegerField(default=0)),
+                ('room_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('room_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='api.roomtype')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('room_type', 'date'), name='unique_room_type_daily_stats')],
+            },
+        ),
+    ]
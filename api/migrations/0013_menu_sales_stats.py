@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-19 05:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_daily_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AggregationCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_id', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MenuSalesStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('hour', models.PositiveSmallIntegerField()),
+                ('category', models.CharField(choices=[('BREAKFAST', 'Breakfast'), ('MAIN', 'Main Course'), ('APPETIZER', 'Appetizers'), ('DRINK', 'Drinks'), ('DESSERT', 'Desserts')], max_length=20)),
+                ('quantity', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('menu', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sales_stats', to='api.menu')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date', 'category'], name='api_menusal_date_03fdb7_idx')],
+                'constraints': [models.UniqueConstraint(fields=('menu', 'date', 'hour'), name='unique_menu_sales_hour')],
+            },
+        ),
+    ]
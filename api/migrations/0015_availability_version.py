@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-19 05:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_versions(apps, schema_editor):
+    RoomType = apps.get_model("api", "RoomType")
+    AvailabilityVersion = apps.get_model("api", "AvailabilityVersion")
+    AvailabilityVersion.objects.bulk_create(
+        [AvailabilityVersion(room_type_id=pk) for pk in RoomType.objects.values_list("pk", flat=True)]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_admin_date_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AvailabilityVersion',
+            fields=[
+                ('room_type', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='availability_version', serialize=False, to='api.roomtype')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_versions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-19 05:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_availability_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('extra_adult_fee', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('extra_child_fee', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('note', models.CharField(blank=True, max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('room_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rates', to='api.roomtype')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('room_type', 'date'), name='unique_room_rate_per_day')],
+            },
+        ),
+    ]
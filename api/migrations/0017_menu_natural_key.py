@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-19 05:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_room_rates'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='menu',
+            constraint=models.UniqueConstraint(fields=('name', 'category'), name='unique_menu_name_per_category'),
+        ),
+    ]
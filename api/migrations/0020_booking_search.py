@@ -0,0 +1,99 @@
+# Generated by Django 5.2.7 on 2026-10-19 05:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+SQLITE_CREATE = [
+    """
+    CREATE VIRTUAL TABLE api_bookingsearch_fts USING fts5(
+        booking_id, guest_name, email, phone,
+        content='api_bookingsearchdocument', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER api_bookingsearch_ai AFTER INSERT ON api_bookingsearchdocument BEGIN
+        INSERT INTO api_bookingsearch_fts(rowid, booking_id, guest_name, email, phone)
+        VALUES (new.id, new.booking_id, new.guest_name, new.email, new.phone);
+    END
+    """,
+    """
+    CREATE TRIGGER api_bookingsearch_ad AFTER DELETE ON api_bookingsearchdocument BEGIN
+        INSERT INTO api_bookingsearch_fts(api_bookingsearch_fts, rowid, booking_id, guest_name, email, phone)
+        VALUES ('delete', old.id, old.booking_id, old.guest_name, old.email, old.phone);
+    END
+    """,
+    """
+    CREATE TRIGGER api_bookingsearch_au AFTER UPDATE ON api_bookingsearchdocument BEGIN
+        INSERT INTO api_bookingsearch_fts(api_bookingsearch_fts, rowid, booking_id, guest_name, email, phone)
+        VALUES ('delete', old.id, old.booking_id, old.guest_name, old.email, old.phone);
+        INSERT INTO api_bookingsearch_fts(rowid, booking_id, guest_name, email, phone)
+        VALUES (new.id, new.booking_id, new.guest_name, new.email, new.phone);
+    END
+    """,
+]
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS api_bookingsearch_au",
+    "DROP TRIGGER IF EXISTS api_bookingsearch_ad",
+    "DROP TRIGGER IF EXISTS api_bookingsearch_ai",
+    "DROP TABLE IF EXISTS api_bookingsearch_fts",
+]
+
+# The expression must match api.search.PG_DOCUMENT
+POSTGRES_CREATE = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    CREATE INDEX api_bookingsearch_trgm ON api_bookingsearchdocument
+    USING gin ((booking_id || ' ' || guest_name || ' ' || email || ' ' || phone) gin_trgm_ops)
+    """,
+]
+POSTGRES_DROP = ["DROP INDEX IF EXISTS api_bookingsearch_trgm"]
+
+
+def _run(statements_by_vendor, schema_editor):
+    for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def create_search_index(apps, schema_editor):
+    _run({"sqlite": SQLITE_CREATE, "postgresql": POSTGRES_CREATE}, schema_editor)
+
+
+def drop_search_index(apps, schema_editor):
+    _run({"sqlite": SQLITE_DROP, "postgresql": POSTGRES_DROP}, schema_editor)
+
+
+def index_existing_bookings(apps, schema_editor):
+    Booking = apps.get_model("api", "Booking")
+    BookingSearchDocument = apps.get_model("api", "BookingSearchDocument")
+    rows = Booking.objects.values_list("id", "guest_name", "email", "contact_number").iterator(chunk_size=5000)
+    batch = []
+    for booking_id, guest_name, email, contact_number in rows:
+        phone = "".join(char for char in contact_number or "" if char.isdigit())
+        batch.append(BookingSearchDocument(booking_id=booking_id, guest_name=guest_name, email=email, phone=phone))
+        if len(batch) == 5000:
+            BookingSearchDocument.objects.bulk_create(batch)
+            batch = []
+    BookingSearchDocument.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_idempotency_record'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingSearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('guest_name', models.CharField(max_length=255)),
+                ('email', models.CharField(max_length=254)),
+                ('phone', models.CharField(max_length=20)),
+                ('booking', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='search_document', to='api.booking')),
+            ],
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(index_existing_bookings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.7 on 2026-10-19 05:47
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_tasks_for_current_rooms(apps, schema_editor):
+    Room = apps.get_model("api", "Room")
+    HousekeepingTask = apps.get_model("api", "HousekeepingTask")
+    kinds = {"dirty": "cleaning", "maintenance": "maintenance"}
+    HousekeepingTask.objects.bulk_create([
+        HousekeepingTask(room_id=pk, floor=floor, room_number=room_number, kind=kinds[status])
+        for pk, floor, room_number, status in Room.objects.filter(status__in=kinds).values_list(
+            "pk", "floor", "room_number", "status"
+        )
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0020_booking_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HousekeepingTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('floor', models.PositiveIntegerField()),
+                ('room_number', models.CharField(max_length=10)),
+                ('kind', models.CharField(choices=[('cleaning', 'Cleaning'), ('maintenance', 'Maintenance')], max_length=20)),
+                ('status', models.CharField(choices=[('open', 'Open'), ('claimed', 'Claimed'), ('done', 'Done'), ('cancelled', 'Cancelled')], default='open', max_length=20)),
+                ('claim_token', models.UUIDField(blank=True, null=True)),
+                ('claimed_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('claimed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='housekeeping_tasks', to=settings.AUTH_USER_MODEL)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='housekeeping_tasks', to='api.room')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('status', 'open')), fields=['kind', 'floor', 'created_at', 'id', 'room', 'room_number', 'status'], name='housekeeping_open_queue')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status__in', ['open', 'claimed'])), fields=('room', 'kind'), name='unique_active_task_per_room')],
+            },
+        ),
+        migrations.RunPython(create_tasks_for_current_rooms, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.7 on 2026-10-19 05:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def snapshot_opening_stock(apps, schema_editor):
+    # The ledger starts from the stock the items have now
+    Menu = apps.get_model("api", "Menu")
+    StockSnapshot = apps.get_model("api", "StockSnapshot")
+    StockSnapshot.objects.bulk_create(
+        [StockSnapshot(menu_id=pk, last_movement_id=0, stock=stock) for pk, stock in Menu.objects.values_list("pk", "stock")],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0023_row_versions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('sale', 'Sale'), ('restock', 'Restock'), ('adjustment', 'Adjustment'), ('spoilage', 'Spoilage')], max_length=20)),
+                ('quantity', models.IntegerField()),
+                ('note', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_movements', to=settings.AUTH_USER_MODEL)),
+                ('menu', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_movements', to='api.menu')),
+                ('order', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_movements', to='api.order')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['menu', 'id'], name='stock_movement_menu_id'), models.Index(fields=['created_at', 'id'], name='stock_movement_created')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_movement_id', models.PositiveBigIntegerField()),
+                ('stock', models.IntegerField()),
+                ('taken_at', models.DateTimeField(auto_now_add=True)),
+                ('menu', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_snapshots', to='api.menu')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('menu', 'last_movement_id'), name='unique_menu_stock_snapshot')],
+            },
+        ),
+        migrations.RunPython(snapshot_opening_stock, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.7 on 2026-10-19 05:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0024_stock_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NightAuditRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('business_date', models.DateField(unique=True)),
+                ('expired', models.PositiveIntegerField(default=0)),
+                ('no_shows', models.PositiveIntegerField(default=0)),
+                ('in_house', models.PositiveIntegerField(default=0)),
+                ('overstays', models.PositiveIntegerField(default=0)),
+                ('room_charges', models.PositiveIntegerField(default=0)),
+                ('room_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('started_at', models.DateTimeField()),
+                ('finished_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RoomCharge',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='booking',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('confirmed', 'Confirmed'), ('checked_in', 'Checked In'), ('checked_out', 'Checked Out'), ('cancelled', 'Cancelled'), ('rejected', 'Rejected'), ('expired', 'Expired'), ('no_show', 'No Show')], default='pending', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['status', 'check_in'], name='booking_status_check_in'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['status', 'created_at'], name='booking_status_created'),
+        ),
+        migrations.AddField(
+            model_name='roomcharge',
+            name='booking',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='room_charges', to='api.booking'),
+        ),
+        migrations.AddField(
+            model_name='roomcharge',
+            name='room',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='room_charges', to='api.room'),
+        ),
+        migrations.AddIndex(
+            model_name='roomcharge',
+            index=models.Index(fields=['date'], name='api_roomcha_date_4d8b2c_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='roomcharge',
+            constraint=models.UniqueConstraint(fields=('booking', 'date'), name='unique_room_charge_per_night'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 06:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0025_night_audit'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='idempotencyrecord',
+            name='request_hash',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
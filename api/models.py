@@ -1,13 +1,68 @@
-from django.db import models
+from django.db import DatabaseError, models
 from django.contrib.auth.models import AbstractUser
 import datetime
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 
 
 
 # Create your models here.
 
 
+class StaleVersionError(DatabaseError):
+    """Another request saved the row since it was read (see VersionedModel)."""
+
+    def __init__(self, instance, current_version=None):
+        self.instance = instance
+        self.current_version = current_version
+        super().__init__(f"{instance._meta.object_name} {instance.pk} was changed by someone else.")
+
+
+class VersionedModel(models.Model):
+    """
+    Optimistic concurrency control. Every save of an existing row runs
+    UPDATE ... SET ..., version = version + 1 WHERE pk = ? AND version = ?
+    with the version the instance was read with, and raises
+    StaleVersionError (409 in the API) when another save got there first.
+    Set `instance.version` to the version a client sent (If-Match) to check
+    against that instead. Queryset update() / bulk_update() should bump
+    version themselves.
+    """
+    version = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            self._expected_version = None
+            return super().save(*args, **kwargs)
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "version"}
+
+        self._expected_version = self.version
+        self.version += 1
+        try:
+            super().save(*args, **kwargs)
+        except BaseException:
+            self.version = self._expected_version
+            raise
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        expected = getattr(self, "_expected_version", None)
+        if expected is None:
+            return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+        if super()._do_update(base_qs.filter(version=expected), using, pk_val, values, update_fields, forced_update):
+            return True
+        # Read now: once save() fails, an enclosing transaction takes no more queries
+        current = base_qs.filter(pk=pk_val).values_list("version", flat=True).first()
+        if current is not None:
+            raise StaleVersionError(self, current)
+        return False
+
+
 class CustomUser(AbstractUser):
     
     class Role(models.TextChoices):
@@ -21,6 +76,23 @@ class CustomUser(AbstractUser):
 
     role = models.CharField(max_length=20, choices=Role.choices, default=Role.FRONT_DESK)
 
+    # Bumped whenever a field copied into access tokens changes, which makes
+    # older tokens fail authentication (see api/authentication.py)
+    role_version = models.PositiveIntegerField(default=0, editable=False)
+
+    # Fields whose change bumps role_version
+    TOKEN_STATE_FIELDS = ("role", "is_active", "is_staff", "is_superuser")
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if not self._state.adding and (update_fields is None or set(update_fields) & set(self.TOKEN_STATE_FIELDS)):
+            previous = CustomUser.objects.filter(pk=self.pk).values_list(*self.TOKEN_STATE_FIELDS).first()
+            if previous and previous != tuple(getattr(self, field) for field in self.TOKEN_STATE_FIELDS):
+                self.role_version += 1
+                if update_fields is not None:
+                    kwargs["update_fields"] = {*update_fields, "role_version"}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.get_full_name().upper()} - {self.role.upper()}"
 
@@ -45,7 +117,32 @@ class RoomType(models.Model):
         return f"{self.name} - ₱{self.price}/night"
     
 
-class Room(models.Model):
+class RoomRate(models.Model):
+    """
+    Nightly rate of a room type on one date (weekends, seasons, holidays).
+    Dates without a row use the RoomType's own price and fees.
+    """
+    room_type = models.ForeignKey(RoomType, on_delete=models.CASCADE, related_name="rates")
+    date = models.DateField()
+
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    extra_adult_fee = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    extra_child_fee = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    note = models.CharField(max_length=100, blank=True)  # e.g. "Weekend", "Holy Week"
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["room_type", "date"], name="unique_room_rate_per_day"),
+        ]
+
+    def __str__(self):
+        return f"{self.room_type.name} {self.date} - ₱{self.price}"
+
+
+class Room(VersionedModel):
     class Status(models.TextChoices):
         AVAILABLE = "available", "Available"
         OCCUPIED = "occupied", "Occupied"
@@ -53,7 +150,16 @@ class Room(models.Model):
         CLEANING = "cleaning", "Cleaning In Progress"
         MAINTENANCE = "maintenance", "Under Maintenance"
         OUT_OF_SERVICE = "out_of_service", "Out of Service"
-      
+
+    # Status changes housekeeping may make (check-in / check-out set OCCUPIED / DIRTY themselves)
+    STATUS_TRANSITIONS = {
+        Status.AVAILABLE: {Status.DIRTY, Status.CLEANING, Status.MAINTENANCE, Status.OUT_OF_SERVICE},
+        Status.OCCUPIED: {Status.DIRTY, Status.MAINTENANCE},
+        Status.DIRTY: {Status.CLEANING, Status.AVAILABLE, Status.MAINTENANCE, Status.OUT_OF_SERVICE},
+        Status.CLEANING: {Status.AVAILABLE, Status.DIRTY, Status.MAINTENANCE},
+        Status.MAINTENANCE: {Status.AVAILABLE, Status.DIRTY, Status.OUT_OF_SERVICE},
+        Status.OUT_OF_SERVICE: {Status.AVAILABLE, Status.DIRTY, Status.MAINTENANCE},
+    }
 
     room_number = models.CharField(max_length=10, unique=True)
     floor = models.PositiveIntegerField(default=1)
@@ -68,6 +174,10 @@ class Room(models.Model):
 
     def __str__(self):
         return f"{self.room_number} - {self.room_type.name}"
+
+    @classmethod
+    def can_transition(cls, current, new):
+        return current == new or new in cls.STATUS_TRANSITIONS.get(current, ())
     
 
 
@@ -75,7 +185,7 @@ class Room(models.Model):
 # ------------------------------
 # Booking Model
 # ------------------------------
-class Booking(models.Model):
+class Booking(VersionedModel):
     id = models.CharField(
         max_length=20,
         primary_key=True,
@@ -90,6 +200,8 @@ class Booking(models.Model):
         CHECKED_OUT = "checked_out", "Checked Out"
         CANCELLED = "cancelled", "Cancelled"
         REJECTED = "rejected", "Rejected"
+        EXPIRED = "expired", "Expired"           # Pending too long, downpayment never verified (night audit)
+        NO_SHOW = "no_show", "No Show"           # Confirmed, guest never arrived (night audit)
 
     room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name="bookings")
     assigned_room = models.ForeignKey(
@@ -118,26 +230,36 @@ class Booking(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
-    def save(self, *args, **kwargs):
-        if not self.id:
-            today = datetime.date.today()
-            date_str = today.strftime("%y%m%d")  # e.g. 250128
-
-            # Look for the latest booking today
-            last_booking = (
-                Booking.objects.filter(id__startswith=f"BKG-{date_str}")
-                .order_by("-id")
-                .first()
-            )
 
-            if last_booking:
-                # Extract last 4 digits
-                last_number = int(last_booking.id.split("-")[-1])
-                new_number = f"{last_number + 1:04d}"
-            else:
-                new_number = "0001"
+    class Meta:
+        indexes = [
+            models.Index(fields=["check_in"]),  # admin date_hierarchy / reports
+            # Night audit (api/night_audit.py): arrivals / stays and stale holds by status
+            models.Index(fields=["status", "check_in"], name="booking_status_check_in"),
+            models.Index(fields=["status", "created_at"], name="booking_status_created"),
+        ]
+
+    @classmethod
+    def next_ids(cls, count=1):
+        """The next `count` booking ids for today (BKG-YYMMDD-NNNN), from one query."""
+        today = datetime.date.today()
+        date_str = today.strftime("%y%m%d")  # e.g. 250128
+
+        # Look for the latest booking today
+        last_id = (
+            Booking.objects.filter(id__startswith=f"BKG-{date_str}")
+            .order_by("-id")
+            .values_list("id", flat=True)
+            .first()
+        )
+
+        # Extract last 4 digits
+        last_number = int(last_id.split("-")[-1]) if last_id else 0
+        return [f"BKG-{date_str}-{number:04d}" for number in range(last_number + 1, last_number + 1 + count)]
 
-            self.id = f"BKG-{date_str}-{new_number}"
+    def save(self, *args, **kwargs):
+        if not self.id:
+            self.id = Booking.next_ids(1)[0]
 
         super().save(*args, **kwargs)
     def __str__(self):
@@ -222,23 +344,33 @@ class Menu(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        constraints = [
+            # Natural key used by the CSV import (api/importers.py)
+            models.UniqueConstraint(fields=["name", "category"], name="unique_menu_name_per_category"),
+        ]
+
     def clean(self):
         if self.price <= 0:
             raise ValidationError("Price must be greater than zero.")
 
     def deduct_stock(self, quantity=1):
+        """
+        Take `quantity` off the stock with one conditional UPDATE, like
+        inventory.change_stock: this instance may be stale, and a restock
+        committed since it was read must not be overwritten.
+        """
         if quantity <= 0:
             raise ValidationError("Quantity must be greater than zero.")
 
-        if self.stock < quantity:
+        menu_items = Menu.objects.filter(pk=self.pk)
+        if not menu_items.filter(stock__gte=quantity).update(
+            stock=models.F("stock") - quantity, updated_at=timezone.now()
+        ):
             raise ValidationError("Insufficient stock.")
+        menu_items.filter(stock=0).update(is_available=False)
 
-        self.stock -= quantity
-
-        if self.stock == 0:
-            self.is_available = False
-
-        self.save(update_fields=["stock", "is_available"])
+        self.refresh_from_db(fields=["stock", "is_available", "updated_at"])
 
     def is_low_stock(self):
         return self.stock <= self.low_stock_level
@@ -248,7 +380,7 @@ class Menu(models.Model):
     
 
 
-class Order(models.Model):
+class Order(VersionedModel):
 
     class OrderType(models.TextChoices):
         DINE_IN = "dine_in", "Dine-in"
@@ -282,9 +414,18 @@ class Order(models.Model):
 
     total_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
 
+    # Position in the kitchen feed, set on create and on every status change (api/kitchen_feed.py)
+    feed_seq = models.PositiveBigIntegerField(default=0, db_index=True, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at"]),
+            models.Index(fields=["order_status"]),  # kitchen feed: open orders
+        ]
+
     def clean(self):
         if self.order_type == self.OrderType.ROOM_SERVICE and not self.booking:
             raise ValidationError("Room service orders must be linked to a booking.")
@@ -333,3 +474,305 @@ class OrderItem(models.Model):
 
 
 
+
+
+# ------------------------------
+# Analytics rollups (see api/rollups.py)
+# ------------------------------
+class DailyRoomTypeStats(models.Model):
+    """
+    One row per room type per day. Maintained incrementally from Booking
+    saves and rebuilt by `manage.py rebuild_rollups`.
+    """
+    date = models.DateField()
+    room_type = models.ForeignKey(RoomType, on_delete=models.CASCADE, related_name="daily_stats")
+
+    rooms_available = models.PositiveIntegerField(default=0)  # sellable rooms that night
+    rooms_sold = models.PositiveIntegerField(default=0)       # room-nights sold
+    room_revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["room_type", "date"], name="unique_room_type_daily_stats"),
+        ]
+
+    def __str__(self):
+        return f"{self.room_type_id} @ {self.date}: {self.rooms_sold}/{self.rooms_available}"
+
+
+class DailyPaymentStats(models.Model):
+    """
+    Paid amounts per day per Payment.PaymentCategory.
+    """
+    date = models.DateField()
+    payment_type = models.CharField(max_length=20, choices=Payment.PaymentCategory.choices)
+
+    amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    count = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["date", "payment_type"], name="unique_daily_payment_stats"),
+        ]
+
+    def __str__(self):
+        return f"{self.payment_type} @ {self.date}: {self.amount}"
+
+
+class MenuSalesStats(models.Model):
+    """
+    Quantity and revenue sold per menu item per hour of a day.
+    Filled incrementally by `manage.py aggregate_menu_sales` (see api/menu_sales.py).
+    """
+    date = models.DateField()
+    hour = models.PositiveSmallIntegerField()  # 0-23, local time
+    menu = models.ForeignKey(Menu, on_delete=models.CASCADE, related_name="sales_stats")
+    category = models.CharField(max_length=20, choices=Menu.CATEGORY_CHOICES)
+
+    quantity = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["menu", "date", "hour"], name="unique_menu_sales_hour"),
+        ]
+        indexes = [
+            models.Index(fields=["date", "category"]),
+        ]
+
+    def __str__(self):
+        return f"{self.menu_id} @ {self.date} {self.hour:02d}:00 x{self.quantity}"
+
+
+class AggregationCheckpoint(models.Model):
+    """
+    High-water mark of the last source row folded into an aggregate table,
+    so aggregation jobs only read new rows.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    last_id = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.last_id}"
+
+
+class AvailabilityVersion(models.Model):
+    """
+    Version stamp of a room type's rooms and active bookings. Bumped in the
+    same transaction as any change to them; each worker compares it with the
+    version of its in-memory availability index (api/availability.py).
+    """
+    room_type = models.OneToOneField(
+        RoomType,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="availability_version",
+    )
+    version = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.room_type_id} v{self.version}"
+
+
+class IdempotencyRecord(models.Model):
+    """
+    Stored response of a POST sent with an Idempotency-Key header (see
+    api/idempotency.py). A row without a status_code is a request still in
+    progress; its unique key is the lock that collapses concurrent retries.
+    """
+    key = models.CharField(max_length=64, unique=True)  # sha256 of owner (user or client IP), method, path and header
+    request_hash = models.CharField(max_length=64, blank=True)  # sha256 of the request data
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    body = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.key[:12]} {self.status_code or 'in progress'}"
+
+
+class BookingSearchDocument(models.Model):
+    """
+    The searchable text of a booking, kept in sync by the Booking signals
+    (api/search.py). On SQLite an FTS5 table mirrors it, on PostgreSQL it
+    has a trigram index; both are created by migration 0020.
+    """
+    booking = models.OneToOneField(Booking, on_delete=models.CASCADE, related_name="search_document")
+    guest_name = models.CharField(max_length=255)
+    email = models.CharField(max_length=254)
+    phone = models.CharField(max_length=20)  # digits only
+
+    def __str__(self):
+        return self.booking_id
+
+
+class HousekeepingTask(models.Model):
+    """
+    A room to clean or repair, created when the room becomes DIRTY or goes
+    into MAINTENANCE (api/housekeeping.py). Staff claim open tasks; the
+    claim token proves which device holds a task when it is completed or
+    released. Floor and room number are copied from the room so the open
+    queue is read from its index alone.
+    """
+    class Kind(models.TextChoices):
+        CLEANING = "cleaning", "Cleaning"
+        MAINTENANCE = "maintenance", "Maintenance"
+
+    class Status(models.TextChoices):
+        OPEN = "open", "Open"
+        CLAIMED = "claimed", "Claimed"
+        DONE = "done", "Done"
+        CANCELLED = "cancelled", "Cancelled"
+
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name="housekeeping_tasks")
+    floor = models.PositiveIntegerField()
+    room_number = models.CharField(max_length=10)
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.OPEN)
+
+    claimed_by = models.ForeignKey(
+        CustomUser, on_delete=models.SET_NULL, null=True, blank=True, related_name="housekeeping_tasks"
+    )
+    claim_token = models.UUIDField(null=True, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            # One active task of each kind per room
+            models.UniqueConstraint(
+                fields=["room", "kind"],
+                condition=models.Q(status__in=["open", "claimed"]),
+                name="unique_active_task_per_room",
+            ),
+        ]
+        indexes = [
+            # The open queue, covering every column it returns
+            models.Index(
+                fields=["kind", "floor", "created_at", "id", "room", "room_number", "status"],
+                condition=models.Q(status="open"),
+                name="housekeeping_open_queue",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.room_number} ({self.status})"
+
+
+class FeedSequence(models.Model):
+    """
+    A named counter handing out increasing sequence numbers. Incremented
+    in a short transaction that also stamps the number on the changed row,
+    so numbers become visible in commit order and a reader's cursor never
+    skips a change.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    value = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+
+
+# ------------------------------
+# Inventory ledger (see api/inventory.py)
+# ------------------------------
+class StockMovement(models.Model):
+    """
+    One change of a menu item's stock. Append-only: corrections are new
+    ADJUSTMENT rows. `quantity` is signed (negative for sales and spoilage).
+    """
+    class Kind(models.TextChoices):
+        SALE = "sale", "Sale"
+        RESTOCK = "restock", "Restock"
+        ADJUSTMENT = "adjustment", "Adjustment"
+        SPOILAGE = "spoilage", "Spoilage"
+
+    menu = models.ForeignKey(Menu, on_delete=models.CASCADE, related_name="stock_movements")
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    quantity = models.IntegerField()
+    order = models.ForeignKey(Order, on_delete=models.SET_NULL, null=True, blank=True, related_name="stock_movements")
+    note = models.CharField(max_length=255, blank=True)
+    created_by = models.ForeignKey(
+        CustomUser, on_delete=models.SET_NULL, null=True, blank=True, related_name="stock_movements"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Stock history of one item, and the movements after a snapshot
+            models.Index(fields=["menu", "id"], name="stock_movement_menu_id"),
+            # First movement at or after a point in time
+            models.Index(fields=["created_at", "id"], name="stock_movement_created"),
+        ]
+
+    def __str__(self):
+        return f"{self.menu_id} {self.kind} {self.quantity:+d}"
+
+
+class StockSnapshot(models.Model):
+    """
+    Stock of a menu item after every movement up to `last_movement_id`.
+    Written for all items at once by `manage.py snapshot_stock`.
+    """
+    menu = models.ForeignKey(Menu, on_delete=models.CASCADE, related_name="stock_snapshots")
+    last_movement_id = models.PositiveBigIntegerField()
+    stock = models.IntegerField()
+    taken_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            # Also finds an item's latest snapshot
+            models.UniqueConstraint(fields=["menu", "last_movement_id"], name="unique_menu_stock_snapshot"),
+        ]
+
+    def __str__(self):
+        return f"{self.menu_id} @ {self.last_movement_id}: {self.stock}"
+
+
+# ------------------------------
+# Night audit (see api/night_audit.py)
+# ------------------------------
+class RoomCharge(models.Model):
+    """One night's room charge of an in-house booking, posted by the night audit."""
+    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name="room_charges")
+    room = models.ForeignKey(Room, on_delete=models.SET_NULL, null=True, blank=True, related_name="room_charges")
+    date = models.DateField()
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            # Re-running the audit never posts a night twice
+            models.UniqueConstraint(fields=["booking", "date"], name="unique_room_charge_per_night"),
+        ]
+        indexes = [
+            models.Index(fields=["date"]),
+        ]
+
+    def __str__(self):
+        return f"{self.booking_id} @ {self.date}: {self.amount}"
+
+
+class NightAuditRun(models.Model):
+    """
+    Summary of the night audit of one business date. The business date
+    rolls to the day after the latest audited one.
+    """
+    business_date = models.DateField(unique=True)
+    expired = models.PositiveIntegerField(default=0)
+    no_shows = models.PositiveIntegerField(default=0)
+    in_house = models.PositiveIntegerField(default=0)
+    overstays = models.PositiveIntegerField(default=0)
+    room_charges = models.PositiveIntegerField(default=0)
+    room_revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Night audit {self.business_date}"
@@ -0,0 +1,137 @@
+"""
+Night audit: closes a business date.
+
+`run(day)` (manage.py night_audit) does, for business date `day`:
+
+1. Expire pending bookings whose downpayment was never verified once they
+   are older than PENDING_BOOKING_TTL_HOURS or their check-in date has
+   come (status EXPIRED, downpayment FAILED). They stop holding rooms.
+2. Mark confirmed bookings due on or before `day` that never checked in
+   as NO_SHOW.
+3. Post the night of `day` for every in-house booking as a RoomCharge
+   (the stay total split per night, as in the KPI rollups).
+4. Write every room type's KPI rollup row for `day`, which records the
+   day's room inventory (see api/rollups.py).
+
+Every step is a set-based statement (UPDATE ... WHERE status = ..., one
+bulk INSERT with a unique (booking, date)), so a re-run of the same date
+changes nothing. These writes skip the model signals, so the
+availability versions and KPI rollups are refreshed here.
+
+The summary is stored as a NightAuditRun. The business date rolls to the
+day after the latest audited one.
+"""
+import datetime
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Exists, F, Max, Min, OuterRef, Q, Sum
+from django.utils import timezone
+
+from api import availability, rollups
+from api.models import Booking, NightAuditRun, Payment, Room, RoomCharge
+
+
+ONE_DAY = datetime.timedelta(days=1)
+
+
+def business_date():
+    """The next date to audit: the day after the latest audited one (yesterday if none)."""
+    last = NightAuditRun.objects.aggregate(last=Max("business_date"))["last"]
+    return last + ONE_DAY if last else timezone.localdate() - ONE_DAY
+
+
+def stale_pending(day, now=None):
+    """Pending bookings without a paid downpayment, past the TTL or due by `day`."""
+    now = now or timezone.now()
+    cutoff = now - datetime.timedelta(hours=settings.PENDING_BOOKING_TTL_HOURS)
+    verified = Payment.objects.filter(
+        booking=OuterRef("pk"),
+        payment_type=Payment.PaymentCategory.DOWNPAYMENT,
+        status=Payment.PaymentStatus.PAID,
+    )
+    return (
+        Booking.objects.filter(status=Booking.Status.PENDING)
+        .filter(Q(created_at__lt=cutoff) | Q(check_in__lte=day))
+        .filter(~Exists(verified))
+    )
+
+
+def no_shows(day):
+    """Confirmed bookings due on or before `day` that never checked in."""
+    return Booking.objects.filter(status=Booking.Status.CONFIRMED, check_in__lte=day)
+
+
+def in_house(day):
+    """Checked-in bookings staying the night of `day`."""
+    return Booking.objects.filter(status=Booking.Status.CHECKED_IN, check_in__lte=day, check_out__gt=day)
+
+
+def _transition(bookings, status, now):
+    """
+    Move `bookings` to `status` with one UPDATE. Returns (count, stays), the
+    stays being (room_type_id, first check-in, last check-out) per room type.
+    """
+    stays = list(
+        bookings.order_by()
+        .values("room__room_type_id")
+        .annotate(start=Min("check_in"), end=Max("check_out"))
+        .values_list("room__room_type_id", "start", "end")
+    )
+    count = bookings.update(status=status, version=F("version") + 1, updated_at=now) if stays else 0
+    return count, stays
+
+
+def _room_type_ids():
+    return Room.objects.values_list("room_type_id", flat=True).distinct().order_by("room_type_id")
+
+
+def _post_room_charges(day):
+    charges = []
+    bookings = in_house(day).values_list("pk", "assigned_room_id", "check_in", "check_out", "total_price")
+    for pk, room_id, check_in, check_out, total_price in bookings.iterator(chunk_size=rollups.BATCH_SIZE):
+        amounts = rollups.nightly_amounts(total_price, (check_out - check_in).days)
+        charges.append(RoomCharge(booking_id=pk, room_id=room_id, date=day, amount=amounts[(day - check_in).days]))
+    # Nights posted by an earlier run of this date are skipped
+    RoomCharge.objects.bulk_create(charges, ignore_conflicts=True, batch_size=rollups.BATCH_SIZE)
+    return len(charges)
+
+
+def run(day):
+    """Audit business date `day`. Returns its NightAuditRun."""
+    started_at = timezone.now()
+
+    with transaction.atomic():
+        expired, expired_stays = _transition(stale_pending(day, started_at), Booking.Status.EXPIRED, started_at)
+        Payment.objects.filter(
+            booking__status=Booking.Status.EXPIRED,
+            payment_type=Payment.PaymentCategory.DOWNPAYMENT,
+            status=Payment.PaymentStatus.PENDING,
+        ).update(status=Payment.PaymentStatus.FAILED, updated_at=started_at)
+
+        no_show_count, no_show_stays = _transition(no_shows(day), Booking.Status.NO_SHOW, started_at)
+
+        in_house_count = _post_room_charges(day)
+        posted = RoomCharge.objects.filter(date=day).aggregate(count=Count("id"), amount=Sum("amount"))
+        overstays = Booking.objects.filter(status=Booking.Status.CHECKED_IN, check_out__lte=day).count()
+
+        availability.bump_versions({room_type_id for room_type_id, _, _ in expired_stays + no_show_stays})
+        # Pending bookings are not counted as sold; no-shows were
+        closed_day = [(room_type_id, day, day + datetime.timedelta(days=1)) for room_type_id in _room_type_ids()]
+        rollups.schedule_booking_refresh(no_show_stays + closed_day)
+
+        audit, _ = NightAuditRun.objects.get_or_create(
+            business_date=day, defaults={"started_at": started_at, "finished_at": started_at}
+        )
+        # A re-run adds what it changed to the first run's counts
+        audit.expired += expired
+        audit.no_shows += no_show_count
+        audit.in_house = in_house_count
+        audit.overstays = overstays
+        audit.room_charges = posted["count"]
+        audit.room_revenue = Decimal(posted["amount"] or 0).quantize(rollups.CENT)
+        audit.finished_at = timezone.now()
+        audit.save()
+
+    return audit
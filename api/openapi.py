@@ -0,0 +1,122 @@
+"""
+Precomputed OpenAPI schema.
+
+Generating the schema introspects every view and serializer (a few hundred
+ms), and the docs pages fetch it on every view. So /api/schema/ serves a
+schema generated once per code version instead:
+
+* `manage.py generate_schema` (run at build / deploy time) writes it to
+  settings.API_SCHEMA_FILE together with the code version it was generated
+  from: a hash of the project's Python sources (tests aside) and of the
+  Django, DRF and drf-spectacular versions.
+* The first schema request of a worker loads that file. If it is missing
+  or from another code version, the worker generates the schema and
+  rewrites the file, so the next code version is generated once.
+* Every format (YAML, JSON) is rendered once and served with an ETag, so
+  a client that has it gets a 304.
+
+The test suite checks that the cached schema matches a live one.
+"""
+import hashlib
+import json
+import os
+import threading
+from importlib import import_module
+from pathlib import Path
+
+import django
+import drf_spectacular
+import rest_framework
+from django.conf import settings
+from drf_spectacular.settings import spectacular_settings
+
+
+# Packages whose code the schema is generated from
+SOURCE_PACKAGES = ("api", "backend")
+
+_lock = threading.Lock()
+_cached = None
+
+
+def code_version():
+    """Hash of the project's Python sources and of the schema libraries' versions."""
+    digest = hashlib.sha256()
+    for package in SOURCE_PACKAGES:
+        root = Path(import_module(package).__file__).parent
+        for path in sorted(root.rglob("*.py")):
+            if path.name == "tests.py":
+                continue
+            digest.update(str(path.relative_to(root)).encode())
+            digest.update(path.read_bytes())
+    for version in (django.__version__, rest_framework.VERSION, drf_spectacular.__version__):
+        digest.update(version.encode())
+    return digest.hexdigest()
+
+
+def generate():
+    """The live schema, as `manage.py spectacular` generates it."""
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    return generator.get_schema(request=None, public=True)
+
+
+def write(schema, version, path=None):
+    """Write `schema` of code `version` to `path` (settings.API_SCHEMA_FILE)."""
+    path = Path(path or settings.API_SCHEMA_FILE)
+    content = json.dumps({"code_version": version, "schema": schema})
+    # Written aside and renamed, so a worker never reads half a file
+    partial = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    partial.write_text(content)
+    os.replace(partial, path)
+
+
+def read(path=None):
+    """(code version, schema) from the schema file, or (None, None) if there is none."""
+    try:
+        content = json.loads(Path(path or settings.API_SCHEMA_FILE).read_text())
+    except (OSError, ValueError):
+        return None, None
+    return content.get("code_version"), content.get("schema")
+
+
+class CachedSchema:
+    """A schema and its rendered bodies, one per renderer class."""
+
+    def __init__(self, schema):
+        self.schema = schema
+        self._bodies = {}
+
+    def render(self, renderer, accepted_media_type=None):
+        """(body, ETag) of the schema in the renderer's format."""
+        key = (type(renderer), accepted_media_type)
+        if key not in self._bodies:
+            body = renderer.render(self.schema, accepted_media_type, renderer_context={})
+            self._bodies[key] = (body, f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+        return self._bodies[key]
+
+
+def get_cached():
+    """This worker's CachedSchema: from the schema file if it matches the code, else generated."""
+    global _cached
+    if _cached is not None:
+        return _cached
+
+    with _lock:
+        if _cached is None:
+            version = code_version()
+            file_version, schema = read()
+            if file_version != version or schema is None:
+                schema = generate()
+                try:
+                    write(schema, version)
+                except OSError:
+                    # Read-only deployment: this worker keeps it in memory only
+                    pass
+            _cached = CachedSchema(schema)
+    return _cached
+
+
+def clear():
+    """Forget this worker's schema (tests)."""
+    global _cached
+    with _lock:
+        _cached = None
@@ -0,0 +1,71 @@
+"""
+Role based permissions.
+
+Views list who may use them in `allowed_roles`:
+
+    permission_classes = [HasRole]
+    allowed_roles = (FRONT_DESK,)                      # every action
+
+    allowed_roles = {                                  # per viewset action or HTTP method
+        "list": (FRONT_DESK, RESTAURANT),
+        "create": (RESTAURANT,),
+        "*": (RESTAURANT,),                            # anything not listed
+        "get": PUBLIC,                                 # no login needed
+    }
+
+Admins (role "admin" or superusers) may use every view. The role comes
+from `request.user.role`, which for API requests is read from the token
+claims (api/authentication.py), so checking a permission costs no query.
+"""
+from rest_framework.permissions import BasePermission
+
+from api.models import CustomUser
+
+
+Role = CustomUser.Role
+
+ADMIN = Role.ADMIN
+FRONT_DESK = Role.FRONT_DESK
+HOUSEKEEPING = Role.HOUSEKEEPING
+MAINTENANCE = Role.MAINTENANCE
+RESTAURANT = Role.RESTUARANT
+RESTAURANT_STAFF = Role.RESTUARANT_STAFF
+INVENTORY = Role.INVENTORY
+
+# Marks an action that needs no login
+PUBLIC = "public"
+
+
+class HasRole(BasePermission):
+    message = "Your role does not allow this action."
+
+    def has_permission(self, request, view):
+        roles = self.roles_for(request, view)
+        if roles == PUBLIC:
+            return True
+
+        user = request.user
+        if not user or not user.is_authenticated:
+            return False
+        if user.is_superuser:
+            return True
+
+        role = getattr(user, "role", None)
+        return role == ADMIN or role in roles
+
+    @staticmethod
+    def roles_for(request, view):
+        allowed = getattr(view, "allowed_roles", ())
+        if not isinstance(allowed, dict):
+            return allowed
+
+        action = getattr(view, "action", None)
+        if action in allowed:
+            return allowed[action]
+        method = request.method.lower()
+        if method in allowed:
+            return allowed[method]
+        # HEAD / OPTIONS follow GET
+        if method in ("head", "options") and "get" in allowed:
+            return allowed["get"]
+        return allowed.get("*", ())
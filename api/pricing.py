@@ -0,0 +1,167 @@
+"""
+Quote engine.
+
+Prices any number of stays with one query: the requested room types are
+read together with their RoomRate rows for the dates the batch covers
+(LEFT JOIN, so room types without special rates still come back). Each
+room type's rates are then laid out as per-night arrays in cents with
+prefix sums, which makes every stay's total two subtractions no matter
+how many nights it has.
+
+Nights without a RoomRate row use RoomType.price / extra_adult_fee /
+extra_child_fee, so with an empty rate calendar the result equals the
+old flat `price * nights` formula.
+"""
+from collections import namedtuple
+from decimal import Decimal
+
+from django.db.models import FilteredRelation, Q
+
+from api.models import RoomType
+
+
+# A stay to price
+StayRequest = namedtuple("StayRequest", "room_type_id check_in check_out adults children")
+
+Quote = namedtuple(
+    "Quote",
+    "room_type_id check_in check_out adults children nights base_price extra_cost total_price",
+)
+
+# Guard against absurd batches (arrays are per day between the earliest
+# check-in and latest check-out of a room type)
+MAX_SPAN_DAYS = 3 * 366
+
+
+class QuoteError(ValueError):
+    pass
+
+
+def _cents(amount):
+    return int(amount * 100)
+
+
+def _amount(cents):
+    return Decimal(cents).scaleb(-2)
+
+
+def _prefix_sums(values):
+    sums = [0]
+    running = 0
+    for value in values:
+        running += value
+        sums.append(running)
+    return sums
+
+
+class _RateTable:
+    """Per-night base / extra adult / extra child prices of one room type, as prefix sums."""
+
+    def __init__(self, room_type, first_day, last_day, rates):
+        self.max_adults = room_type["max_adults"]
+        self.max_children = room_type["max_children"]
+        self.first_day = first_day
+
+        days = (last_day - first_day).days
+        base = [_cents(room_type["price"])] * days
+        adult = [_cents(room_type["extra_adult_fee"])] * days
+        child = [_cents(room_type["extra_child_fee"])] * days
+
+        for date, price, adult_fee, child_fee in rates:
+            offset = (date - first_day).days
+            base[offset] = _cents(price)
+            adult[offset] = _cents(adult_fee)
+            child[offset] = _cents(child_fee)
+
+        self.base = _prefix_sums(base)
+        self.adult = _prefix_sums(adult)
+        self.child = _prefix_sums(child)
+
+    def quote(self, stay):
+        start = (stay.check_in - self.first_day).days
+        end = (stay.check_out - self.first_day).days
+
+        extra_adults = max(0, stay.adults - self.max_adults)
+        extra_children = max(0, stay.children - self.max_children)
+
+        base = self.base[end] - self.base[start]
+        extra = (
+            extra_adults * (self.adult[end] - self.adult[start])
+            + extra_children * (self.child[end] - self.child[start])
+        )
+
+        return Quote(
+            room_type_id=stay.room_type_id,
+            check_in=stay.check_in,
+            check_out=stay.check_out,
+            adults=stay.adults,
+            children=stay.children,
+            nights=end - start,
+            base_price=_amount(base),
+            extra_cost=_amount(extra),
+            total_price=_amount(base + extra),
+        )
+
+
+def quote_stays(stays):
+    """
+    Price a list of StayRequests. Returns Quotes in the same order.
+    Raises QuoteError for invalid dates or unknown room types.
+    """
+    stays = [StayRequest(*stay) for stay in stays]
+    if not stays:
+        return []
+
+    spans = {}
+    for stay in stays:
+        if stay.check_out <= stay.check_in:
+            raise QuoteError("Check-out date must be after check-in date.")
+        low, high = spans.get(stay.room_type_id, (stay.check_in, stay.check_out))
+        spans[stay.room_type_id] = (min(low, stay.check_in), max(high, stay.check_out))
+
+    first_day = min(low for low, _ in spans.values())
+    last_day = max(high for _, high in spans.values())
+    if (last_day - first_day).days > MAX_SPAN_DAYS:
+        raise QuoteError(f"Stays in one batch must fall within {MAX_SPAN_DAYS} days.")
+
+    rows = (
+        RoomType.objects.filter(id__in=spans)
+        .annotate(window=FilteredRelation(
+            "rates",
+            condition=Q(rates__date__gte=first_day, rates__date__lt=last_day),
+        ))
+        .values_list(
+            "id", "price", "max_adults", "max_children", "extra_adult_fee", "extra_child_fee",
+            "window__date", "window__price", "window__extra_adult_fee", "window__extra_child_fee",
+        )
+    )
+
+    room_types = {}
+    rates = {}
+    for (room_type_id, price, max_adults, max_children, adult_fee, child_fee,
+         date, rate_price, rate_adult_fee, rate_child_fee) in rows:
+        room_types[room_type_id] = {
+            "price": price,
+            "max_adults": max_adults,
+            "max_children": max_children,
+            "extra_adult_fee": adult_fee,
+            "extra_child_fee": child_fee,
+        }
+        rates.setdefault(room_type_id, [])
+        low, high = spans[room_type_id]
+        if date is not None and low <= date < high:
+            rates[room_type_id].append((date, rate_price, rate_adult_fee, rate_child_fee))
+
+    missing = set(spans) - set(room_types)
+    if missing:
+        raise QuoteError(f"Unknown room type(s): {', '.join(str(pk) for pk in sorted(missing))}.")
+
+    tables = {
+        room_type_id: _RateTable(room_types[room_type_id], low, high, rates[room_type_id])
+        for room_type_id, (low, high) in spans.items()
+    }
+    return [tables[stay.room_type_id].quote(stay) for stay in stays]
+
+
+def quote_stay(room_type_id, check_in, check_out, adults, children):
+    return quote_stays([StayRequest(room_type_id, check_in, check_out, adults, children)])[0]
@@ -0,0 +1,205 @@
+"""
+Read-only list projections.
+
+The list endpoints below return many rows, and building a model instance
+plus running every DRF field per row was most of their CPU time (and for
+bookings and orders, a few queries per row). A projection builds the same
+response from `.values()` rows instead: one query for the rows, one for
+their children (payments, order items), then plain dicts.
+
+    GET /api/booking-list/                 bookings()             BookingSerializer
+    GET /api/order/                        orders()               OrderSerializer
+    GET /api/room-operations/              room_operations()      RoomOperationSerializer
+    GET /api/bookings/list/checked-in/     checked_in_bookings()  CheckedInBookingSerializer
+
+The output must stay identical to the serializer's, key order included:
+values go through the same DRF field `to_representation` (decimals, dates,
+datetimes), keys that the serializer skips (a read-only field whose source
+is missing, e.g. guestName of an order without a booking) are left out, and
+api/tests.py compares both for the same rows. Change the serializer and
+its projection together.
+
+The serializers are still used for single objects and for writes.
+`manage.py bench_projections` compares both paths.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from rest_framework import serializers
+
+from api.models import Booking, OrderItem, Payment
+
+
+# Formatting of the serializer fields (all money fields are max_digits=10, decimal_places=2)
+_money = serializers.DecimalField(max_digits=10, decimal_places=2).to_representation
+_date = serializers.DateField().to_representation
+_datetime = serializers.DateTimeField().to_representation
+
+_ZERO = Decimal("0")
+_receipt_url = Payment._meta.get_field("receipt").storage.url
+
+# Bookings whose remaining balance is 0 once the REMAINING payment is paid
+SETTLED_STATUSES = (Booking.Status.CHECKED_IN, Booking.Status.CHECKED_OUT)
+
+
+# ------------------------------
+# Bookings (BookingSerializer)
+# ------------------------------
+BOOKING_FIELDS = (
+    "id", "guest_name", "email", "contact_number", "status", "check_in", "check_out",
+    "room__room_type__name", "room__room_type_id", "assigned_room__room_number",
+    "total_price", "additional_fee", "adults", "children", "extra_children", "version",
+)
+PAYMENT_FIELDS = (
+    "booking_id", "id", "amount", "payment_type", "status", "description", "paid_at",
+    "created_at", "transaction_reference", "receipt",
+)
+
+
+def bookings(queryset):
+    """BookingSerializer(queryset, many=True).data"""
+    queryset = queryset.prefetch_related(None)
+    payments = defaultdict(list)
+    for payment in (
+        Payment.objects.filter(booking__in=queryset.values("pk")).order_by("pk").values(*PAYMENT_FIELDS)
+    ):
+        payments[payment["booking_id"]].append(payment)
+    return [booking(row, payments[row["id"]]) for row in queryset.values(*BOOKING_FIELDS)]
+
+
+def booking(row, payments):
+    """One BookingSerializer row from its values() row (BOOKING_FIELDS) and its payments (PAYMENT_FIELDS), oldest first."""
+    downpayment = sum(
+        (payment["amount"] for payment in payments if payment["payment_type"] == Payment.PaymentCategory.DOWNPAYMENT),
+        _ZERO,
+    )
+    remaining_paid = row["status"] in SETTLED_STATUSES and any(
+        payment["payment_type"] == Payment.PaymentCategory.REMAINING and payment["status"] == Payment.PaymentStatus.PAID
+        for payment in payments
+    )
+    # Latest by created_at, as payments.order_by("-created_at").first()
+    latest = max(payments, key=lambda payment: payment["created_at"]) if payments else None
+
+    return {
+        "id": str(row["id"]),
+        "guestName": row["guest_name"],
+        "guestEmail": row["email"],
+        "guestPhone": row["contact_number"],
+        "status": row["status"].replace("_", "-"),
+        "checkIn": _date(row["check_in"]),
+        "checkOut": _date(row["check_out"]),
+        "roomType": row["room__room_type__name"],
+        "roomTypeId": row["room__room_type_id"],
+        "assignedRoom": row["assigned_room__room_number"],
+        "nights": (row["check_out"] - row["check_in"]).days,
+        "totalAmount": _money(row["total_price"]),
+        "downpayment": downpayment,
+        "remainingBalance": _ZERO if remaining_paid else row["total_price"] - downpayment,
+        "additionalFee": row["additional_fee"],
+        "payments": [
+            {
+                "id": payment["id"],
+                "amount": _money(payment["amount"]),
+                "payment_type": payment["payment_type"],
+                "status": payment["status"],
+                "description": payment["description"],
+                "paid_at": _datetime(payment["paid_at"]) if payment["paid_at"] is not None else None,
+            }
+            for payment in payments
+        ],
+        "paymentRef": latest["transaction_reference"] if latest else "",
+        "paymentReceiptUrl": _receipt_url(latest["receipt"]) if latest and latest["receipt"] else "",
+        "guests": row["adults"] + row["children"] + row["extra_children"],
+        "version": row["version"],
+    }
+
+
+# ------------------------------
+# Orders (OrderSerializer)
+# ------------------------------
+ORDER_FIELDS = (
+    "id", "booking_id", "booking__guest_name", "booking__room__room_number", "order_type", "order_status",
+    "total_amount", "version", "created_at", "updated_at",
+)
+ORDER_ITEM_FIELDS = ("order_id", "id", "menu_name", "price", "quantity", "subtotal")
+
+
+def orders(queryset):
+    """OrderSerializer(queryset, many=True).data"""
+    items = defaultdict(list)
+    for item in OrderItem.objects.filter(order__in=queryset.values("pk")).order_by("pk").values(*ORDER_ITEM_FIELDS):
+        items[item["order_id"]].append(
+            {
+                "id": item["id"],
+                "menu_name": item["menu_name"],
+                "price": _money(item["price"]),
+                "quantity": item["quantity"],
+                "subtotal": _money(item["subtotal"]),
+            }
+        )
+    return [order(row, items[row["id"]]) for row in queryset.values(*ORDER_FIELDS)]
+
+
+def order(row, items):
+    """One OrderSerializer row from its values() row (ORDER_FIELDS) and its projected items."""
+    data = {"id": row["id"], "booking": row["booking_id"]}
+    # guestName / roomNumber are skipped for orders without a booking, as by the serializer
+    if row["booking_id"] is not None:
+        data["guestName"] = row["booking__guest_name"]
+        data["roomNumber"] = row["booking__room__room_number"]
+    data.update(
+        order_type=row["order_type"],
+        order_status=row["order_status"],
+        total_amount=_money(row["total_amount"]),
+        items=items,
+        version=row["version"],
+        created_at=_datetime(row["created_at"]),
+        updated_at=_datetime(row["updated_at"]),
+    )
+    return data
+
+
+# ------------------------------
+# Rooms (RoomOperationSerializer)
+# ------------------------------
+ROOM_OPERATION_FIELDS = (
+    "id", "room_number", "floor", "room_type_id", "room_type__name", "status", "note", "version", "updated_at",
+)
+
+
+def room_operations(queryset):
+    """RoomOperationSerializer(queryset, many=True).data"""
+    return [room_operation(row) for row in queryset.values(*ROOM_OPERATION_FIELDS)]
+
+
+def room_operation(row):
+    return {
+        "id": row["id"],
+        "room_number": row["room_number"],
+        "floor": row["floor"],
+        "room_type": {"id": row["room_type_id"], "name": row["room_type__name"]},
+        "status": row["status"],
+        "note": row["note"],
+        "version": row["version"],
+        "last_updated": _datetime(row["updated_at"]),
+    }
+
+
+# ------------------------------
+# Checked-in bookings (CheckedInBookingSerializer)
+# ------------------------------
+CHECKED_IN_FIELDS = ("id", "guest_name", "assigned_room_id", "assigned_room__room_number", "assigned_room__room_type__name")
+
+
+def checked_in_bookings(queryset):
+    """CheckedInBookingSerializer(queryset, many=True).data"""
+    return [checked_in_booking(row) for row in queryset.values(*CHECKED_IN_FIELDS)]
+
+
+def checked_in_booking(row):
+    data = {"id": str(row["id"]), "name": row["guest_name"]}
+    # Skipped by the serializer while no room is assigned
+    if row["assigned_room_id"] is not None:
+        data["roomNumber"] = row["assigned_room__room_number"]
+        data["roomType"] = row["assigned_room__room_type__name"]
+    return data
@@ -0,0 +1,95 @@
+"""
+Response renderers (settings.REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES']).
+
+`FastJSONRenderer` renders with orjson, which encodes large lists (booking
+list, orders) several times faster than the json module. What orjson
+doesn't encode the way DRF does (Decimal, date / time, lazy strings) goes
+through DRF's own JSONEncoder.default, so Decimals stay numbers and
+datetimes keep DRF's format. orjson writes some floats differently (1e16
+and 0.00001 where the json module writes 1e+16 and 1e-05); responses with
+such a number are rendered again by JSONRenderer, as are indented output
+(Accept: application/json; indent=4), values orjson can't encode and
+Decimal NaN / Infinity (which JSONRenderer refuses under STRICT_JSON).
+The output is then JSONRenderer's, with one exception: a float NaN or
+Infinity in the data renders as null where JSONRenderer raises ValueError.
+
+`MessagePackRenderer` answers clients that send Accept:
+application/msgpack (or ?format=msgpack) with the same data as
+MessagePack. It is only enabled when the msgpack package is installed.
+
+`manage.py bench_renderers` times both against JSONRenderer.
+"""
+import math
+import re
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+# Types the renderers leave to DRF's encoder: Decimal -> float, date / time -> ISO 8601 as DRF writes it, ...
+_encode_default = JSONEncoder().default
+
+# orjson writes a float with an exponent as 1e16 / 1e-7 and 0.00001 without
+# one, where the json module writes 1e+16, 1e-07 and 1e-05. A match inside a
+# string only costs a re-render. Starts with a literal so re scans fast.
+_EXPONENT = re.compile(rb"e(?<=[0-9]e)[-0-9]")
+_NO_EXPONENT = b"0.0000"
+
+
+def _orjson_default(obj):
+    value = _encode_default(obj)
+    if isinstance(value, float) and not math.isfinite(value):
+        # orjson would write null; let JSONRenderer raise or render it
+        raise TypeError("Non-finite float")
+    return value
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer with orjson: less CPU, same output but for float NaN / Infinity."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=_orjson_default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            # e.g. integers over 64 bits, Decimal("NaN")
+            return super().render(data, accepted_media_type, renderer_context)
+        if _EXPONENT.search(ret) or _NO_EXPONENT in ret:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Escaped like JSONRenderer does, so the output is a strict JavaScript subset
+        return ret.replace("\u2028".encode(), b"\\u2028").replace("\u2029".encode(), b"\\u2029")
+
+
+class MessagePackRenderer(BaseRenderer):
+    """The response data as MessagePack, converted like the JSON renderers (Decimal -> float, ...)."""
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=_encode_default)
@@ -0,0 +1,273 @@
+"""
+Daily KPI rollups.
+
+`DailyRoomTypeStats` holds rooms available / room-nights sold / room revenue
+per room type per day, `DailyPaymentStats` the paid amounts per day per
+payment category. The analytics endpoint only reads these tables, so a
+year-long report touches at most 366 rows per room type.
+
+Rows are kept current by the signal handlers in api/signals.py, which
+re-compute only the days touched by a saved Booking/Payment. Code that
+writes bookings or payments in bulk (bulk_create, queryset.update) must call
+`schedule_booking_refresh` / `schedule_payment_refresh` itself.
+`manage.py rebuild_rollups` recomputes everything from scratch.
+
+`rooms_available` is the room type's sellable room count on that day. Rows
+from today on follow the current rooms: the Room signals (and bulk room
+writers) call `schedule_inventory_refresh` when a room is added, removed,
+moves to another room type or goes in or out of service. Once a day has
+passed its row keeps its count, so re-computing a past day (a booking
+edited afterwards, a rebuild) doesn't replace it with today's inventory.
+The night audit writes every room type's row for the day it closes.
+"""
+import datetime
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from api.models import Booking, DailyPaymentStats, DailyRoomTypeStats, Payment, Room
+
+
+# Bookings that count as sold room-nights
+SOLD_STATUSES = (
+    Booking.Status.CONFIRMED,
+    Booking.Status.CHECKED_IN,
+    Booking.Status.CHECKED_OUT,
+)
+
+CENT = Decimal("0.01")
+BATCH_SIZE = 1000
+
+
+def daterange(start, end):
+    """Days in [start, end)."""
+    for offset in range((end - start).days):
+        yield start + datetime.timedelta(days=offset)
+
+
+def nightly_amounts(total, nights):
+    """
+    Split a stay total into per-night amounts (rounded to cents); any
+    rounding remainder goes to the last night so the nights add up to total.
+    """
+    if nights <= 0:
+        return []
+    per_night = (total / nights).quantize(CENT)
+    amounts = [per_night] * nights
+    amounts[-1] += total - per_night * nights
+    return amounts
+
+
+# Room statuses that take a room out of the inventory
+UNSELLABLE_STATUSES = (Room.Status.OUT_OF_SERVICE,)
+
+
+def is_sellable(room_status):
+    return room_status not in UNSELLABLE_STATUSES
+
+
+def sellable_room_counts(room_type_ids=None):
+    """{room_type_id: number of rooms that can be sold} (out of service rooms excluded)."""
+    rooms = Room.objects.exclude(status__in=UNSELLABLE_STATUSES)
+    if room_type_ids is not None:
+        rooms = rooms.filter(room_type_id__in=room_type_ids)
+    return dict(rooms.values("room_type_id").annotate(n=Count("id")).values_list("room_type_id", "n"))
+
+
+def _accumulate(bookings, start, end, sold, revenue):
+    """
+    Add each (room_type_id, check_in, check_out, total_price) booking's nights
+    that fall inside [start, end) to the sold/revenue dicts.
+    """
+    for room_type_id, check_in, check_out, total_price in bookings:
+        nights = (check_out - check_in).days
+        for day, amount in zip(daterange(check_in, check_out), nightly_amounts(total_price, nights)):
+            if start <= day < end:
+                sold[room_type_id, day] += 1
+                revenue[room_type_id, day] += amount
+
+
+def _recorded_room_counts(room_type_ids, start, end):
+    """{(room_type_id, day): rooms_available} of the existing rows for past days in [start, end)."""
+    end = min(end, timezone.localdate())
+    if start >= end:
+        return {}
+    rows = DailyRoomTypeStats.objects.filter(room_type_id__in=room_type_ids, date__gte=start, date__lt=end)
+    return {(room_type_id, day): count for room_type_id, day, count in rows.values_list("room_type_id", "date", "rooms_available")}
+
+
+def _room_type_rows(room_type_ids, start, end, sold, revenue):
+    available = sellable_room_counts(room_type_ids)
+    # Past days keep the inventory recorded for them; new rows and later days get the current one
+    recorded = _recorded_room_counts(room_type_ids, start, end)
+    return [
+        DailyRoomTypeStats(
+            room_type_id=room_type_id,
+            date=day,
+            rooms_available=recorded.get((room_type_id, day), available.get(room_type_id, 0)),
+            rooms_sold=sold.get((room_type_id, day), 0),
+            room_revenue=revenue.get((room_type_id, day), Decimal("0")),
+        )
+        for room_type_id in room_type_ids
+        for day in daterange(start, end)
+    ]
+
+
+def refresh_room_type_days(room_type_id, start, end):
+    """Recompute DailyRoomTypeStats for one room type for the days in [start, end)."""
+    if start >= end:
+        return
+
+    bookings = Booking.objects.filter(
+        room__room_type_id=room_type_id,
+        status__in=SOLD_STATUSES,
+        check_in__lt=end,
+        check_out__gt=start,
+    ).values_list("room__room_type_id", "check_in", "check_out", "total_price")
+
+    sold = defaultdict(int)
+    revenue = defaultdict(Decimal)
+    _accumulate(bookings, start, end, sold, revenue)
+
+    DailyRoomTypeStats.objects.bulk_create(
+        _room_type_rows([room_type_id], start, end, sold, revenue),
+        batch_size=BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=["room_type", "date"],
+        update_fields=["rooms_available", "rooms_sold", "room_revenue", "updated_at"],
+    )
+
+
+def _payment_day_expression():
+    # Payments are reported on the day they were paid; older rows have no paid_at
+    return TruncDate(Coalesce("paid_at", "created_at"))
+
+
+def _paid_payments_between(start, end):
+    tz = timezone.get_current_timezone()
+    start_dt = datetime.datetime.combine(start, datetime.time.min, tzinfo=tz)
+    end_dt = datetime.datetime.combine(end, datetime.time.min, tzinfo=tz)
+    return Payment.objects.filter(status=Payment.PaymentStatus.PAID).filter(
+        Q(paid_at__gte=start_dt, paid_at__lt=end_dt)
+        | Q(paid_at__isnull=True, created_at__gte=start_dt, created_at__lt=end_dt)
+    )
+
+
+def refresh_payment_days(start, end):
+    """Recompute DailyPaymentStats for the days in [start, end)."""
+    if start >= end:
+        return
+
+    totals = (
+        _paid_payments_between(start, end)
+        .annotate(day=_payment_day_expression())
+        .values("day", "payment_type")
+        .annotate(amount=Sum("amount"), count=Count("id"))
+    )
+
+    with transaction.atomic():
+        DailyPaymentStats.objects.filter(date__gte=start, date__lt=end).delete()
+        DailyPaymentStats.objects.bulk_create(
+            [
+                DailyPaymentStats(
+                    date=row["day"],
+                    payment_type=row["payment_type"],
+                    amount=row["amount"],
+                    count=row["count"],
+                )
+                for row in totals
+            ],
+            batch_size=BATCH_SIZE,
+        )
+
+
+def refresh_for_bookings(stays):
+    """
+    Refresh the room type days covered by `stays`, an iterable of
+    (room_type_id, check_in, check_out). Overlapping stays of the same room
+    type are merged into a single span.
+    """
+    spans = {}
+    for room_type_id, check_in, check_out in stays:
+        if room_type_id is None:
+            continue
+        low, high = spans.get(room_type_id, (check_in, check_out))
+        spans[room_type_id] = (min(low, check_in), max(high, check_out))
+
+    for room_type_id, (start, end) in spans.items():
+        refresh_room_type_days(room_type_id, start, end)
+
+
+def refresh_for_payment_days(days):
+    days = [day for day in days if day is not None]
+    if days:
+        refresh_payment_days(min(days), max(days) + datetime.timedelta(days=1))
+
+
+def schedule_booking_refresh(stays):
+    """Run refresh_for_bookings once the current transaction commits."""
+    stays = list(stays)
+    if stays:
+        transaction.on_commit(lambda: refresh_for_bookings(stays))
+
+
+def schedule_payment_refresh(days):
+    """Run refresh_for_payment_days once the current transaction commits."""
+    days = list(days)
+    if days:
+        transaction.on_commit(lambda: refresh_for_payment_days(days))
+
+
+def refresh_inventory(room_type_ids):
+    """Set rooms_available of today's and later rows of these room types to their current room count."""
+    room_type_ids = set(room_type_ids) - {None}
+    counts = sellable_room_counts(room_type_ids)
+    today, now = timezone.localdate(), timezone.now()
+    for room_type_id in room_type_ids:
+        count = counts.get(room_type_id, 0)
+        DailyRoomTypeStats.objects.filter(room_type_id=room_type_id, date__gte=today).exclude(
+            rooms_available=count
+        ).update(rooms_available=count, updated_at=now)
+
+
+def schedule_inventory_refresh(room_type_ids):
+    """Run refresh_inventory once the current transaction commits."""
+    room_type_ids = set(room_type_ids) - {None}
+    if room_type_ids:
+        transaction.on_commit(lambda: refresh_inventory(room_type_ids))
+
+
+def payment_day(payment):
+    moment = payment.paid_at or payment.created_at
+    return timezone.localdate(moment) if moment else None
+
+
+@transaction.atomic
+def rebuild(start, end):
+    """
+    Recompute every rollup row for the days in [start, end) with one pass
+    over the bookings that overlap the range.
+    """
+    room_type_ids = list(
+        Room.objects.values_list("room_type_id", flat=True).distinct().order_by("room_type_id")
+    )
+
+    bookings = (
+        Booking.objects.filter(status__in=SOLD_STATUSES, check_in__lt=end, check_out__gt=start)
+        .values_list("room__room_type_id", "check_in", "check_out", "total_price")
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+
+    sold = defaultdict(int)
+    revenue = defaultdict(Decimal)
+    _accumulate(bookings, start, end, sold, revenue)
+
+    rows = _room_type_rows(room_type_ids, start, end, sold, revenue)
+    DailyRoomTypeStats.objects.filter(date__gte=start, date__lt=end).delete()
+    DailyRoomTypeStats.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+
+    refresh_payment_days(start, end)
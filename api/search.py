@@ -0,0 +1,154 @@
+"""
+Guest search over bookings: name, email, phone number and booking ID.
+
+Every booking has a BookingSearchDocument row (phone reduced to digits),
+written by the Booking post_save signal and by `index_bookings()` for bulk
+writers. Migration 0020 indexes it per database:
+
+* SQLite: an external content FTS5 table with the trigram tokenizer,
+  kept in sync with the document table by triggers. A term matches any
+  substring of 3+ characters, ranked by bm25.
+* PostgreSQL: a pg_trgm GIN index over the concatenated fields; substring
+  matches ranked by similarity.
+
+When no booking contains every term, the search falls back to fuzzy
+matching (typos): on SQLite any 4-character piece of a term (3 for short
+terms), on PostgreSQL word similarity. Other databases use icontains.
+
+`search_booking_ids("jane 0917")` returns booking ids, best match first.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from api.models import BookingSearchDocument
+
+
+FTS_TABLE = "api_bookingsearch_fts"
+# bm25 weights of the FTS columns: booking_id, guest_name, email, phone
+FTS_WEIGHTS = (10.0, 10.0, 5.0, 5.0)
+# Concatenation indexed by the PostgreSQL trigram index (must match migration 0020)
+PG_DOCUMENT = "(booking_id || ' ' || guest_name || ' ' || email || ' ' || phone)"
+
+MIN_TERM_LENGTH = 3
+MAX_TERMS = 8
+# Phone numbers are matched on their last digits, so "+63 917..." finds "0917..."
+PHONE_MATCH_DIGITS = 7
+# SQLite ranks at most this many of the newest matches
+RANK_WINDOW = 2000
+_PHONE = re.compile(r"\+?[\d\s().-]+")
+
+
+def normalize_phone(value):
+    return re.sub(r"\D", "", value or "")
+
+
+def _document(booking):
+    return BookingSearchDocument(
+        booking_id=booking.pk,
+        guest_name=booking.guest_name,
+        email=booking.email,
+        phone=normalize_phone(booking.contact_number),
+    )
+
+
+def index_bookings(bookings):
+    """Create or refresh the search documents of `bookings` (one query)."""
+    BookingSearchDocument.objects.bulk_create(
+        [_document(booking) for booking in bookings],
+        update_conflicts=True,
+        unique_fields=["booking"],
+        update_fields=["guest_name", "email", "phone"],
+    )
+
+
+def search_terms(query):
+    """Split a query into lowercase terms; a phone number becomes one term of its last digits."""
+    query = (query or "").strip().lower()
+    if _PHONE.fullmatch(query) and len(normalize_phone(query)) >= MIN_TERM_LENGTH:
+        return [normalize_phone(query)[-PHONE_MATCH_DIGITS:]]
+    terms = [term for term in query.split() if len(term) >= MIN_TERM_LENGTH]
+    return terms[:MAX_TERMS]
+
+
+def search_booking_ids(query, limit=20):
+    terms = search_terms(query)
+    if not terms:
+        return []
+
+    vendor = connection.vendor
+    if vendor == "sqlite":
+        return _sqlite_search(terms, limit)
+    if vendor == "postgresql":
+        return _postgres_search(terms, limit)
+
+    condition = Q()
+    for term in terms:
+        condition &= (
+            Q(booking_id__icontains=term) | Q(guest_name__icontains=term)
+            | Q(email__icontains=term) | Q(phone__contains=term)
+        )
+    return list(BookingSearchDocument.objects.filter(condition).values_list("booking_id", flat=True)[:limit])
+
+
+# ------------------------------
+# SQLite FTS5
+# ------------------------------
+def _phrase(text):
+    return '"' + text.replace('"', '""') + '"'
+
+
+def _fts_query(sql_match, limit):
+    # Ranking every match of a common name costs ~100 ms at 1M bookings, so
+    # only the newest RANK_WINDOW matches are ranked (a rowid range, which
+    # FTS5 applies while matching).
+    weights = ", ".join(str(weight) for weight in FTS_WEIGHTS)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT booking_id FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND rowid >= COALESCE(("
+            f"  SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s ORDER BY rowid DESC LIMIT 1 OFFSET %s"
+            f"), 0) ORDER BY bm25({FTS_TABLE}, {weights}) LIMIT %s",
+            [sql_match, sql_match, RANK_WINDOW - 1, limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _sqlite_search(terms, limit):
+    ids = _fts_query(" AND ".join(_phrase(term) for term in terms), limit)
+    if ids:
+        return ids
+
+    pieces = set()
+    for term in terms:
+        size = 4 if len(term) > 4 else 3
+        pieces.update(term[i:i + size] for i in range(len(term) - size + 1))
+    return _fts_query(" OR ".join(_phrase(piece) for piece in sorted(pieces)), limit)
+
+
+# ------------------------------
+# PostgreSQL pg_trgm
+# ------------------------------
+def _like_pattern(term):
+    return "%" + re.sub(r"([\\%_])", r"\\\1", term) + "%"
+
+
+def _postgres_search(terms, limit):
+    table = BookingSearchDocument._meta.db_table
+    query = " ".join(terms)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT booking_id FROM {table} WHERE {PG_DOCUMENT} ILIKE ALL(%s) "
+            f"ORDER BY similarity({PG_DOCUMENT}, %s) DESC LIMIT %s",
+            [[_like_pattern(term) for term in terms], query, limit],
+        )
+        ids = [row[0] for row in cursor.fetchall()]
+        if ids:
+            return ids
+
+        cursor.execute(
+            f"SELECT booking_id FROM {table} WHERE %s <%% {PG_DOCUMENT} "
+            f"ORDER BY word_similarity(%s, {PG_DOCUMENT}) DESC LIMIT %s",
+            [query, query, limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
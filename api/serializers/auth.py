@@ -1,38 +1,50 @@
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
-
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from api.authentication import get_user_state, invalidate_user_state, set_user_claims
+
+
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
-        token['role'] = user.role
-        token['username'] = user.username
-        token['email'] = user.email
+        # role, username, email, is_staff, is_superuser, role_version
+        set_user_claims(token, user)
 
         return token
-    
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """Access tokens made from it carry the user's current role claims, not those it was issued with."""
+
+    @property
+    def access_token(self):
+        access = super().access_token
+        state = get_user_state(self.payload.get(api_settings.USER_ID_CLAIM))
+        if state is not None:
+            set_user_claims(access, state)
+        return access
+
 
 class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    simplejwt's refresh (rotation and blacklisting as configured), with the
+    user's current role claims in the new access token and the response.
+    """
+    token_class = ClaimsRefreshToken
+
     def validate(self, attrs):
-        data = super().validate(attrs)
+        user_id = self.token_class(attrs['refresh']).payload.get(api_settings.USER_ID_CLAIM)
+        # Refreshes are rare: read the user's state afresh, not from this worker's cache
+        invalidate_user_state(user_id)
+        state = get_user_state(user_id)
+        if state is None or not state.is_active:
+            raise AuthenticationFailed(self.error_messages["no_active_account"], "no_active_account")
 
-        
-        refresh = RefreshToken(attrs['refresh'])
-        user = self.context['request'].user  # This may be None if user isn't authenticated
-
-        
-        from django.contrib.auth import get_user_model
-        User = get_user_model()
-        try:
-            user_id = refresh['user_id']
-            user = User.objects.get(id=user_id)
-        except Exception:
-            user = None
-
-        if user:
-            data['role'] = user.role
-            data['username'] = user.username
-            data['email'] = user.email
-
-        return data
\ No newline at end of file
+        data = super().validate(attrs)
+        data['role'] = state.role
+        data['username'] = state.username
+        data['email'] = state.email
+        return data
@@ -1,10 +1,13 @@
 from rest_framework import serializers
+from api import availability, rollups, search
+from api.pricing import QuoteError, StayRequest, quote_stay, quote_stays
 from api.models import Room, RoomType, Booking, Payment
 from django.db import transaction
 from django.db.models import Q
 from datetime import date
 
 from decimal import Decimal
+from functools import partial
 
 from django.conf import settings
 from django.core.mail import send_mail
@@ -53,7 +56,22 @@ class BookingCreateSerializer(serializers.ModelSerializer):
         if check_in < date.today():
             raise serializers.ValidationError("Cannot book dates in the past.")
 
-       
+        # Nightly rates from the rate calendar, plus extra person fees. Priced
+        # here so a stay the quote engine refuses (too long, unknown room type) is a 400
+        try:
+            self.context['quote'] = quote_stay(room_type_id, check_in, check_out, data['adults'], data['children'])
+        except QuoteError as exc:
+            raise serializers.ValidationError(str(exc))
+
+        if availability.is_enabled():
+            # Answered from the in-memory interval index (api/availability.py)
+            rooms = availability.available_rooms(room_type_id, check_in, check_out)
+            if not rooms:
+                raise serializers.ValidationError("No rooms of this type are available for the selected dates.")
+
+            self.context['available_room'] = Room.objects.select_related('room_type').get(pk=rooms[0]['id'])
+            return data
+
         rooms_of_type = Room.objects.filter(
             room_type_id=room_type_id, 
             status=Room.Status.AVAILABLE
@@ -86,22 +104,9 @@ class BookingCreateSerializer(serializers.ModelSerializer):
         
         # Get the room we found in validate()
         room = self.context['available_room']
-        room_type = room.room_type
-
-        
-        nights = (validated_data['check_out'] - validated_data['check_in']).days
-        
-        # Calculate Base
-        base_price = room_type.price * nights
-
-        # Calculate Extra Person Fees
-        extra_adults = max(0, validated_data['adults'] - room_type.max_adults)
-        extra_children = max(0, validated_data['children'] - room_type.max_children)
-        
-        extra_cost = (extra_adults * room_type.extra_adult_fee * nights) + \
-                     (extra_children * room_type.extra_child_fee * nights)
 
-        total_price = base_price + extra_cost
+        # Priced in validate()
+        total_price = self.context['quote'].total_price
 
         # 1. Create Booking
         booking = Booking.objects.create(
@@ -152,13 +157,17 @@ class BookingCreateSerializer(serializers.ModelSerializer):
         Hotel Management Team
         """
 
-        send_mail(
+        # After commit: a slow SMTP server must not hold the write transaction, and a
+        # rollback must not leave the guest with a mail for a booking that doesn't exist.
+        # robust: a failed send is logged; the booking stands
+        transaction.on_commit(partial(
+            send_mail,
             subject=subject,
             message=message,
             from_email=settings.DEFAULT_FROM_EMAIL,
             recipient_list=[booking.email],
             fail_silently=False,
-        )
+        ), robust=True)
         
  
         
@@ -168,6 +177,226 @@ class BookingCreateSerializer(serializers.ModelSerializer):
         return booking
     
 
+class GroupRoomSerializer(serializers.Serializer):
+    room_type_id = serializers.IntegerField(min_value=1)
+    check_in = serializers.DateField()
+    check_out = serializers.DateField()
+    adults = serializers.IntegerField(min_value=1, default=1)
+    children = serializers.IntegerField(min_value=0, default=0)
+
+    def validate(self, data):
+        if data['check_in'] >= data['check_out']:
+            raise serializers.ValidationError("Check-out date must be after check-in date.")
+
+        if data['check_in'] < date.today():
+            raise serializers.ValidationError("Cannot book dates in the past.")
+
+        return data
+
+
+class GroupBookingSerializer(serializers.Serializer):
+    """
+    Several rooms booked together (e.g. by a tour operator) under one
+    contact and one GCash downpayment. Either every room is booked or none.
+    """
+    MAX_ROOMS = 50
+
+    guest_name = serializers.CharField(max_length=255)
+    email = serializers.EmailField()
+    contact_number = serializers.CharField(max_length=20)
+    notes = serializers.CharField(required=False, allow_blank=True, default="")
+    gcash_reference = serializers.CharField(max_length=100)
+    receipt_image = serializers.ImageField(required=False)
+
+    # A list of GroupRoomSerializer rows (sent as a JSON string in multipart forms)
+    rooms = serializers.JSONField()
+
+    def validate_rooms(self, value):
+        rows = GroupRoomSerializer(data=value, many=True, allow_empty=False, max_length=self.MAX_ROOMS)
+        rows.is_valid(raise_exception=True)
+        return rows.validated_data
+
+    def validate(self, data):
+        # Nightly rates from the rate calendar for every room in one query. Priced
+        # here so a group the quote engine refuses (too long, unknown room type) is a 400
+        try:
+            self.context['quotes'] = quote_stays([
+                StayRequest(row['room_type_id'], row['check_in'], row['check_out'], row['adults'], row['children'])
+                for row in data['rooms']
+            ])
+        except QuoteError as exc:
+            raise serializers.ValidationError({"rooms": [str(exc)]})
+
+        stays = [(row['room_type_id'], row['check_in'], row['check_out']) for row in data['rooms']]
+
+        # One pass over the availability index for the whole group
+        allocated = availability.allocate_rooms(stays)
+
+        unplaced = {
+            str(i): ["No rooms of this type are available for the selected dates."]
+            for i, room in enumerate(allocated) if room is None
+        }
+        if unplaced:
+            raise serializers.ValidationError({"rooms": unplaced})
+
+        self.context['allocated_room_ids'] = [room['id'] for room in allocated]
+        return data
+
+    def _check_rooms_still_free(self, stays):
+        """Lock the allocated rooms and re-check them against the database."""
+        room_ids = [room_id for room_id, _, _ in stays]
+        locked = Room.objects.select_for_update().select_related('room_type').in_bulk(room_ids)
+
+        clashes = Booking.objects.filter(
+            room_id__in=room_ids,
+            status__in=availability.ACTIVE_STATUSES,
+            check_in__lt=max(check_out for _, _, check_out in stays),
+            check_out__gt=min(check_in for _, check_in, _ in stays),
+        ).values_list('room_id', 'check_in', 'check_out')
+
+        booked = {}
+        for room_id, check_in, check_out in clashes:
+            booked.setdefault(room_id, []).append((check_in, check_out))
+
+        for room_id, check_in, check_out in stays:
+            room = locked.get(room_id)
+            if (
+                room is None
+                or room.status != Room.Status.AVAILABLE
+                or any(start < check_out and end > check_in for start, end in booked.get(room_id, ()))
+            ):
+                raise serializers.ValidationError("Some of the rooms were just taken. Please try again.")
+        return locked
+
+    @transaction.atomic
+    def create(self, validated_data):
+        rows = validated_data['rooms']
+        gcash_ref = validated_data['gcash_reference']
+        receipt_img = validated_data.get('receipt_image')
+
+        room_ids = self.context['allocated_room_ids']
+        stays = [(room_id, row['check_in'], row['check_out']) for room_id, row in zip(room_ids, rows)]
+        rooms = self._check_rooms_still_free(stays)
+
+        quotes = self.context['quotes']
+
+        # 1. Create Bookings
+        bookings = [
+            Booking(
+                id=booking_id,
+                room=rooms[room_id],
+                guest_name=validated_data['guest_name'],
+                email=validated_data['email'],
+                contact_number=validated_data['contact_number'],
+                notes=validated_data['notes'],
+                check_in=row['check_in'],
+                check_out=row['check_out'],
+                adults=row['adults'],
+                children=row['children'],
+                total_price=quote.total_price,
+                status=Booking.Status.PENDING,  # Pending verification
+            )
+            for booking_id, room_id, row, quote in zip(Booking.next_ids(len(rows)), room_ids, rows, quotes)
+        ]
+        Booking.objects.bulk_create(bookings)
+
+        # 2. Create Downpayment Records (20% of each booking), sharing one stored receipt
+        receipt_name = None
+        if receipt_img:
+            receipt_field = Payment._meta.get_field('receipt')
+            receipt_name = receipt_field.storage.save(
+                receipt_field.generate_filename(None, receipt_img.name), receipt_img
+            )
+
+        payments = [
+            Payment(
+                booking=booking,
+                amount=booking.total_price * Decimal("0.20"),
+                payment_type=Payment.PaymentCategory.DOWNPAYMENT,
+                status=Payment.PaymentStatus.PENDING,  # Pending verification of screenshot
+                transaction_reference=gcash_ref,
+                receipt=receipt_name,
+                description=f"20% Downpayment via GCash (group of {len(bookings)}). Ref: {gcash_ref}",
+            )
+            for booking in bookings
+        ]
+        Payment.objects.bulk_create(payments)
+
+        # bulk_create skips save() and the model signals
+        availability.bump_versions({booking.room.room_type_id for booking in bookings})
+        rollups.schedule_booking_refresh(
+            (booking.room.room_type_id, booking.check_in, booking.check_out) for booking in bookings
+        )
+        rollups.schedule_payment_refresh(rollups.payment_day(payment) for payment in payments)
+        search.index_bookings(bookings)
+
+        self._send_confirmation(bookings, sum(payment.amount for payment in payments))
+        return bookings
+
+    def _send_confirmation(self, bookings, downpayment_amount):
+        first = bookings[0]
+        lines = "\n".join(
+            f"        - {booking.id}: {booking.room.room_type.name}, "
+            f"{booking.check_in} to {booking.check_out}, "
+            f"{booking.adults + booking.children} guest(s), ₱{booking.total_price}"
+            for booking in bookings
+        )
+
+        subject = f"Group Booking Received – Pending Verification ({len(bookings)} rooms)"
+
+        message = f"""
+        Dear {first.guest_name},
+
+        Thank you for choosing our hotel.
+
+        We have successfully received your group booking request. Your reservations are
+        currently PENDING VERIFICATION while we review your submitted payment.
+
+        Bookings:
+{lines}
+
+        - Total Price: ₱{sum(booking.total_price for booking in bookings)}
+        - Downpayment Submitted: ₱{downpayment_amount}
+
+        Our team will verify your payment within 24 hours.
+        Once approved, you will receive a confirmation email.
+
+        If any additional information is required, we will contact you via this email.
+
+        Best regards,
+        Hotel Management Team
+        """
+
+        # Sent after commit, see BookingCreateSerializer.create
+        transaction.on_commit(partial(
+            send_mail,
+            subject=subject,
+            message=message,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            recipient_list=[first.email],
+            fail_silently=False,
+        ), robust=True)
+
+    def to_representation(self, bookings):
+        return {
+            "bookings": [
+                {
+                    "id": booking.id,
+                    "room_type": booking.room.room_type.name,
+                    "room_details": booking.room.room_number,
+                    "check_in": booking.check_in,
+                    "check_out": booking.check_out,
+                    "adults": booking.adults,
+                    "children": booking.children,
+                    "status": booking.status,
+                    "total_price": f"{booking.total_price:.2f}",
+                }
+                for booking in bookings
+            ],
+            "total_price": f"{sum(booking.total_price for booking in bookings):.2f}",
+        }
+
+
 class BookingSerializer(serializers.Serializer):
     id = serializers.CharField()
     guestName = serializers.SerializerMethodField()
@@ -197,6 +426,8 @@ class BookingSerializer(serializers.Serializer):
 
     guests = serializers.SerializerMethodField()
 
+    version = serializers.IntegerField(read_only=True)
+
 
 
     def get_guestName(self, obj):
@@ -222,7 +453,8 @@ class BookingSerializer(serializers.Serializer):
         payments = obj.payments.filter(
             payment_type=Payment.PaymentCategory.DOWNPAYMENT
         )
-        return float(sum(p.amount for p in payments))
+        # Decimal: the renderers write it as a number (see api/renderers.py)
+        return sum((p.amount for p in payments), Decimal("0"))
 
     def get_remainingBalance(self, obj):
         down = self.get_downpayment(obj)
@@ -234,10 +466,10 @@ class BookingSerializer(serializers.Serializer):
                 status=Payment.PaymentStatus.PAID
             ).exists()
             if remaining_paid:
-                return 0.0
+                return Decimal("0")
         
         # Otherwise, calculate normally
-        return float(obj.total_price) - float(down)
+        return obj.total_price - down
 
     def get_paymentRef(self, obj):
         latest_payment = obj.payments.order_by("-created_at").first()
@@ -0,0 +1,40 @@
+from decimal import Decimal
+
+from rest_framework import serializers
+
+from api.models import Menu, Room
+
+
+# One row of an import file each (see api/importers.py). Plain Serializers
+# on purpose: uniqueness is handled by the upsert, not per-row queries.
+
+class RoomTypeRowSerializer(serializers.Serializer):
+    name = serializers.CharField(max_length=100)
+    price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0)
+    description = serializers.CharField(required=False, allow_blank=True)
+    amenities = serializers.CharField(required=False, allow_blank=True)  # "Wi-Fi;Aircon;TV"
+    max_adults = serializers.IntegerField(required=False, min_value=0)
+    max_children = serializers.IntegerField(required=False, min_value=0)
+    extra_adult_fee = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0, required=False)
+    extra_child_fee = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0, required=False)
+
+    def validate_amenities(self, value):
+        return [item.strip() for item in value.split(";") if item.strip()]
+
+
+class RoomRowSerializer(serializers.Serializer):
+    room_number = serializers.CharField(max_length=10)
+    room_type = serializers.CharField(max_length=100)  # RoomType name
+    floor = serializers.IntegerField(required=False, min_value=0)
+    status = serializers.ChoiceField(choices=Room.Status.choices, required=False)
+    note = serializers.CharField(required=False, allow_blank=True)
+
+
+class MenuRowSerializer(serializers.Serializer):
+    name = serializers.CharField(max_length=100)
+    category = serializers.ChoiceField(choices=Menu.CATEGORY_CHOICES)
+    price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal("0.01"))
+    description = serializers.CharField(required=False, allow_blank=True)
+    stock = serializers.IntegerField(required=False, min_value=0)
+    low_stock_level = serializers.IntegerField(required=False, min_value=0)
+    is_available = serializers.BooleanField(required=False)
@@ -1,6 +1,8 @@
 from rest_framework import serializers
 
-from api.models import Menu, Order, OrderItem
+from api.concurrency import UpdateFieldsMixin
+from api.inventory import HISTORY_LIMIT
+from api.models import Menu, Order, OrderItem, StockMovement
 
 
 
@@ -36,19 +38,58 @@ class OrderItemSerializer(serializers.ModelSerializer):
         return OrderItem.objects.create(menu=menu, **validated_data)
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(UpdateFieldsMixin, serializers.ModelSerializer):
     items = OrderItemSerializer(many=True)
     guestName = serializers.CharField(source="booking.guest_name", read_only=True)
     roomNumber = serializers.CharField(source="booking.room.room_number", read_only=True)
 
     class Meta:
         model = Order
-        fields = ['id', 'booking', 'guestName', 'roomNumber', 'order_type', 'order_status', 'total_amount', 'items', 'created_at', 'updated_at']
-        read_only_fields = ['id', 'total_amount', 'created_at', 'updated_at']
+        fields = ['id', 'booking', 'guestName', 'roomNumber', 'order_type', 'order_status', 'total_amount', 'items', 'version', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'total_amount', 'version', 'created_at', 'updated_at']
 
     def validate(self, attrs):
         if attrs.get('order_type') == Order.OrderType.ROOM_SERVICE and not attrs.get('booking'):
             raise serializers.ValidationError("Room service orders must be linked to a booking.")
         return attrs
-    
 
+    def update(self, instance, validated_data):
+        if 'items' in validated_data:
+            raise serializers.ValidationError({"items": ["Items cannot be changed after the order is placed."]})
+        return super().update(instance, validated_data)
+
+
+class StockMovementSerializer(serializers.ModelSerializer):
+    # Stock after the movement (history only)
+    balance = serializers.IntegerField(read_only=True, required=False)
+    created_by = serializers.CharField(source="created_by.username", read_only=True, default=None)
+
+    class Meta:
+        model = StockMovement
+        fields = ['id', 'kind', 'quantity', 'balance', 'order', 'note', 'created_by', 'created_at']
+
+
+class StockChangeSerializer(serializers.Serializer):
+    """A restock or spoilage (quantity > 0) or an adjustment (quantity added, may be negative)."""
+    kind = serializers.ChoiceField(choices=[
+        StockMovement.Kind.RESTOCK, StockMovement.Kind.SPOILAGE, StockMovement.Kind.ADJUSTMENT,
+    ])
+    quantity = serializers.IntegerField()
+    note = serializers.CharField(max_length=255, required=False, default="", allow_blank=True)
+
+    def validate(self, attrs):
+        if attrs['quantity'] == 0:
+            raise serializers.ValidationError({"quantity": ["Must not be zero."]})
+        if attrs['kind'] != StockMovement.Kind.ADJUSTMENT and attrs['quantity'] < 0:
+            raise serializers.ValidationError({"quantity": ["Must be greater than zero."]})
+        return attrs
+
+
+class StockHistoryQuerySerializer(serializers.Serializer):
+    since = serializers.DateTimeField(required=False)
+    until = serializers.DateTimeField(required=False)
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=HISTORY_LIMIT, default=HISTORY_LIMIT)
+
+
+class StockValuationQuerySerializer(serializers.Serializer):
+    as_of = serializers.DateTimeField(required=False)
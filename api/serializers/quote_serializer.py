@@ -0,0 +1,30 @@
+from rest_framework import serializers
+
+
+class StayRequestSerializer(serializers.Serializer):
+    room_type_id = serializers.IntegerField(min_value=1)
+    check_in = serializers.DateField()
+    check_out = serializers.DateField()
+    adults = serializers.IntegerField(min_value=0, default=1)
+    children = serializers.IntegerField(min_value=0, default=0)
+
+    def validate(self, data):
+        if data['check_in'] >= data['check_out']:
+            raise serializers.ValidationError("Check-out date must be after check-in date.")
+        return data
+
+
+class QuoteRequestSerializer(serializers.Serializer):
+    stays = StayRequestSerializer(many=True, allow_empty=False, max_length=500)
+
+
+class QuoteSerializer(serializers.Serializer):
+    room_type_id = serializers.IntegerField()
+    check_in = serializers.DateField()
+    check_out = serializers.DateField()
+    adults = serializers.IntegerField()
+    children = serializers.IntegerField()
+    nights = serializers.IntegerField()
+    base_price = serializers.DecimalField(max_digits=12, decimal_places=2)
+    extra_cost = serializers.DecimalField(max_digits=12, decimal_places=2)
+    total_price = serializers.DecimalField(max_digits=12, decimal_places=2)
@@ -1,5 +1,7 @@
 from rest_framework import serializers
-from api.models import RoomType, Room
+
+from api.concurrency import UpdateFieldsMixin
+from api.models import HousekeepingTask, RoomType, Room
 
 
 class RoomTypeSerializer(serializers.ModelSerializer):
@@ -20,7 +22,7 @@ class RoomTypeSnippetSerializer(serializers.ModelSerializer):
         model = RoomType
         fields = ['id', 'name']
 
-class RoomOperationSerializer(serializers.ModelSerializer):
+class RoomOperationSerializer(UpdateFieldsMixin, serializers.ModelSerializer):
 
     room_type = RoomTypeSnippetSerializer(read_only=True)
     
@@ -36,11 +38,47 @@ class RoomOperationSerializer(serializers.ModelSerializer):
             'room_type', 
             'status', 
             'note', 
+            'version',
             'last_updated'
         ]
         
-        read_only_fields = ['id', 'room_number', 'floor', 'room_type', 'last_updated']
+        read_only_fields = ['id', 'room_number', 'floor', 'room_type', 'version', 'last_updated']
 
     def validate_status(self, value):
+        # Same transitions as the bulk endpoint
+        if self.instance is not None and not Room.can_transition(self.instance.status, value):
+            raise serializers.ValidationError(f"Cannot change status from '{self.instance.status}' to '{value}'.")
+        return value
+
+
+class RoomStatusChangeSerializer(serializers.Serializer):
+    """One row of a bulk housekeeping update. Omit `note` to keep the current one."""
+    room_id = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=Room.Status.choices)
+    note = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+
+
+class BulkRoomStatusSerializer(serializers.Serializer):
+    changes = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=200,
+    )
+
+
+class HousekeepingTaskSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = HousekeepingTask
+        fields = ['id', 'room', 'room_number', 'floor', 'kind', 'status', 'claimed_at', 'created_at']
+        read_only_fields = fields
+
+
+class ClaimTasksSerializer(serializers.Serializer):
+    kind = serializers.ChoiceField(choices=HousekeepingTask.Kind.choices)
+    count = serializers.IntegerField(min_value=1, max_value=20, default=1)
+    # Defaults to the floor of the oldest open task
+    floor = serializers.IntegerField(min_value=0, required=False)
+
 
-        return value
\ No newline at end of file
+class ClaimTokenSerializer(serializers.Serializer):
+    claim_token = serializers.UUIDField()
@@ -0,0 +1,195 @@
+"""
+Model signal handlers. Connected in ApiConfig.ready().
+"""
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from api import availability, housekeeping, kitchen_feed, menu_sales, rollups, search
+from api.authentication import invalidate_user_state
+from api.models import AvailabilityVersion, Booking, CustomUser, HousekeepingTask, Order, Payment, Room, RoomType
+
+
+# Booking fields that affect the KPI rollups
+BOOKING_ROLLUP_FIELDS = {"room", "check_in", "check_out", "status", "total_price"}
+PAYMENT_ROLLUP_FIELDS = {"amount", "status", "payment_type", "paid_at"}
+
+# Fields that change what the availability index (api/availability.py) holds
+BOOKING_AVAILABILITY_FIELDS = {"room", "check_in", "check_out", "status"}
+ROOM_AVAILABILITY_FIELDS = {"room_type", "status", "room_number", "floor"}
+
+# Fields copied into BookingSearchDocument (api/search.py)
+BOOKING_SEARCH_FIELDS = {"guest_name", "email", "contact_number"}
+
+
+def _touches(update_fields, fields):
+    return update_fields is None or bool(fields.intersection(update_fields))
+
+
+# ------------------------------
+# Booking
+# ------------------------------
+@receiver(pre_save, sender=Booking)
+def remember_previous_stay(sender, instance, update_fields=None, **kwargs):
+    instance._previous_stay = None
+    if instance._state.adding or not _touches(update_fields, BOOKING_ROLLUP_FIELDS):
+        return
+    instance._previous_stay = (
+        Booking.objects.filter(pk=instance.pk)
+        .values_list("room__room_type_id", "check_in", "check_out")
+        .first()
+    )
+
+
+@receiver(post_save, sender=Booking)
+def refresh_booking_rollups(sender, instance, update_fields=None, **kwargs):
+    if not _touches(update_fields, BOOKING_ROLLUP_FIELDS):
+        return
+    stays = [(instance.room.room_type_id, instance.check_in, instance.check_out)]
+    if getattr(instance, "_previous_stay", None):
+        stays.append(instance._previous_stay)
+    rollups.schedule_booking_refresh(stays)
+
+
+@receiver(post_save, sender=Booking)
+def update_booking_availability(sender, instance, update_fields=None, **kwargs):
+    if not _touches(update_fields, BOOKING_AVAILABILITY_FIELDS):
+        return
+    previous = getattr(instance, "_previous_stay", None)
+    availability.booking_changed(instance, instance.room.room_type_id, previous[0] if previous else None)
+
+
+@receiver(post_save, sender=Booking)
+def update_booking_search(sender, instance, created, update_fields=None, **kwargs):
+    # The document is deleted with the booking (CASCADE)
+    if created or _touches(update_fields, BOOKING_SEARCH_FIELDS):
+        search.index_bookings([instance])
+
+
+@receiver(post_delete, sender=Booking)
+def refresh_deleted_booking(sender, instance, **kwargs):
+    # The room may be going away in the same cascade; don't dereference it
+    room_type_id = Room.objects.filter(pk=instance.room_id).values_list("room_type_id", flat=True).first()
+    rollups.schedule_booking_refresh([(room_type_id, instance.check_in, instance.check_out)])
+    availability.bump_versions([room_type_id])
+
+
+# ------------------------------
+# RoomType / Room
+# ------------------------------
+@receiver(post_save, sender=RoomType)
+def create_availability_version(sender, instance, created, **kwargs):
+    if created:
+        AvailabilityVersion.objects.get_or_create(room_type=instance)
+
+
+@receiver(pre_save, sender=Room)
+def remember_previous_room_type(sender, instance, update_fields=None, **kwargs):
+    instance._previous_room_type_id = None
+    instance._previous_status = None
+    if instance._state.adding or not _touches(update_fields, {"room_type", "status"}):
+        return
+    instance._previous_room_type_id, instance._previous_status = (
+        Room.objects.filter(pk=instance.pk).values_list("room_type_id", "status").first() or (None, None)
+    )
+
+
+@receiver(post_save, sender=Room)
+def update_room_availability(sender, instance, update_fields=None, **kwargs):
+    if _touches(update_fields, ROOM_AVAILABILITY_FIELDS):
+        availability.bump_versions([instance.room_type_id, getattr(instance, "_previous_room_type_id", None)])
+
+
+@receiver(post_save, sender=Room)
+def refresh_room_inventory(sender, instance, created, **kwargs):
+    previous_type, previous_status = instance._previous_room_type_id, instance._previous_status
+    if (
+        created
+        or (previous_type is not None and previous_type != instance.room_type_id)
+        or (previous_status is not None and rollups.is_sellable(previous_status) != rollups.is_sellable(instance.status))
+    ):
+        rollups.schedule_inventory_refresh([instance.room_type_id, previous_type])
+
+
+@receiver(post_save, sender=Room)
+def update_housekeeping_tasks(sender, instance, created, update_fields=None, **kwargs):
+    if _touches(update_fields, {"status"}):
+        housekeeping.sync_room_tasks([instance.pk])
+    if not created and _touches(update_fields, {"floor", "room_number"}):
+        HousekeepingTask.objects.filter(
+            room=instance, status__in=[HousekeepingTask.Status.OPEN, HousekeepingTask.Status.CLAIMED]
+        ).update(floor=instance.floor, room_number=instance.room_number)
+
+
+@receiver(post_delete, sender=Room)
+def update_deleted_room_availability(sender, instance, **kwargs):
+    availability.bump_versions([instance.room_type_id])
+    rollups.schedule_inventory_refresh([instance.room_type_id])
+
+
+# ------------------------------
+# Payment
+# ------------------------------
+@receiver(pre_save, sender=Payment)
+def remember_previous_payment_day(sender, instance, update_fields=None, **kwargs):
+    instance._previous_payment_day = None
+    if instance._state.adding or not _touches(update_fields, PAYMENT_ROLLUP_FIELDS):
+        return
+    previous = Payment.objects.filter(pk=instance.pk).only("paid_at", "created_at").first()
+    if previous:
+        instance._previous_payment_day = rollups.payment_day(previous)
+
+
+@receiver(post_save, sender=Payment)
+def refresh_payment_rollups(sender, instance, update_fields=None, **kwargs):
+    if not _touches(update_fields, PAYMENT_ROLLUP_FIELDS):
+        return
+    rollups.schedule_payment_refresh(
+        [rollups.payment_day(instance), getattr(instance, "_previous_payment_day", None)]
+    )
+
+
+@receiver(post_delete, sender=Payment)
+def refresh_deleted_payment_rollups(sender, instance, **kwargs):
+    rollups.schedule_payment_refresh([rollups.payment_day(instance)])
+
+
+# ------------------------------
+# Order
+# ------------------------------
+@receiver(pre_save, sender=Order)
+def remember_previous_order_status(sender, instance, update_fields=None, **kwargs):
+    instance._previous_order_status = None
+    if instance._state.adding or not _touches(update_fields, {"order_status"}):
+        return
+    instance._previous_order_status = (
+        Order.objects.filter(pk=instance.pk).values_list("order_status", flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Order)
+def adjust_menu_sales_on_cancel(sender, instance, **kwargs):
+    previous = getattr(instance, "_previous_order_status", None)
+    if previous is None:
+        return
+
+    was_cancelled = previous == Order.OrderStatus.CANCELLED
+    is_cancelled = instance.order_status == Order.OrderStatus.CANCELLED
+    if was_cancelled != is_cancelled:
+        menu_sales.apply_order_cancellation(instance, cancelled=is_cancelled)
+
+
+@receiver(post_save, sender=Order)
+def update_kitchen_feed(sender, instance, created, **kwargs):
+    previous = getattr(instance, "_previous_order_status", None)
+    if created or (previous is not None and previous != instance.order_status):
+        kitchen_feed.order_changed(instance)
+
+
+# ------------------------------
+# CustomUser
+# ------------------------------
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def forget_user_state(sender, instance, **kwargs):
+    # Other workers pick the change up when their cached state expires
+    invalidate_user_state(instance.pk)
@@ -0,0 +1,157 @@
+"""
+Slow query capture.
+
+A DB execute wrapper (see ``connection.execute_wrapper``) that times every
+query and, for the ones slower than ``SLOW_QUERY_THRESHOLD_MS``, records the
+SQL, its params, the view and source line that issued it and the database's
+``EXPLAIN`` plan into a bounded in-process ring buffer.
+
+It is installed per request by ``api.middleware.SlowQueryMiddleware`` so it
+works without ``DEBUG``. The buffer is shown in the admin at
+``/admin/slow-queries/``.
+"""
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+from django.utils import timezone
+
+
+DEFAULT_THRESHOLD_MS = 200
+DEFAULT_BUFFER_SIZE = 200
+
+_local = threading.local()
+_lock = threading.Lock()
+_buffer = deque(maxlen=getattr(settings, "SLOW_QUERY_BUFFER_SIZE", DEFAULT_BUFFER_SIZE))
+
+_DJANGO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__import__("django").__file__)))
+_PROJECT_DIR = str(settings.BASE_DIR)
+
+
+def get_threshold_ms():
+    return getattr(settings, "SLOW_QUERY_THRESHOLD_MS", DEFAULT_THRESHOLD_MS)
+
+
+def get_entries():
+    """Return the recorded slow queries, newest first."""
+    with _lock:
+        return list(reversed(_buffer))
+
+
+def clear():
+    with _lock:
+        _buffer.clear()
+
+
+def set_current_view(name):
+    _local.view = name
+
+
+def _caller():
+    """
+    Return (filename, lineno, function) of the innermost frame that belongs
+    to the project, skipping Django, third-party packages and this module.
+    """
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (
+            filename.startswith(_PROJECT_DIR)
+            and not filename.startswith(_DJANGO_DIR)
+            and "site-packages" not in filename
+            and filename != __file__
+        ):
+            return os.path.relpath(filename, _PROJECT_DIR), frame.f_lineno, frame.f_code.co_name
+        frame = frame.f_back
+    return None, None, None
+
+
+def _plain(value):
+    # TextChoices members repr as "Booking.Status.PENDING"; show the value
+    return str(value) if isinstance(value, str) else value
+
+
+def _explain(connection, sql, params):
+    """Run EXPLAIN for a read query. Returns the plan as a list of lines."""
+    if not sql.lstrip().upper().startswith(("SELECT", "WITH")):
+        return []
+
+    if connection.vendor == "sqlite":
+        prefix = "EXPLAIN QUERY PLAN "
+    else:
+        prefix = "EXPLAIN "
+
+    _local.explaining = True
+    try:
+        # Wrap in a savepoint so a failing EXPLAIN can't break the caller's
+        # transaction (PostgreSQL aborts the whole transaction otherwise).
+        with transaction.atomic(using=connection.alias):
+            with connection.cursor() as cursor:
+                cursor.execute(prefix + sql, params)
+                rows = cursor.fetchall()
+    except DatabaseError as exc:
+        return [f"EXPLAIN failed: {exc}"]
+    finally:
+        _local.explaining = False
+
+    return [" | ".join(str(col) for col in row) for row in rows]
+
+
+class SlowQueryRecorder:
+    """
+    Execute wrapper that records queries slower than ``threshold_ms``.
+    """
+
+    def __init__(self, threshold_ms=None, explain=None):
+        self.threshold_ms = get_threshold_ms() if threshold_ms is None else threshold_ms
+        if explain is None:
+            explain = getattr(settings, "SLOW_QUERY_EXPLAIN", True)
+        self.explain = explain
+
+    def __call__(self, execute, sql, params, many, context):
+        if getattr(_local, "explaining", False):
+            return execute(sql, params, many, context)
+
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            if duration_ms >= self.threshold_ms:
+                self.record(sql, params, many, context["connection"], duration_ms)
+
+    def record(self, sql, params, many, connection, duration_ms):
+        filename, lineno, function = _caller()
+        plan = []
+        if self.explain and not many and not connection.needs_rollback:
+            plan = _explain(connection, sql, params)
+
+        entry = {
+            "recorded_at": timezone.now(),
+            "duration_ms": round(duration_ms, 2),
+            "database": connection.alias,
+            "sql": sql,
+            "params": repr(params) if many else [_plain(p) for p in params or ()],
+            "view": getattr(_local, "view", None),
+            "file": filename,
+            "line": lineno,
+            "function": function,
+            "plan": plan,
+        }
+        with _lock:
+            _buffer.append(entry)
+
+
+@contextmanager
+def capture_slow_queries(threshold_ms=None, explain=None):
+    """Install a ``SlowQueryRecorder`` on every database connection."""
+    recorder = SlowQueryRecorder(threshold_ms=threshold_ms, explain=explain)
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        yield recorder
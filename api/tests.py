@@ -1,3 +1,1599 @@
-from django.test import TestCase
+import contextlib
+import datetime
+import io
+import json
+import tempfile
+import uuid
+from collections import deque
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import mail
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import OperationalError, connection, transaction
+from django.db.models import F
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from drf_spectacular.views import SpectacularAPIView
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, force_authenticate
+from rest_framework.views import APIView
+from rest_framework.viewsets import ViewSet
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from api import (
+    availability, housekeeping, inventory, kitchen_feed, menu_sales, night_audit, openapi, projections, renderers, rollups,
+    search, slow_queries,
+)
+from api.authentication import ClaimsJWTAuthentication, ClaimsUser, invalidate_user_state
+from api.idempotency import idempotent
+from api.permissions import FRONT_DESK, HOUSEKEEPING, PUBLIC, RESTAURANT, HasRole
+from api.pricing import MAX_SPAN_DAYS, QuoteError, StayRequest, quote_stay, quote_stays
+from api.importers import import_csv
+from api.throttling import BookingThrottle, CacheBucketStore, LocalBucketStore, parse_rate
+from api.models import (
+    AvailabilityVersion, Booking, CustomUser, DailyRoomTypeStats, HousekeepingTask, Menu, MenuSalesStats, NightAuditRun, Order,
+    OrderItem, Payment, Room, RoomCharge, RoomRate, RoomType, StaleVersionError, StockMovement,
+)
+from api.serializers.auth import CustomTokenObtainPairSerializer
+from api.serializers.booking_serializer import BookingSerializer, CheckedInBookingSerializer
+from api.serializers.menu_serializer import OrderSerializer
+from api.serializers.room_serializers import RoomOperationSerializer
+from api.views.async_reads import AsyncOrderFeedView
+from api.views.export import _csv_chunks
+from api.views.order import OrderViewSet
+
+
+def make_booking(room, index, **kwargs):
+    check_in = datetime.date(2030, 1, 1) + datetime.timedelta(days=index * 3)
+    defaults = dict(
+        room=room,
+        guest_name=f"Guest {index}",
+        email=f"guest{index}@example.com",
+        contact_number="09170000000",
+        check_in=check_in,
+        check_out=check_in + datetime.timedelta(days=2),
+        adults=2,
+        children=0,
+        total_price=Decimal("3000.00"),
+        status=Booking.Status.CONFIRMED,
+    )
+    defaults.update(kwargs)
+    return Booking.objects.create(**defaults)
+
+
+class AdminQueryCountTests(TestCase):
+    """The admin pages must not issue one query per listed row."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = CustomUser.objects.create_superuser("admin", "admin@example.com", "password")
+        cls.room_types = [
+            RoomType.objects.create(name=f"Type {i}", price=Decimal("1500.00")) for i in range(3)
+        ]
+        cls.rooms = [
+            Room.objects.create(room_number=str(100 + i), room_type=cls.room_types[i % 3])
+            for i in range(6)
+        ]
+
+    def setUp(self):
+        self.client.force_login(self.admin_user)
+
+    def count_queries(self, url):
+        self.client.get(url)  # warm per-process caches (content types etc.)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def add_bookings(self, start, count):
+        for i in range(start, start + count):
+            booking = make_booking(self.rooms[i % len(self.rooms)], i, assigned_room=self.rooms[(i + 1) % len(self.rooms)])
+            Payment.objects.create(booking=booking, amount=Decimal("600.00"), payment_type=Payment.PaymentCategory.DOWNPAYMENT)
+
+    def test_booking_changelist_query_count_is_constant(self):
+        url = reverse("admin:api_booking_changelist")
+
+        self.add_bookings(0, 3)
+        few = self.count_queries(url)
+
+        self.add_bookings(3, 40)
+        many = self.count_queries(url)
+
+        self.assertEqual(few, many)
+        self.assertLessEqual(many, 15)
+
+    def test_room_change_page_query_count_is_constant(self):
+        room = self.rooms[0]
+        url = reverse("admin:api_room_change", args=[room.pk])
+
+        self.add_bookings(0, 6)
+        few = self.count_queries(url)
+
+        self.add_bookings(6, 120)
+        many = self.count_queries(url)
+
+        self.assertEqual(few, many)
+
+    def test_booking_change_page_caps_payments(self):
+        booking = make_booking(self.rooms[0], 0)
+        for _ in range(30):
+            Payment.objects.create(booking=booking, amount=Decimal("10.00"))
+
+        response = self.client.get(reverse("admin:api_booking_change", args=[booking.pk]))
+
+        self.assertEqual(response.status_code, 200)
+        formset = response.context["inline_admin_formsets"][0].formset
+        self.assertEqual(formset.initial_form_count(), 20)
+
+
+class SchemaCacheTests(SimpleTestCase):
+    """/api/schema/ serves the precomputed schema (api/openapi.py), which must match a live one."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.deployed_file = settings.API_SCHEMA_FILE
+        # The generator reports views it can't fully describe on stderr
+        with contextlib.redirect_stderr(io.StringIO()):
+            cls.live = {fmt: cls.live_body(fmt) for fmt in ("yaml", "json")}
+            cls.live_schema = openapi.generate()
+
+    @staticmethod
+    def live_body(fmt):
+        response = SpectacularAPIView.as_view()(RequestFactory().get("/api/schema/", {"format": fmt}))
+        return response.render().content
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.schema_file = Path(directory.name) / "openapi-schema.json"
+        settings_override = override_settings(API_SCHEMA_FILE=self.schema_file)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        openapi.clear()
+        self.addCleanup(openapi.clear)
+
+    def get_schema(self, fmt, **headers):
+        with contextlib.redirect_stderr(io.StringIO()):
+            return self.client.get(reverse("schema"), {"format": fmt}, headers=headers)
+
+    def test_deployed_schema_file_matches_live(self):
+        # The file generate_schema wrote for this code (if any) is what workers will serve
+        version, schema = openapi.read(self.deployed_file)
+        if version != openapi.code_version():
+            self.skipTest("No schema file for the current code version.")
+        self.assertEqual(schema, self.live_schema)
+
+    def test_generated_file_is_served_like_the_live_schema(self):
+        with contextlib.redirect_stderr(io.StringIO()):
+            call_command("generate_schema", file=self.schema_file, stdout=io.StringIO())
+        call_command("generate_schema", file=self.schema_file, check=True, stdout=io.StringIO())
+
+        for fmt, body in self.live.items():
+            response = self.get_schema(fmt)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.content, body)
+
+    def test_file_of_another_code_version_is_regenerated(self):
+        openapi.write({"openapi": "3.0.3", "paths": {}}, "an older version", self.schema_file)
+
+        self.assertEqual(self.get_schema("json").content, self.live["json"])
+        self.assertEqual(openapi.read(self.schema_file), (openapi.code_version(), json.loads(self.live["json"])))
+
+    def test_etag_gives_not_modified(self):
+        response = self.get_schema("yaml")
+        etag = response["ETag"]
+
+        self.assertEqual(self.get_schema("yaml", if_none_match=etag).status_code, 304)
+        # Another format is another body
+        self.assertEqual(self.get_schema("json", if_none_match=etag).status_code, 200)
+
+
+class ProjectionTests(TestCase):
+    """The list projections (api/projections.py) must give exactly the serializers' output."""
+
+    @classmethod
+    def setUpTestData(cls):
+        room_types = [RoomType.objects.create(name=f"Type {i}", price=Decimal("1500.00")) for i in range(2)]
+        rooms = [
+            Room.objects.create(room_number=str(100 + i), floor=1 + i % 2, room_type=room_types[i % 2], note="Leaky tap" if i == 1 else None)
+            for i in range(4)
+        ]
+        paid_at = timezone.now()
+
+        # No payments, no assigned room
+        make_booking(rooms[0], 0, total_price=Decimal("2999.50"))
+        # Downpayments (one with a receipt, the latest one without), additional fee
+        booking = make_booking(rooms[1], 1, assigned_room=rooms[1], additional_fee=[{"label": "Extra bed", "amount": 500}])
+        Payment.objects.create(
+            booking=booking, amount=Decimal("300.00"), payment_type=Payment.PaymentCategory.DOWNPAYMENT,
+            status=Payment.PaymentStatus.PAID, paid_at=paid_at, transaction_reference="GC1", receipt="payment_receipts/r1.jpg",
+        )
+        Payment.objects.create(booking=booking, amount=Decimal("300.25"), payment_type=Payment.PaymentCategory.DOWNPAYMENT)
+        # Checked in, remaining balance paid, latest payment with a receipt
+        booking = make_booking(
+            rooms[2], 2, assigned_room=rooms[2], status=Booking.Status.CHECKED_IN, children=1, extra_children=1,
+        )
+        Payment.objects.create(booking=booking, amount=Decimal("600.00"), payment_type=Payment.PaymentCategory.DOWNPAYMENT, status=Payment.PaymentStatus.PAID)
+        Payment.objects.create(
+            booking=booking, amount=Decimal("2400.00"), payment_type=Payment.PaymentCategory.REMAINING,
+            status=Payment.PaymentStatus.PAID, paid_at=paid_at, receipt="payment_receipts/r2.jpg",
+        )
+        # Checked in without an assigned room, remaining balance still pending
+        booking = make_booking(rooms[3], 3, status=Booking.Status.CHECKED_IN)
+        Payment.objects.create(booking=booking, amount=Decimal("2400.00"), payment_type=Payment.PaymentCategory.REMAINING)
+        # Checked out with the remaining balance paid
+        booking = make_booking(rooms[0], 4, assigned_room=rooms[3], status=Booking.Status.CHECKED_OUT)
+        Payment.objects.create(booking=booking, amount=Decimal("3000.00"), payment_type=Payment.PaymentCategory.REMAINING, status=Payment.PaymentStatus.PAID)
+
+        menus = [Menu.objects.create(name=f"Dish {i}", category="MAIN", price=Decimal("120.50") * (i + 1), stock=50) for i in range(2)]
+        orders = [
+            Order.objects.create(),
+            Order.objects.create(booking=booking, order_type=Order.OrderType.ROOM_SERVICE, total_amount=Decimal("602.50")),
+            Order.objects.create(order_status=Order.OrderStatus.SERVED),
+        ]
+        OrderItem.objects.create(order=orders[1], menu=menus[1], quantity=1)
+        OrderItem.objects.create(order=orders[1], menu=menus[0], quantity=3)
+        OrderItem.objects.create(order=orders[2], menu=menus[0], quantity=2)
+
+    def assertSameOutput(self, projected, serializer):
+        self.assertEqual(projected, serializer.data)
+        self.assertEqual(JSONRenderer().render(projected), JSONRenderer().render(serializer.data))
+
+    def test_bookings(self):
+        bookings = Booking.objects.select_related("room__room_type").prefetch_related("payments")
+        self.assertSameOutput(projections.bookings(bookings), BookingSerializer(bookings, many=True))
+
+    def test_orders(self):
+        orders = Order.objects.all().order_by("-created_at")
+        self.assertSameOutput(projections.orders(orders), OrderSerializer(orders, many=True))
+
+    def test_room_operations(self):
+        rooms = Room.objects.select_related("room_type").order_by("floor", "room_number")
+        self.assertSameOutput(projections.room_operations(rooms), RoomOperationSerializer(rooms, many=True))
+
+    def test_checked_in_bookings(self):
+        bookings = (
+            Booking.objects.filter(status=Booking.Status.CHECKED_IN)
+            .select_related("assigned_room", "assigned_room__room_type")
+            .order_by("assigned_room__room_number")
+        )
+        self.assertSameOutput(projections.checked_in_bookings(bookings), CheckedInBookingSerializer(bookings, many=True))
+
+    def test_query_count_does_not_grow_with_rows(self):
+        with self.assertNumQueries(2):
+            projections.bookings(Booking.objects.all())
+        with self.assertNumQueries(2):
+            projections.orders(Order.objects.all())
+
+
+class CSVImportTests(TestCase):
+    """Existing rows keep the values of columns that are missing or empty in the file (api/importers.py)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.room_type = RoomType.objects.create(name="Deluxe", price=Decimal("1500.00"))
+        cls.room = Room.objects.create(
+            room_number="101", room_type=cls.room_type, floor=3, status=Room.Status.OCCUPIED, note="VIP"
+        )
+        cls.menu = Menu.objects.create(name="Soup", category="MAIN", price=Decimal("80.00"), stock=40)
+
+    def import_text(self, kind, text):
+        return import_csv(kind, io.StringIO(text))
+
+    def test_empty_room_cells_leave_existing_values(self):
+        result = self.import_text("rooms", "room_number,room_type,floor,status,note\n101,Deluxe,,,\n102,Deluxe,2,,\n")
+
+        self.assertEqual((result.created, result.updated), (1, 1))
+        self.room.refresh_from_db()
+        self.assertEqual((self.room.floor, self.room.status, self.room.note), (3, Room.Status.OCCUPIED, "VIP"))
+        new_room = Room.objects.get(room_number="102")
+        self.assertEqual((new_room.floor, new_room.status), (2, Room.Status.AVAILABLE))
+
+    def test_missing_room_columns_leave_existing_values(self):
+        self.import_text("rooms", "room_number,room_type,status\n101,Deluxe,dirty\n")
+
+        self.room.refresh_from_db()
+        self.assertEqual((self.room.floor, self.room.status, self.room.note), (3, Room.Status.DIRTY, "VIP"))
+
+    def test_rows_with_different_cells_in_one_file(self):
+        self.import_text("rooms", "room_number,room_type,floor,note\n101,Deluxe,,Late checkout\n103,Deluxe,4,\n")
+
+        self.room.refresh_from_db()
+        self.assertEqual((self.room.floor, self.room.note), (3, "Late checkout"))
+        self.assertEqual(Room.objects.get(room_number="103").floor, 4)
+
+    def test_empty_menu_stock_leaves_stock_and_ledger_alone(self):
+        self.import_text("menu", "name,category,price,stock\nSoup,MAIN,99.00,\n")
+
+        self.menu.refresh_from_db()
+        self.assertEqual((self.menu.price, self.menu.stock), (Decimal("99.00"), 40))
+        self.assertFalse(StockMovement.objects.filter(menu=self.menu).exists())
+
+    def test_menu_stock_given_is_recorded_as_adjustment(self):
+        self.import_text("menu", "name,category,price,stock\nSoup,MAIN,80.00,45\n")
+
+        self.menu.refresh_from_db()
+        self.assertEqual(self.menu.stock, 45)
+        self.assertEqual(
+            list(StockMovement.objects.filter(menu=self.menu).values_list("kind", "quantity")),
+            [(StockMovement.Kind.ADJUSTMENT, 5)],
+        )
+
+
+class BucketStoreTests(SimpleTestCase):
+    """Token bucket arithmetic of both throttle stores (api/throttling.py)."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def assert_bucket_arithmetic(self, store):
+        capacity, refill = parse_rate("5/hour")  # a token every 720 s
+        takes = [store.take("booking:id:a", capacity, refill, 1000) for _ in range(6)]
+
+        # A burst of `capacity`, then a wait for the next token
+        self.assertEqual(takes[:5], [0] * 5)
+        self.assertAlmostEqual(takes[5], 720)
+        self.assertAlmostEqual(store.take("booking:id:a", capacity, refill, 1000 + 360), 360)
+        self.assertEqual(store.take("booking:id:a", capacity, refill, 1000 + 720), 0)
+        # Other keys have their own bucket
+        self.assertEqual(store.take("booking:id:b", capacity, refill, 1000 + 720), 0)
+
+    def test_local_store(self):
+        self.assert_bucket_arithmetic(LocalBucketStore())
+
+    def test_cache_store(self):
+        self.assert_bucket_arithmetic(CacheBucketStore())
+
+    def test_cache_store_caps_refill_at_capacity(self):
+        store = CacheBucketStore()
+        capacity, refill = parse_rate("2/min")
+        store.take("login:ip:x", capacity, refill, 1000)
+        # Idle for ten minutes: still only `capacity` tokens
+        takes = [store.take("login:ip:x", capacity, refill, 1600) for _ in range(3)]
+        self.assertEqual(takes[:2], [0, 0])
+        self.assertAlmostEqual(takes[2], 30)
+
+    def test_cache_store_concurrent_first_take_keeps_counter(self):
+        store = CacheBucketStore()
+        capacity, refill = parse_rate("5/hour")
+        store.take("booking:ip:y", capacity, refill, 1000)
+        # A second "first" request that missed the origin must not reset the taken counter
+        cache.delete("throttle:booking:ip:y:origin")
+        store.take("booking:ip:y", capacity, refill, 1000)
+        self.assertEqual(cache.get("throttle:booking:ip:y:taken"), 2)
+
+    def test_prune_uses_each_buckets_own_rate(self):
+        store = LocalBucketStore()
+        store.PRUNE_EVERY = 10
+        booking = parse_rate("5/hour")
+        for _ in range(6):
+            store.take("booking:id:a", *booking, 1000)
+
+        # Prunes triggered by a faster scope, a minute later
+        login = parse_rate("30/min")
+        for index in range(10):
+            store.take(f"login:ip:{index}", *login, 1060)
+
+        self.assertGreater(store.take("booking:id:a", *booking, 1060), 0)
+
+    def test_identity_of_non_object_body(self):
+        for body in ([{"email": "a@example.com"}], "a@example.com", 3):
+            request = APIRequestFactory().post("/api/bookings/", body, format="json")
+            self.assertIsNone(BookingThrottle().get_identity(Request(request, parsers=[JSONParser()])))
+
+
+class EchoView(APIView):
+    """Counts its runs. With "resend" in the body it sends the body again with the same key while still running
+    (or the body given in "resend_as")."""
+    authentication_classes = []
+    permission_classes = []
+    throttle_classes = []
+    runs = 0
+
+    @idempotent
+    def post(self, request):
+        type(self).runs += 1
+        response = Response({"run": type(self).runs, "data": request.data}, status=201)
+        if "resend" in request.data:
+            body = request.data.get("resend_as", request.data)
+            response.data["resent_status"] = post_with_key(body, request.headers["Idempotency-Key"]).status_code
+        return response
+
+
+def post_with_key(data, key, ip="10.0.0.1"):
+    request = APIRequestFactory().post("/echo/", data, format="json", HTTP_IDEMPOTENCY_KEY=key, REMOTE_ADDR=ip)
+    return EchoView.as_view()(request)
+
+
+@override_settings(IDEMPOTENCY_WAIT_SECONDS=0)
+class IdempotencyTests(TestCase):
+    """Idempotency-Key handling (api/idempotency.py)."""
+
+    def setUp(self):
+        EchoView.runs = 0
+
+    def test_retry_replays_first_response(self):
+        first = post_with_key({"guest": "A"}, "key-1")
+        retry = post_with_key({"guest": "A"}, "key-1")
+
+        self.assertEqual(EchoView.runs, 1)
+        self.assertEqual((retry.status_code, retry.data), (201, first.data))
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+
+    def test_same_key_with_different_body_is_rejected(self):
+        post_with_key({"guest": "A"}, "key-1")
+        response = post_with_key({"guest": "B"}, "key-1")
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(EchoView.runs, 1)
+
+    def test_anonymous_clients_do_not_share_keys(self):
+        post_with_key({"guest": "A"}, "key-1", ip="10.0.0.1")
+        other = post_with_key({"guest": "A"}, "key-1", ip="10.0.0.2")
+
+        self.assertEqual(EchoView.runs, 2)
+        self.assertFalse(other.has_header("Idempotent-Replayed"))
+
+    def test_request_in_flight(self):
+        # A retry while the first request is still running gets 409 (after IDEMPOTENCY_WAIT_SECONDS) ...
+        response = post_with_key({"resend": True}, "key-1")
+        self.assertEqual(response.data["resent_status"], 409)
+        # ... and a different request with the key 422, without waiting
+        response = post_with_key({"resend": True, "resend_as": {"guest": "B"}}, "key-2")
+        self.assertEqual(response.data["resent_status"], 422)
+        self.assertEqual(EchoView.runs, 2)
+
+
+class DeductStockTests(TestCase):
+    """Order stock deductions must not overwrite concurrent stock changes (Menu.deduct_stock)."""
+
+    def setUp(self):
+        self.menu = Menu.objects.create(name="Soup", category="MAIN", price=Decimal("80.00"), stock=10)
+        inventory.record_adjustments({self.menu.pk: (0, 10)}, note="Opening stock")
+
+    def test_restock_after_read_is_kept(self):
+        stale = Menu.objects.get(pk=self.menu.pk)  # as loaded by the order serializer
+        inventory.change_stock(self.menu.pk, StockMovement.Kind.RESTOCK, 5)
+
+        stale.deduct_stock(3)
+        inventory.record([StockMovement(menu=stale, kind=StockMovement.Kind.SALE, quantity=-3)])
+
+        self.assertEqual(stale.stock, 12)
+        self.menu.refresh_from_db()
+        self.assertEqual(self.menu.stock, 12)
+        self.assertEqual(inventory.reconcile(), [])
+
+    def test_insufficient_stock(self):
+        with self.assertRaises(ValidationError):
+            self.menu.deduct_stock(11)
+        self.menu.refresh_from_db()
+        self.assertEqual(self.menu.stock, 10)
+
+    def test_sold_out_is_unavailable(self):
+        self.menu.deduct_stock(10)
+
+        self.menu.refresh_from_db()
+        self.assertEqual((self.menu.stock, self.menu.is_available), (0, False))
+
+
+class MenuSalesAggregationTests(TestCase):
+    """The checkpoint must not pass items that may belong to uncommitted transactions (api/menu_sales.py)."""
+
+    def setUp(self):
+        menu = Menu.objects.create(name="Soup", category="MAIN", price=Decimal("80.00"), stock=100)
+        order = Order.objects.create()
+        self.items = [OrderItem.objects.create(order=order, menu=menu, quantity=quantity) for quantity in (1, 2, 4)]
+
+    def age(self, item, seconds):
+        OrderItem.objects.filter(pk=item.pk).update(created_at=timezone.now() - datetime.timedelta(seconds=seconds))
+
+    def sold(self):
+        return sum(MenuSalesStats.objects.values_list("quantity", flat=True))
+
+    @override_settings(MENU_SALES_SAFETY_LAG_SECONDS=60)
+    def test_stops_at_first_recent_item(self):
+        # The middle item is recent (its transaction may not be visible everywhere yet), the others settled
+        self.age(self.items[0], 120)
+        self.age(self.items[2], 120)
+
+        self.assertEqual(menu_sales.aggregate_new_order_items(), 1)
+        self.assertEqual(self.sold(), 1)
+
+        self.age(self.items[1], 120)
+        self.assertEqual(menu_sales.aggregate_new_order_items(), 2)
+        self.assertEqual(self.sold(), 7)
+
+
+class KitchenFeedTests(TestCase):
+    """Feed sequence numbers are taken after commit; the ASGI feed long-polls (api/kitchen_feed.py)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cook = CustomUser.objects.create_user("cook", password="password", role=CustomUser.Role.RESTUARANT)
+
+    def setUp(self):
+        self.auth = f"Bearer {CustomTokenObtainPairSerializer.get_token(self.cook).access_token}"
+
+    def test_sequence_is_taken_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.create()
+            # Nothing locked or numbered while the order's transaction is open
+            self.assertEqual(kitchen_feed.current_seq(), 0)
+
+        order.refresh_from_db()
+        self.assertEqual(order.feed_seq, kitchen_feed.current_seq())
+        self.assertEqual(kitchen_feed.changes_since(0), (order.feed_seq, [order]))
+
+    @override_settings(ASYNC_READ_VIEWS=True)
+    async def test_async_feed(self):
+        response = await self.async_client.get("/api/order/feed/", headers={"Authorization": self.auth})
+        self.assertEqual(response.json(), {"cursor": 0, "full": True, "orders": []})
+
+        # Nothing new: answers when the wait runs out
+        response = await self.async_client.get("/api/order/feed/", {"since": 0, "wait": 1}, headers={"Authorization": self.auth})
+        self.assertEqual(response.json(), {"cursor": 0, "full": False, "orders": []})
+
+        order = await sync_to_async(self.create_order)()
+        response = await self.async_client.get("/api/order/feed/", {"since": 0, "wait": 1}, headers={"Authorization": self.auth})
+        data = response.json()
+        self.assertEqual((data["cursor"], [row["id"] for row in data["orders"]]), (1, [order.pk]))
+
+    def create_order(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Order.objects.create()
+
+    async def test_async_views_are_opt_in(self):
+        response = await self.async_client.get("/api/order/feed/", headers={"Authorization": self.auth})
+        self.assertEqual((response.status_code, response.resolver_match.func.cls), (200, OrderViewSet))
+
+        # The middleware is chosen when a client's handler loads it
+        with override_settings(ASYNC_READ_VIEWS=True):
+            response = await self.async_client_class().get("/api/order/feed/", headers={"Authorization": self.auth})
+        self.assertEqual((response.status_code, response.resolver_match.func.view_class), (200, AsyncOrderFeedView))
+
+
+class GroupBookingMailTests(TestCase):
+    """The group booking confirmation is mailed only once the bookings are committed."""
+
+    @classmethod
+    def setUpTestData(cls):
+        room_type = RoomType.objects.create(name="Deluxe", price=Decimal("1500.00"))
+        for number in ("101", "102"):
+            Room.objects.create(room_number=number, room_type=room_type)
+        cls.room_type = room_type
+
+    def test_mail_is_sent_after_commit(self):
+        stay = {"room_type_id": self.room_type.pk, "check_in": "2030-01-01", "check_out": "2030-01-03", "adults": 2, "children": 0}
+        payload = {
+            "guest_name": "Tour Group",
+            "email": "group@example.com",
+            "contact_number": "09170000000",
+            "gcash_reference": "GC1",
+            "rooms": [stay, stay],
+        }
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post("/api/bookings/group/", payload, content_type="application/json")
+            self.assertEqual(response.status_code, 201, response.content)
+            self.assertEqual(mail.outbox, [])
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual([message.to for message in mail.outbox], [["group@example.com"]])
+
+
+
+class PricingTests(TestCase):
+    """Quotes from the rate calendar and extra person fees (api/pricing.py)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.deluxe = RoomType.objects.create(
+            name="Deluxe", price=Decimal("1000.00"), max_adults=2, max_children=1,
+            extra_adult_fee=Decimal("200.00"), extra_child_fee=Decimal("100.00"),
+        )
+        cls.suite = RoomType.objects.create(name="Suite", price=Decimal("2500.00"))
+        Room.objects.create(room_number="101", room_type=cls.deluxe)
+        # Saturday rate; the other nights use the room type's price and fees
+        RoomRate.objects.create(
+            room_type=cls.deluxe, date=datetime.date(2030, 1, 5), price=Decimal("1500.00"),
+            extra_adult_fee=Decimal("300.00"), extra_child_fee=Decimal("150.00"),
+        )
+        RoomRate.objects.create(room_type=cls.deluxe, date=datetime.date(2030, 1, 20), price=Decimal("9999.00"))
+
+    def test_rate_calendar(self):
+        quote = quote_stay(self.deluxe.pk, datetime.date(2030, 1, 4), datetime.date(2030, 1, 7), 2, 0)
+        self.assertEqual((quote.nights, quote.base_price, quote.extra_cost), (3, Decimal("3500.00"), Decimal("0.00")))
+        # Without a rate row: the flat price
+        quote = quote_stay(self.deluxe.pk, datetime.date(2030, 1, 6), datetime.date(2030, 1, 8), 2, 1)
+        self.assertEqual(quote.total_price, Decimal("2000.00"))
+
+    def test_extra_person_fees(self):
+        # Two adults and one child over the limits, per night, at that night's fees
+        quote = quote_stay(self.deluxe.pk, datetime.date(2030, 1, 4), datetime.date(2030, 1, 7), 4, 2)
+        self.assertEqual(quote.extra_cost, 2 * Decimal("700.00") + Decimal("350.00"))
+        self.assertEqual(quote.total_price, Decimal("3500.00") + quote.extra_cost)
+
+    def test_refused_stays(self):
+        start = datetime.date(2030, 1, 1)
+        with self.assertRaises(QuoteError):
+            quote_stay(self.deluxe.pk, start, start + datetime.timedelta(days=MAX_SPAN_DAYS + 1), 2, 0)
+        with self.assertRaises(QuoteError):
+            quote_stays([
+                StayRequest(self.deluxe.pk, start, start + datetime.timedelta(days=2), 2, 0),
+                StayRequest(self.suite.pk, start + datetime.timedelta(days=MAX_SPAN_DAYS), start + datetime.timedelta(days=MAX_SPAN_DAYS + 2), 2, 0),
+            ])
+        with self.assertRaises(QuoteError):
+            quote_stay(0, start, start + datetime.timedelta(days=2), 2, 0)
+        with self.assertRaises(QuoteError):
+            quote_stay(self.deluxe.pk, start, start, 2, 0)
+
+    def test_group_quote_matches_single_quotes(self):
+        stays = [
+            StayRequest(self.deluxe.pk, datetime.date(2030, 1, 1), datetime.date(2030, 1, 6), 3, 0),
+            StayRequest(self.suite.pk, datetime.date(2030, 1, 3), datetime.date(2030, 1, 4), 1, 0),
+            StayRequest(self.deluxe.pk, datetime.date(2030, 1, 5), datetime.date(2030, 1, 21), 2, 2),
+            StayRequest(self.deluxe.pk, datetime.date(2030, 1, 21), datetime.date(2030, 1, 22), 2, 0),
+        ]
+        with self.assertNumQueries(1):
+            quotes = quote_stays(stays)
+        self.assertEqual(quotes, [quote_stay(*stay) for stay in stays])
+
+    def test_refused_stays_are_bad_requests(self):
+        long_stay = {"check_in": "2030-01-01", "check_out": (datetime.date(2030, 1, 1) + datetime.timedelta(days=MAX_SPAN_DAYS + 1)).isoformat()}
+        response = self.client.post("/api/bookings/", {
+            "guest_name": "Ana", "email": "ana@example.com", "contact_number": "09170000000",
+            "room_type_id": self.deluxe.pk, "adults": 2, "children": 0, "gcash_reference": "GC1", **long_stay,
+        })
+        self.assertEqual(response.status_code, 400)
+
+        stay = {"room_type_id": self.deluxe.pk, "check_in": "2030-01-01", "check_out": "2030-01-03", "adults": 2, "children": 0}
+        far = datetime.date(2030, 1, 1) + datetime.timedelta(days=MAX_SPAN_DAYS)
+        far_stay = {"check_in": far.isoformat(), "check_out": (far + datetime.timedelta(days=2)).isoformat()}
+        response = self.client.post("/api/bookings/group/", {
+            "guest_name": "Tour Group", "email": "group@example.com", "contact_number": "09170000000", "gcash_reference": "GC1",
+            "rooms": [stay, {**stay, **far_stay}],
+        }, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Booking.objects.exists())
+
+
+
+class AvailabilityIndexTests(TestCase):
+    """The in-process availability index answers like the SQL overlap query (api/availability.py)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.deluxe = RoomType.objects.create(name="Deluxe", price=Decimal("1500.00"))
+        cls.suite = RoomType.objects.create(name="Suite", price=Decimal("2500.00"))
+        cls.rooms = [Room.objects.create(room_number=str(101 + i), room_type=cls.deluxe) for i in range(3)]
+        cls.suite_room = Room.objects.create(room_number="201", room_type=cls.suite)
+        make_booking(cls.rooms[0], 0)
+
+    def setUp(self):
+        availability.invalidate()
+        self.addCleanup(availability.invalidate)
+
+    def sql_available(self, room_type, check_in, check_out):
+        taken = Booking.objects.filter(
+            status__in=availability.ACTIVE_STATUSES, check_in__lt=check_out, check_out__gt=check_in,
+        ).values("room_id")
+        return list(
+            Room.objects.filter(room_type=room_type, status=Room.Status.AVAILABLE)
+            .exclude(pk__in=taken).order_by("pk").values_list("pk", flat=True)
+        )
+
+    def assertAgreesWithDatabase(self):
+        start = datetime.date(2029, 12, 30)
+        for room_type in (self.deluxe, self.suite):
+            for offset in range(0, 12):
+                for nights in (1, 2, 5):
+                    check_in = start + datetime.timedelta(days=offset)
+                    check_out = check_in + datetime.timedelta(days=nights)
+                    with self.subTest(room_type=room_type.name, check_in=check_in, nights=nights):
+                        self.assertEqual(
+                            [room["id"] for room in availability.available_rooms(room_type.pk, check_in, check_out)],
+                            self.sql_available(room_type, check_in, check_out),
+                        )
+
+    def save(self, booking, **changes):
+        for field, value in changes.items():
+            setattr(booking, field, value)
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.save()
+        return booking
+
+    def test_follows_booking_changes(self):
+        self.assertAgreesWithDatabase()
+        published = availability.get_index(self.deluxe.pk)
+        state = (published.version, dict(published.intervals), dict(published.booking_rooms))
+
+        # Create: patched after commit, not reloaded
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = make_booking(self.rooms[1], 1)
+        patched = availability._indexes[self.deluxe.pk]
+        self.assertIsNot(patched, published)
+        self.assertEqual(patched.version, published.version + 1)
+        # The index other threads may still hold is left alone
+        self.assertEqual((published.version, published.intervals, published.booking_rooms), state)
+        self.assertAgreesWithDatabase()
+
+        # Room change, also to another room type
+        self.save(booking, room=self.rooms[2])
+        self.assertAgreesWithDatabase()
+        self.save(booking, room=self.suite_room)
+        self.assertAgreesWithDatabase()
+        self.assertIs(availability.get_index(self.suite.pk), availability._indexes[self.suite.pk])
+
+        # Dates and cancellation
+        self.save(booking, room=self.rooms[1], check_in=datetime.date(2030, 1, 2), check_out=datetime.date(2030, 1, 8))
+        self.assertAgreesWithDatabase()
+        self.save(booking, status=Booking.Status.CANCELLED)
+        self.assertAgreesWithDatabase()
+        self.assertNotIn(booking.pk, availability._indexes[self.deluxe.pk].booking_rooms)
+
+    def test_reloads_after_version_bump(self):
+        self.assertAgreesWithDatabase()
+        published = availability.get_index(self.deluxe.pk)
+
+        # Another worker's write: no signals here, only the version row moves
+        room_id = self.rooms[2].pk
+        Booking.objects.bulk_create([Booking(
+            id="BKG-TEST-0001", room_id=room_id, guest_name="Other", email="other@example.com", contact_number="0917",
+            check_in=datetime.date(2030, 1, 3), check_out=datetime.date(2030, 1, 5), adults=2, children=0,
+            total_price=Decimal("3000.00"), status=Booking.Status.CONFIRMED,
+        )])
+        Room.objects.filter(pk=self.rooms[1].pk).update(status=Room.Status.MAINTENANCE)
+        self.assertIs(availability.get_index(self.deluxe.pk), published)
+        AvailabilityVersion.objects.filter(room_type=self.deluxe).update(version=F("version") + 1)
+
+        self.assertAgreesWithDatabase()
+        self.assertIsNot(availability.get_index(self.deluxe.pk), published)
+
+
+
+class ClaimsAuthenticationTests(TestCase):
+    """JWTs are authenticated from their claims and a per-worker cache of user state (api/authentication.py)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            "desk", email="desk@example.com", password="password", role=CustomUser.Role.FRONT_DESK,
+        )
+
+    def setUp(self):
+        invalidate_user_state()
+        self.addCleanup(invalidate_user_state)
+        self.refresh = CustomTokenObtainPairSerializer.get_token(self.user)
+
+    def authenticate(self, token):
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        return ClaimsJWTAuthentication().authenticate(request)
+
+    def test_token_claims(self):
+        access = self.refresh.access_token
+        self.assertEqual(
+            {claim: access[claim] for claim in ("role", "username", "email", "is_staff", "is_superuser", "role_version")},
+            {"role": "front_desk", "username": "desk", "email": "desk@example.com", "is_staff": False, "is_superuser": False, "role_version": 0},
+        )
+
+        with self.assertNumQueries(1):
+            user, _ = self.authenticate(access)
+        # The user state is cached: no query at all
+        with self.assertNumQueries(0):
+            user, _ = self.authenticate(access)
+        self.assertIsInstance(user, ClaimsUser)
+        self.assertEqual((user.id, user.username, user.role, user.email), (str(self.user.pk), "desk", "front_desk", "desk@example.com"))
+
+    def test_deactivated_user_is_refused(self):
+        access = self.refresh.access_token
+        self.authenticate(access)
+
+        # Saved on this worker: refused at once
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaisesMessage(AuthenticationFailed, "User is inactive"):
+            self.authenticate(access)
+
+    def test_deactivated_user_is_refused_after_ttl(self):
+        access = self.refresh.access_token
+        self.authenticate(access)
+
+        # Changed by another worker (no signal here): the cached state holds until it expires
+        CustomUser.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.authenticate(access)
+        with override_settings(JWT_USER_STATE_TTL=0):
+            invalidate_user_state()
+            with self.assertRaisesMessage(AuthenticationFailed, "User is inactive"):
+                self.authenticate(access)
+            response = self.client.post("/api/token/refresh/", {"refresh": str(self.refresh)}, content_type="application/json")
+            self.assertEqual(response.status_code, 401)
+
+    def test_stale_role_version_is_refused(self):
+        access = self.refresh.access_token
+        self.user.role = CustomUser.Role.HOUSEKEEPING
+        self.user.save()
+
+        with self.assertRaises(AuthenticationFailed) as raised:
+            self.authenticate(access)
+        self.assertEqual(raised.exception.get_codes(), "token_outdated")
+        response = self.client.get("/api/housekeeping-tasks/", headers={"Authorization": f"Bearer {access}"})
+        self.assertEqual(response.status_code, 401)
+
+        # A refreshed token carries the new role and works again
+        response = self.client.post("/api/token/refresh/", {"refresh": str(self.refresh)}, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["role"], "housekeeping")
+        access = AccessToken(response.json()["access"])
+        self.assertEqual((access["role"], access["role_version"]), ("housekeeping", 1))
+        self.assertEqual(self.authenticate(access)[0].role, "housekeeping")
+
+    def test_refresh(self):
+        response = self.client.post("/api/token/refresh/", {"refresh": str(self.refresh)}, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(
+            (data.keys(), data["role"], data["username"], data["email"]),
+            ({"access", "role", "username", "email"}, "front_desk", "desk", "desk@example.com"),
+        )
+        self.assertEqual(AccessToken(data["access"])["user_id"], str(self.user.pk))
+
+    def test_refresh_rotation(self):
+        # simplejwt's modules hold on to the settings object, so override_settings() doesn't reach them
+        with mock.patch.object(jwt_settings, "ROTATE_REFRESH_TOKENS", True), mock.patch.object(jwt_settings, "BLACKLIST_AFTER_ROTATION", True):
+            response = self.client.post("/api/token/refresh/", {"refresh": str(self.refresh)}, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        rotated = RefreshToken(response.json()["refresh"])
+        self.assertNotEqual(rotated["jti"], self.refresh["jti"])
+        self.assertEqual(rotated["user_id"], str(self.user.pk))
+
+        # The blacklist app is not installed, so the old refresh token stays valid, as with simplejwt's serializer
+        response = self.client.post("/api/token/refresh/", {"refresh": str(self.refresh)}, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("refresh", response.json())
+
+        response = self.client.post("/api/token/refresh/", {"refresh": "not-a-token"}, content_type="application/json")
+        self.assertEqual(response.status_code, 401)
+
+
+
+class RoleView(APIView):
+    permission_classes = [HasRole]
+
+    def get(self, request):
+        return Response({})
+
+    def post(self, request):
+        return Response({})
+
+
+class RoleViewSet(ViewSet):
+    permission_classes = [HasRole]
+    allowed_roles = {
+        "list": (FRONT_DESK, HOUSEKEEPING),
+        "create": (RESTAURANT,),
+        "*": (FRONT_DESK,),
+    }
+
+    def list(self, request):
+        return Response([])
+
+    def create(self, request):
+        return Response({})
+
+    def retrieve(self, request, pk=None):
+        return Response({})
+
+    def destroy(self, request, pk=None):
+        return Response({})
+
+
+class HasRoleTests(TestCase):
+    """Who may use a view per its allowed_roles (api/permissions.py)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = {
+            role: CustomUser.objects.create_user(str(role), role=role)
+            for role in (CustomUser.Role.FRONT_DESK, CustomUser.Role.HOUSEKEEPING, CustomUser.Role.RESTUARANT, CustomUser.Role.ADMIN)
+        }
+        cls.users["superuser"] = CustomUser.objects.create_superuser("root", "root@example.com", None, role=CustomUser.Role.HOUSEKEEPING)
+
+    def allowed(self, view, method, user=None, pk=None, **attrs):
+        """Whether `user` (a key of self.users, None: anonymous) gets a 200."""
+        request = getattr(APIRequestFactory(), method)("/")
+        if user is not None:
+            force_authenticate(request, user=self.users[user])
+        response = view(request, **({"pk": pk} if pk else {}))
+        return response.status_code == 200
+
+    def assertAllowed(self, view, method, expected, **kwargs):
+        users = [None, *self.users]
+        self.assertEqual(
+            {user for user in users if self.allowed(view, method, user, **kwargs)},
+            set(expected),
+            f"{method.upper()} {kwargs}",
+        )
+
+    def view(self, allowed_roles):
+        return type("RoleView", (RoleView,), {"allowed_roles": allowed_roles}).as_view()
+
+    def test_default_is_admin_only(self):
+        self.assertAllowed(RoleView.as_view(), "get", {CustomUser.Role.ADMIN, "superuser"})
+
+    def test_tuple(self):
+        view = self.view((FRONT_DESK, HOUSEKEEPING))
+        for method in ("get", "post"):
+            self.assertAllowed(view, method, {CustomUser.Role.FRONT_DESK, CustomUser.Role.HOUSEKEEPING, CustomUser.Role.ADMIN, "superuser"})
+
+    def test_per_method_and_public(self):
+        view = self.view({"get": PUBLIC, "post": (RESTAURANT,)})
+        self.assertAllowed(view, "get", {None, *self.users})
+        self.assertAllowed(view, "head", {None, *self.users})
+        self.assertAllowed(view, "post", {CustomUser.Role.RESTUARANT, CustomUser.Role.ADMIN, "superuser"})
+        # Methods not listed and no "*": admins only
+        self.assertAllowed(self.view({"post": (RESTAURANT,)}), "get", {CustomUser.Role.ADMIN, "superuser"})
+
+    def test_per_action(self):
+        admins = {CustomUser.Role.ADMIN, "superuser"}
+        routes = {"get": "list", "post": "create"}
+        self.assertAllowed(RoleViewSet.as_view(routes), "get", {CustomUser.Role.FRONT_DESK, CustomUser.Role.HOUSEKEEPING, *admins})
+        self.assertAllowed(RoleViewSet.as_view(routes), "post", {CustomUser.Role.RESTUARANT, *admins})
+
+        # Actions missing from the dict fall back to "*"
+        detail = RoleViewSet.as_view({"get": "retrieve", "delete": "destroy"})
+        self.assertAllowed(detail, "get", {CustomUser.Role.FRONT_DESK, *admins}, pk=1)
+        self.assertAllowed(detail, "delete", {CustomUser.Role.FRONT_DESK, *admins}, pk=1)
+
+        # ... and without "*" to admins only
+        detail = type("RoleViewSet", (RoleViewSet,), {"allowed_roles": {"list": PUBLIC}}).as_view({"get": "retrieve"})
+        self.assertAllowed(detail, "get", admins, pk=1)
+
+    def test_claims_user_costs_no_query(self):
+        token = CustomTokenObtainPairSerializer.get_token(self.users[CustomUser.Role.FRONT_DESK]).access_token
+        request = APIRequestFactory().get("/")
+        request.user = ClaimsUser(token)
+        view = RoleViewSet()
+        view.action = "list"
+        with self.assertNumQueries(0):
+            self.assertTrue(HasRole().has_permission(request, view))
+            view.action = "create"
+            self.assertFalse(HasRole().has_permission(request, view))
+
+
+
+class RollupTests(TestCase):
+    """Bookings and room inventory flow into the daily rollups and the KPI endpoint (api/rollups.py)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user("manager", role=CustomUser.Role.ADMIN)
+        cls.deluxe = RoomType.objects.create(name="Deluxe", price=Decimal("1500.00"))
+        cls.suite = RoomType.objects.create(name="Suite", price=Decimal("2500.00"))
+        cls.rooms = [Room.objects.create(room_number=str(101 + i), room_type=cls.deluxe) for i in range(2)]
+        cls.suite_room = Room.objects.create(room_number="201", room_type=cls.suite)
+
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.auth = f"Bearer {CustomTokenObtainPairSerializer.get_token(self.admin).access_token}"
+
+    def day(self, offset):
+        return self.today + datetime.timedelta(days=offset)
+
+    def rows(self, room_type):
+        return list(
+            DailyRoomTypeStats.objects.filter(room_type=room_type).order_by("date")
+            .values_list("date", "rooms_available", "rooms_sold", "room_revenue")
+        )
+
+    def kpis(self, start, end):
+        response = self.client.get(
+            "/api/analytics/kpis/", {"start": start.isoformat(), "end": end.isoformat()}, headers={"Authorization": self.auth},
+        )
+        self.assertEqual(response.status_code, 200)
+        return {row["room_type"]: row for row in response.json()["room_types"]}
+
+    def book(self, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return make_booking(self.rooms[0], 0, check_in=self.day(10), check_out=self.day(12), **kwargs)
+
+    def save(self, instance, **changes):
+        for field, value in changes.items():
+            setattr(instance, field, value)
+        with self.captureOnCommitCallbacks(execute=True):
+            instance.save()
+
+    def test_booking_to_kpis(self):
+        booking = self.book()
+        self.assertEqual(self.rows(self.deluxe), [
+            (self.day(10), 2, 1, Decimal("1500.00")),
+            (self.day(11), 2, 1, Decimal("1500.00")),
+        ])
+
+        kpis = self.kpis(self.day(10), self.day(11))
+        self.assertEqual(
+            {key: kpis["Deluxe"][key] for key in ("room_nights_available", "room_nights_sold", "occupancy_rate", "adr", "revpar", "room_revenue")},
+            {"room_nights_available": 4, "room_nights_sold": 2, "occupancy_rate": 0.5, "adr": 1500.0, "revpar": 750.0, "room_revenue": 3000.0},
+        )
+        # No rows yet for the suite: upcoming days count its current inventory
+        self.assertEqual((kpis["Suite"]["room_nights_available"], kpis["Suite"]["room_nights_sold"]), (2, 0))
+
+        # Room change: the nights move to the other room type
+        self.save(booking, room=self.suite_room)
+        self.assertEqual([row[2] for row in self.rows(self.deluxe)], [0, 0])
+        self.assertEqual([row[1:] for row in self.rows(self.suite)], [(1, 1, Decimal("1500.00"))] * 2)
+
+        # Cancellation: nothing sold
+        self.save(booking, status=Booking.Status.CANCELLED)
+        self.assertEqual([row[1:] for row in self.rows(self.suite)], [(1, 0, Decimal("0.00"))] * 2)
+        kpis = self.kpis(self.day(10), self.day(11))
+        self.assertEqual((kpis["Suite"]["room_nights_sold"], kpis["Suite"]["room_revenue"]), (0, 0.0))
+
+    def test_inventory_changes(self):
+        self.book()
+        # Recorded for a day already past
+        DailyRoomTypeStats.objects.create(room_type=self.deluxe, date=self.day(-1), rooms_available=2)
+
+        # A new room counts from today on
+        with self.captureOnCommitCallbacks(execute=True):
+            room = Room.objects.create(room_number="103", room_type=self.deluxe)
+        self.assertEqual([row[1] for row in self.rows(self.deluxe)], [2, 3, 3])
+
+        # Re-computing the past day keeps its count
+        with self.captureOnCommitCallbacks(execute=True):
+            make_booking(self.rooms[1], 1, check_in=self.day(-2), check_out=self.day(0))
+        self.assertEqual(self.rows(self.deluxe)[1][:3], (self.day(-1), 2, 1))
+
+        # Out of service and back; maintenance keeps the room in the inventory
+        self.save(room, status=Room.Status.OUT_OF_SERVICE)
+        self.assertEqual([row[1] for row in self.rows(self.deluxe) if row[0] >= self.today], [2, 2])
+        self.save(room, status=Room.Status.MAINTENANCE)
+        self.assertEqual([row[1] for row in self.rows(self.deluxe) if row[0] >= self.today], [3, 3])
+
+        # Moved to another room type
+        self.save(room, room_type=self.suite)
+        self.assertEqual([row[1] for row in self.rows(self.deluxe) if row[0] >= self.today], [2, 2])
+        rollups.refresh_for_bookings([(self.suite.pk, self.today, self.day(1))])
+        self.assertEqual(self.rows(self.suite)[0][1], 2)
+
+        # Bulk room operations (no signals)
+        housekeeper = CustomUser.objects.create_user("hk", role=CustomUser.Role.HOUSEKEEPING)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                "/api/room-operations/bulk/", {"changes": [{"room_id": self.rooms[1].pk, "status": Room.Status.OUT_OF_SERVICE}]},
+                content_type="application/json",
+                headers={"Authorization": f"Bearer {CustomTokenObtainPairSerializer.get_token(housekeeper).access_token}"},
+            )
+        self.assertEqual(response.json()["updated"], 1)
+        self.assertEqual([row[1] for row in self.rows(self.deluxe) if row[0] >= self.today], [1, 1])
+
+    def test_night_audit_records_the_closed_day(self):
+        # No row recorded for a past day: no inventory counted
+        self.assertEqual(self.kpis(self.day(-1), self.day(-1))["Deluxe"]["room_nights_available"], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            night_audit.run(self.day(-1))
+        self.assertEqual(self.rows(self.deluxe), [(self.day(-1), 2, 0, Decimal("0.00"))])
+        self.assertEqual(self.rows(self.suite), [(self.day(-1), 1, 0, Decimal("0.00"))])
+        self.assertEqual(self.kpis(self.day(-1), self.day(-1))["Deluxe"]["room_nights_available"], 2)
+
+
+
+class NightAuditTests(TestCase):
+    """Closing a business date (api/night_audit.py)."""
+
+    day = datetime.date(2030, 1, 10)
+
+    @classmethod
+    def setUpTestData(cls):
+        room_type = RoomType.objects.create(name="Deluxe", price=Decimal("1500.00"))
+        cls.rooms = [Room.objects.create(room_number=str(101 + i), room_type=room_type) for i in range(2)]
+
+    def booking(self, index, status, check_in, nights=2, **kwargs):
+        return make_booking(
+            self.rooms[index % 2], index, status=status,
+            check_in=check_in, check_out=check_in + datetime.timedelta(days=nights), **kwargs,
+        )
+
+    def downpayment(self, booking, status):
+        return Payment.objects.create(
+            booking=booking, amount=Decimal("600.00"), payment_type=Payment.PaymentCategory.DOWNPAYMENT, status=status,
+        )
+
+    def statuses(self, *bookings):
+        return [Booking.objects.get(pk=booking.pk).status for booking in bookings]
+
+    def test_expires_stale_pending_bookings(self):
+        later = self.day + datetime.timedelta(days=20)
+        due = self.booking(0, Booking.Status.PENDING, self.day)
+        due_payment = self.downpayment(due, Payment.PaymentStatus.PENDING)
+        old = self.booking(1, Booking.Status.PENDING, later)
+        Booking.objects.filter(pk=old.pk).update(
+            created_at=timezone.now() - datetime.timedelta(hours=settings.PENDING_BOOKING_TTL_HOURS + 1)
+        )
+        fresh = self.booking(2, Booking.Status.PENDING, later + datetime.timedelta(days=5))
+        paid = self.booking(3, Booking.Status.PENDING, self.day - datetime.timedelta(days=1))
+        self.downpayment(paid, Payment.PaymentStatus.PAID)
+
+        audit = night_audit.run(self.day)
+
+        self.assertEqual(audit.expired, 2)
+        self.assertEqual(
+            self.statuses(due, old, fresh, paid),
+            [Booking.Status.EXPIRED, Booking.Status.EXPIRED, Booking.Status.PENDING, Booking.Status.PENDING],
+        )
+        due_payment.refresh_from_db()
+        self.assertEqual(due_payment.status, Payment.PaymentStatus.FAILED)
+
+    def test_marks_no_shows(self):
+        missed = self.booking(0, Booking.Status.CONFIRMED, self.day - datetime.timedelta(days=1))
+        tonight = self.booking(1, Booking.Status.CONFIRMED, self.day)
+        tomorrow = self.booking(2, Booking.Status.CONFIRMED, self.day + datetime.timedelta(days=1))
+        arrived = self.booking(3, Booking.Status.CHECKED_IN, self.day)
+
+        audit = night_audit.run(self.day)
+
+        self.assertEqual(audit.no_shows, 2)
+        self.assertEqual(
+            self.statuses(missed, tonight, tomorrow, arrived),
+            [Booking.Status.NO_SHOW, Booking.Status.NO_SHOW, Booking.Status.CONFIRMED, Booking.Status.CHECKED_IN],
+        )
+
+    def test_posts_room_charges(self):
+        staying = self.booking(
+            0, Booking.Status.CHECKED_IN, self.day - datetime.timedelta(days=1), nights=3, assigned_room=self.rooms[0],
+        )
+        # Due out today: no night to post, counted as an overstay
+        self.booking(1, Booking.Status.CHECKED_IN, self.day - datetime.timedelta(days=2))
+        self.booking(2, Booking.Status.CHECKED_OUT, self.day - datetime.timedelta(days=1), nights=3)
+
+        audit = night_audit.run(self.day)
+
+        self.assertEqual(
+            list(RoomCharge.objects.values_list("booking_id", "room_id", "date", "amount")),
+            [(staying.pk, self.rooms[0].pk, self.day, Decimal("1000.00"))],
+        )
+        self.assertEqual(
+            (audit.in_house, audit.overstays, audit.room_charges, audit.room_revenue),
+            (1, 1, 1, Decimal("1000.00")),
+        )
+        self.assertEqual(night_audit.business_date(), self.day + datetime.timedelta(days=1))
+
+    def test_rerun_changes_nothing(self):
+        self.booking(0, Booking.Status.CHECKED_IN, self.day - datetime.timedelta(days=1), nights=3, assigned_room=self.rooms[0])
+        self.booking(1, Booking.Status.CONFIRMED, self.day)
+        self.booking(2, Booking.Status.PENDING, self.day)
+        first = night_audit.run(self.day)
+        bookings = list(Booking.objects.order_by("pk").values_list("pk", "status", "version"))
+
+        second = night_audit.run(self.day)
+
+        self.assertEqual(list(Booking.objects.order_by("pk").values_list("pk", "status", "version")), bookings)
+        self.assertEqual(RoomCharge.objects.count(), 1)
+        self.assertEqual(NightAuditRun.objects.count(), 1)
+        self.assertEqual(second.pk, first.pk)
+        self.assertEqual(
+            (second.expired, second.no_shows, second.room_charges, second.room_revenue),
+            (1, 1, 1, Decimal("1000.00")),
+        )
+
+
+
+@skipUnless(connection.vendor == "sqlite", "Exercises the SQLite FTS5 index of migration 0020")
+class BookingSearchTests(TestCase):
+    """Guest search through the search documents and their FTS5 index (api/search.py)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = CustomUser.objects.create_superuser("admin", "admin@example.com", "password")
+        room_type = RoomType.objects.create(name="Deluxe", price=Decimal("1500.00"))
+        cls.room = Room.objects.create(room_number="101", room_type=room_type)
+        cls.jane = make_booking(
+            cls.room, 0, guest_name="Jane Cruz", email="jane.cruz@example.com", contact_number="0917 123 4567",
+        )
+        cls.john = make_booking(
+            cls.room, 1, guest_name="John Reyes", email="reyes@mail.test", contact_number="(0918) 765-4321",
+        )
+
+    def test_normalize_phone(self):
+        self.assertEqual(search.normalize_phone("+63 (917) 123-4567"), "639171234567")
+        self.assertEqual(search.normalize_phone(None), "")
+        self.assertEqual(search.search_terms("+63 917 123 4567"), ["1234567"])
+        self.assertEqual(search.search_terms("  Jane de CRUZ "), ["jane", "cruz"])
+
+    def test_search_by_name_email_and_phone(self):
+        cases = {
+            "jane": [self.jane.pk],
+            "cruz jane": [self.jane.pk],
+            "mail.test": [self.john.pk],
+            "REYES": [self.john.pk],
+            "+63 917 123 4567": [self.jane.pk],
+            "0918-765-4321": [self.john.pk],
+            self.john.pk: [self.john.pk],
+            # No booking has every term: fuzzy fallback
+            "Cruzz": [self.jane.pk],
+            "nobody": [],
+            "jo": [],
+        }
+        for query, expected in cases.items():
+            with self.subTest(query=query):
+                self.assertEqual(search.search_booking_ids(query), expected)
+
+    def test_index_follows_booking_changes(self):
+        self.jane.guest_name = "Janet Santos"
+        self.jane.email = "janet@example.com"
+        self.jane.save()
+        self.assertEqual(search.search_booking_ids("santos"), [self.jane.pk])
+        self.assertEqual(search.search_booking_ids("cruz"), [])
+
+        # Bulk writers index the bookings themselves
+        Booking.objects.filter(pk=self.john.pk).update(email="jreyes@inbox.ph")
+        self.assertEqual(search.search_booking_ids("inbox.ph"), [])
+        search.index_bookings(Booking.objects.filter(pk=self.john.pk))
+        self.assertEqual(search.search_booking_ids("inbox.ph"), [self.john.pk])
+        self.assertEqual(search.search_booking_ids("mail.test"), [])
+
+        self.john.delete()
+        self.assertEqual(search.search_booking_ids("reyes"), [])
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {search.FTS_TABLE}")
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    def test_admin_search_uses_the_index(self):
+        self.client.force_login(self.admin_user)
+        url = reverse("admin:api_booking_changelist")
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, {"q": "jane"})
+        self.assertEqual([booking.pk for booking in response.context["cl"].result_list], [self.jane.pk])
+        self.assertTrue(any(search.FTS_TABLE in query["sql"] for query in ctx.captured_queries))
+
+        # Room numbers are matched exactly
+        response = self.client.get(url, {"q": "101"})
+        self.assertEqual(
+            sorted(booking.pk for booking in response.context["cl"].result_list), sorted([self.jane.pk, self.john.pk]),
+        )
+
+
+
+class RoomOperationTests(TestCase):
+    """Room status changes follow Room.STATUS_TRANSITIONS, one room or many (api/views/room_operations.py)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.housekeeper = CustomUser.objects.create_user("hk", role=CustomUser.Role.HOUSEKEEPING)
+        room_type = RoomType.objects.create(name="Deluxe", price=Decimal("1500.00"))
+        cls.dirty = Room.objects.create(room_number="101", room_type=room_type, status=Room.Status.DIRTY)
+        cls.occupied = Room.objects.create(room_number="102", room_type=room_type, status=Room.Status.OCCUPIED)
+        cls.available = Room.objects.create(room_number="103", room_type=room_type)
+
+    def setUp(self):
+        self.auth = f"Bearer {CustomTokenObtainPairSerializer.get_token(self.housekeeper).access_token}"
+
+    def patch(self, url, data):
+        return self.client.patch(url, data, content_type="application/json", headers={"Authorization": self.auth})
+
+    def statuses(self):
+        return dict(Room.objects.values_list("pk", "status"))
+
+    def test_single_room_follows_transitions(self):
+        response = self.patch(f"/api/room-operations/{self.occupied.pk}/", {"status": Room.Status.AVAILABLE})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["status"], ["Cannot change status from 'occupied' to 'available'."])
+        self.assertEqual(Room.objects.get(pk=self.occupied.pk).status, Room.Status.OCCUPIED)
+
+        response = self.patch(f"/api/room-operations/{self.occupied.pk}/", {"status": Room.Status.DIRTY})
+        self.assertEqual((response.status_code, response.json()["status"]), (200, Room.Status.DIRTY))
+
+        # Same status: allowed, e.g. to change only the note
+        response = self.patch(f"/api/room-operations/{self.occupied.pk}/", {"status": Room.Status.DIRTY, "note": "Stains"})
+        self.assertEqual((response.status_code, response.json()["note"]), (200, "Stains"))
+
+    def test_bulk_results_per_row(self):
+        changes = [
+            {"room_id": self.dirty.pk, "status": Room.Status.CLEANING, "note": "Floor 1"},
+            {"room_id": self.occupied.pk, "status": Room.Status.CLEANING},
+            {"room_id": 999999, "status": Room.Status.DIRTY},
+            {"room_id": self.available.pk, "status": "sparkling"},
+            {"room_id": self.dirty.pk, "status": Room.Status.AVAILABLE},
+            {"room_id": self.available.pk, "status": Room.Status.AVAILABLE},
+        ]
+        body = self.patch("/api/room-operations/bulk/", {"changes": changes}).json()
+
+        self.assertEqual((body["updated"], body["unchanged"], body["error"]), (1, 1, 4))
+        self.assertEqual(
+            [(row["room_id"], row["result"]) for row in body["results"]],
+            [
+                (self.dirty.pk, "updated"), (self.occupied.pk, "error"), (999999, "error"),
+                (self.available.pk, "error"), (self.dirty.pk, "error"), (self.available.pk, "unchanged"),
+            ],
+        )
+        self.assertEqual(body["results"][0]["note"], "Floor 1")
+        self.assertEqual(body["results"][1]["errors"], {"status": ["Cannot change status from 'occupied' to 'cleaning'."]})
+        self.assertEqual(body["results"][2]["errors"], {"room_id": ["Room not found."]})
+        self.assertIn("status", body["results"][3]["errors"])
+        self.assertEqual(body["results"][4]["errors"], {"room_id": ["Duplicate room_id in request."]})
+        self.assertEqual(
+            self.statuses(),
+            {self.dirty.pk: Room.Status.CLEANING, self.occupied.pk: Room.Status.OCCUPIED, self.available.pk: Room.Status.AVAILABLE},
+        )
+
+    def test_bulk_retry_is_unchanged(self):
+        changes = [
+            {"room_id": self.dirty.pk, "status": Room.Status.CLEANING},
+            {"room_id": self.occupied.pk, "status": Room.Status.MAINTENANCE, "note": "Leak"},
+        ]
+        first = self.patch("/api/room-operations/bulk/", {"changes": changes}).json()
+        versions = dict(Room.objects.values_list("pk", "version"))
+        retry = self.patch("/api/room-operations/bulk/", {"changes": changes}).json()
+
+        self.assertEqual((first["updated"], retry["updated"], retry["unchanged"]), (2, 0, 2))
+        self.assertEqual([row["result"] for row in retry["results"]], ["unchanged", "unchanged"])
+        self.assertEqual(dict(Room.objects.values_list("pk", "version")), versions)
+
+
+
+@override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+class SlowQueryTests(TestCase):
+    """SlowQueryMiddleware records queries over the threshold (api/slow_queries.py)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.housekeeper = CustomUser.objects.create_user("hk", role=CustomUser.Role.HOUSEKEEPING)
+        room_type = RoomType.objects.create(name="Deluxe", price=Decimal("1500.00"))
+        cls.room = Room.objects.create(room_number="101", room_type=room_type)
+
+    def setUp(self):
+        self.auth = f"Bearer {CustomTokenObtainPairSerializer.get_token(self.housekeeper).access_token}"
+        slow_queries.clear()
+        self.addCleanup(slow_queries.clear)
+
+    def room_queries(self):
+        return [entry for entry in slow_queries.get_entries() if 'FROM "api_room"' in entry["sql"]]
+
+    def test_records_view_caller_and_plan(self):
+        response = self.client.get("/api/room-operations/", headers={"Authorization": self.auth})
+        self.assertEqual(response.status_code, 200)
+
+        entry = self.room_queries()[0]
+        self.assertEqual(entry["view"], "api.views.room_operations.RoomOperationViewSet.list")
+        self.assertEqual((entry["file"], entry["function"]), ("api/projections.py", "room_operations"))
+        self.assertTrue(entry["plan"])
+        self.assertFalse(entry["plan"][0].startswith("EXPLAIN failed"))
+
+        # Below the threshold: nothing recorded
+        slow_queries.clear()
+        with override_settings(SLOW_QUERY_THRESHOLD_MS=10_000):
+            self.client.get("/api/room-operations/", headers={"Authorization": self.auth})
+        self.assertEqual(slow_queries.get_entries(), [])
+
+    def test_buffer_is_bounded(self):
+        with mock.patch.object(slow_queries, "_buffer", deque(maxlen=3)):
+            with slow_queries.capture_slow_queries(explain=False):
+                for number in range(5):
+                    list(Room.objects.filter(room_number=str(number)))
+            entries = slow_queries.get_entries()
+
+        # The newest, newest first
+        self.assertEqual([entry["params"] for entry in entries], [["4"], ["3"], ["2"]])
+
+    def test_failing_explain_keeps_atomic_request(self):
+        def fail_explain(execute, sql, params, many, context):
+            if sql.startswith("EXPLAIN"):
+                raise OperationalError("no plan")
+            return execute(sql, params, many, context)
+
+        with (
+            mock.patch.dict(connection.settings_dict, {"ATOMIC_REQUESTS": True}),
+            connection.execute_wrapper(fail_explain),
+            CaptureQueriesContext(connection) as ctx,
+        ):
+            response = self.client.patch(
+                f"/api/room-operations/{self.room.pk}/", {"status": Room.Status.DIRTY},
+                content_type="application/json", headers={"Authorization": self.auth},
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Room.objects.get(pk=self.room.pk).status, Room.Status.DIRTY)
+        self.assertEqual(self.room_queries()[-1]["plan"], ["EXPLAIN failed: no plan"])
+        # Each failed EXPLAIN only rolled back its own savepoint
+        self.assertTrue(any(query["sql"].startswith("ROLLBACK TO SAVEPOINT") for query in ctx.captured_queries))
+
+
+class CSVExportTests(SimpleTestCase):
+    def test_formula_cells_are_escaped(self):
+        rows = [("=HYPERLINK(\"http://x\")", "+63 917", "-1", "@SUM(A1)", "Ana", Decimal("-3.00"), -2, None)]
+        output = "".join(_csv_chunks(["a", "b", "c", "d", "e", "f", "g", "h"], rows))
+
+        self.assertEqual(
+            output.splitlines()[1],
+            "\"'=HYPERLINK(\"\"http://x\"\")\",'+63 917,'-1,'@SUM(A1),Ana,-3.00,-2,",
+        )
+
+
+
+class OptimisticLockingTests(TestCase):
+    """Saves of versioned rows are conditional on the version they were read with (VersionedModel)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.housekeeper = CustomUser.objects.create_user("hk", password="password", role=CustomUser.Role.HOUSEKEEPING)
+        room_type = RoomType.objects.create(name="Deluxe", price=Decimal("1500.00"))
+        cls.room = Room.objects.create(room_number="101", room_type=room_type, status=Room.Status.DIRTY)
+
+    def setUp(self):
+        self.auth = f"Bearer {CustomTokenObtainPairSerializer.get_token(self.housekeeper).access_token}"
+
+    def patch(self, url, data, **headers):
+        return self.client.patch(url, data, content_type="application/json", headers={"Authorization": self.auth, **headers})
+
+    def test_stale_if_match_is_rejected(self):
+        url = f"/api/room-operations/{self.room.pk}/"
+        response = self.patch(url, {"status": Room.Status.CLEANING}, **{"If-Match": '"0"'})
+        self.assertEqual((response.status_code, response["ETag"]), (200, '"1"'))
+
+        # In a savepoint: the failed save marks the enclosing transaction for rollback
+        with transaction.atomic():
+            response = self.patch(url, {"status": Room.Status.AVAILABLE}, **{"If-Match": '"0"'})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual((response.json()["current_version"], response["ETag"]), (1, '"1"'))
+        self.room.refresh_from_db()
+        self.assertEqual((self.room.status, self.room.version), (Room.Status.CLEANING, 1))
+
+    def test_concurrent_save_raises(self):
+        first, second = Room.objects.get(pk=self.room.pk), Room.objects.get(pk=self.room.pk)
+        first.note = "Towels"
+        first.save()
+
+        second.status = Room.Status.CLEANING
+        with self.assertRaises(StaleVersionError), transaction.atomic():
+            second.save()
+        self.assertEqual(second.version, 0)
+        self.room.refresh_from_db()
+        self.assertEqual((self.room.note, self.room.status, self.room.version), ("Towels", Room.Status.DIRTY, 1))
+
+    def test_update_fields_save_bumps_version(self):
+        self.room.note = "Towels"
+        self.room.save(update_fields=["note"])
+        self.assertEqual(Room.objects.get(pk=self.room.pk).version, 1)
+
+        # The saved instance is current: its next save goes through
+        self.room.note = "Sheets"
+        self.room.save(update_fields=["note"])
+        self.assertEqual(Room.objects.values_list("note", "version").get(pk=self.room.pk), ("Sheets", 2))
+
+    def test_bulk_room_operation_bumps_version(self):
+        stale = Room.objects.get(pk=self.room.pk)
+        response = self.patch("/api/room-operations/bulk/", {"changes": [{"room_id": self.room.pk, "status": Room.Status.CLEANING}]})
+        self.assertEqual(response.json()["updated"], 1)
+        self.assertEqual(Room.objects.get(pk=self.room.pk).version, 1)
+
+        stale.note = "Towels"
+        with self.assertRaises(StaleVersionError):
+            stale.save()
+
+    def test_night_audit_bumps_version(self):
+        booking = make_booking(self.room, 0)
+        night_audit.run(booking.check_in)
+
+        stale = booking
+        booking = Booking.objects.get(pk=booking.pk)
+        self.assertEqual((booking.status, booking.version), (Booking.Status.NO_SHOW, 1))
+        stale.status = Booking.Status.CHECKED_IN
+        with self.assertRaises(StaleVersionError):
+            stale.save(update_fields=["status"])
+
+
+
+class HousekeepingQueueTests(TestCase):
+    """Claims hand out each task once and only their token finishes it (api/housekeeping.py)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.housekeepers = [
+            CustomUser.objects.create_user(f"hk{i}", password="password", role=CustomUser.Role.HOUSEKEEPING) for i in range(2)
+        ]
+        room_type = RoomType.objects.create(name="Deluxe", price=Decimal("1500.00"))
+        # The Room signal opens a cleaning task for each
+        cls.rooms = [
+            Room.objects.create(room_number=str(101 + i), floor=1, room_type=room_type, status=Room.Status.DIRTY) for i in range(3)
+        ]
+
+    def active_tasks(self, room):
+        return list(
+            HousekeepingTask.objects.filter(room=room, status__in=[HousekeepingTask.Status.OPEN, HousekeepingTask.Status.CLAIMED])
+            .values_list("kind", "status")
+        )
+
+    def test_claims_never_share_a_task(self):
+        first = housekeeping.claim_tasks(self.housekeepers[0].pk, HousekeepingTask.Kind.CLEANING, count=2)
+        second = housekeeping.claim_tasks(self.housekeepers[1].pk, HousekeepingTask.Kind.CLEANING, count=2)
+        third = housekeeping.claim_tasks(self.housekeepers[1].pk, HousekeepingTask.Kind.CLEANING, count=2)
+
+        first_ids, second_ids = {task.pk for task in first.tasks}, {task.pk for task in second.tasks}
+        self.assertEqual((len(first_ids), len(second_ids), third.tasks), (2, 1, []))
+        self.assertFalse(first_ids & second_ids)
+        self.assertEqual(
+            set(HousekeepingTask.objects.filter(claim_token=first.token).values_list("pk", "claimed_by")),
+            {(pk, self.housekeepers[0].pk) for pk in first_ids},
+        )
+        self.assertEqual(set(Room.objects.values_list("status", flat=True)), {Room.Status.CLEANING})
+
+    def test_wrong_token_is_rejected(self):
+        claim = housekeeping.claim_tasks(self.housekeepers[0].pk, HousekeepingTask.Kind.CLEANING)
+        task = claim.tasks[0]
+
+        self.assertIsNone(housekeeping.complete_task(task.pk, uuid.uuid4()))
+        self.assertIsNone(housekeeping.release_task(task.pk, uuid.uuid4()))
+        auth = f"Bearer {CustomTokenObtainPairSerializer.get_token(self.housekeepers[1]).access_token}"
+        for action in ("complete", "release"):
+            response = self.client.post(
+                f"/api/housekeeping-tasks/{task.pk}/{action}/", {"claim_token": str(uuid.uuid4())},
+                content_type="application/json", headers={"Authorization": auth},
+            )
+            self.assertEqual(response.status_code, 409)
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.claim_token), (HousekeepingTask.Status.CLAIMED, claim.token))
+        self.assertEqual(Room.objects.get(pk=task.room_id).status, Room.Status.CLEANING)
+
+        self.assertEqual(housekeeping.complete_task(task.pk, claim.token).status, HousekeepingTask.Status.DONE)
+        self.assertEqual(Room.objects.get(pk=task.room_id).status, Room.Status.AVAILABLE)
+        # Done: the token no longer holds it either
+        self.assertIsNone(housekeeping.release_task(task.pk, claim.token))
+
+    def test_sync_room_tasks_is_idempotent(self):
+        room_ids = [room.pk for room in self.rooms]
+        before = list(HousekeepingTask.objects.order_by("pk").values_list("pk", "room", "kind", "status"))
+        housekeeping.sync_room_tasks(room_ids)
+        housekeeping.sync_room_tasks(room_ids)
+        self.assertEqual(list(HousekeepingTask.objects.order_by("pk").values_list("pk", "room", "kind", "status")), before)
+
+        # A claimed task stays with its claimer; a room no longer dirty loses its open task
+        claim = housekeeping.claim_tasks(self.housekeepers[0].pk, HousekeepingTask.Kind.CLEANING)
+        claimed_room = claim.tasks[0].room
+        Room.objects.exclude(pk=claimed_room.pk).update(status=Room.Status.MAINTENANCE)
+        for _ in range(2):
+            housekeeping.sync_room_tasks(room_ids)
+            self.assertEqual(self.active_tasks(claimed_room), [(HousekeepingTask.Kind.CLEANING, HousekeepingTask.Status.CLAIMED)])
+            for room in self.rooms:
+                if room != claimed_room:
+                    self.assertEqual(self.active_tasks(room), [(HousekeepingTask.Kind.MAINTENANCE, HousekeepingTask.Status.OPEN)])
+        self.assertEqual(HousekeepingTask.objects.filter(status=HousekeepingTask.Status.CANCELLED).count(), 2)
+
+
+@skipUnless(renderers.orjson, "orjson is not installed")
+class FastJSONRendererTests(SimpleTestCase):
+    """FastJSONRenderer's output is JSONRenderer's, also for the floats orjson writes differently."""
+
+    def test_same_output_as_json_renderer(self):
+        for value in [
+            1.5, 1e15, 1e16, -1.5e17, 1e-4, 9e-5, 1e-5, 1e-7,
+            Decimal("12.50"), Decimal("1E+20"), Decimal("0.00001"),
+            "1e16,0.00001", "\u2028", datetime.datetime(2030, 1, 1, 12, 30), 2**70,
+        ]:
+            with self.subTest(value=value):
+                data = {"value": value, "items": [value]}
+                self.assertEqual(renderers.FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_decimal_nan_is_refused_like_json_renderer(self):
+        for value in [Decimal("NaN"), Decimal("Infinity")]:
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError):
+                    JSONRenderer().render({"value": value})
+                with self.assertRaises(ValueError):
+                    renderers.FastJSONRenderer().render({"value": value})
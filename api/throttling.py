@@ -0,0 +1,225 @@
+"""
+Token bucket throttling for the public endpoints (booking, token).
+
+Each scope has two buckets: one per client IP and one per identity (the
+logged-in user, else the email / username in the request body). Rates are
+DRF style strings in settings.THROTTLE_RATES, e.g. "10/min": the bucket
+holds 10 tokens and refills at 10 per minute, so bursts up to 10 are fine
+and the sustained rate is 10 a minute.
+
+The order of checks keeps rejected requests cheap:
+
+1. The IP bucket, before the body is read.
+2. Content-Length against settings.THROTTLE_MAX_BODY_BYTES (413), still
+   before the body is read, so oversized multipart uploads are never
+   parsed and their images never decoded.
+3. The identity bucket. This parses the body, but only for requests that
+   passed 1 and 2.
+
+Throttled clients get 429 with a Retry-After header.
+
+Buckets live in this process (settings.THROTTLE_STORE = "local") or in
+the Django cache ("cache"), which all workers share when the cache backend
+is shared (Redis, Memcached, database).
+"""
+import math
+import threading
+import time
+from collections.abc import Mapping
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.throttling import BaseThrottle
+
+
+class RequestTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = "Request body is too large."
+    default_code = "request_too_large"
+
+
+def parse_rate(rate):
+    """'10/min' -> (capacity 10, refill 10/60 tokens per second)."""
+    count, period = rate.split("/")
+    seconds = {"s": 1, "m": 60, "h": 3600, "d": 86400}[period[0]]
+    return int(count), int(count) / seconds
+
+
+class LocalBucketStore:
+    """Buckets in a dict of this process: key -> (tokens, last refill time, capacity, refill)."""
+
+    PRUNE_EVERY = 1000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._takes = 0
+
+    def take(self, key, capacity, refill, now):
+        """Take one token. Returns 0 if allowed, else the seconds until a token is available."""
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))[:2]
+            tokens = min(capacity, tokens + (now - updated) * refill)
+
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now, capacity, refill)
+                wait = 0
+            else:
+                self._buckets[key] = (tokens, now, capacity, refill)
+                wait = (1 - tokens) / refill
+
+            self._takes += 1
+            if self._takes % self.PRUNE_EVERY == 0:
+                self._prune(now)
+            return wait
+
+    def _prune(self, now):
+        # Buckets that have refilled completely are the same as no bucket; each with its own rate
+        full = [
+            key for key, (tokens, updated, capacity, refill) in self._buckets.items()
+            if tokens + (now - updated) * refill >= capacity
+        ]
+        for key in full:
+            del self._buckets[key]
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheBucketStore:
+    """
+    Buckets in the Django cache, updated with atomic increments.
+
+    A bucket is an origin time and a counter of tokens taken since then.
+    At time t the bucket has capacity + (t - origin) * refill - taken
+    tokens left. Taking one is a single cache.incr, and rejected requests
+    give their token back with cache.decr. When a bucket has been idle long
+    enough to overflow, its origin is moved forward so it never holds more
+    than capacity.
+    """
+
+    def take(self, key, capacity, refill, now):
+        origin_key, taken_key = f"throttle:{key}:origin", f"throttle:{key}:taken"
+        # An idle bucket refills completely in this time; then forgetting it is harmless
+        timeout = math.ceil(capacity / refill) + 1
+
+        origin = cache.get(origin_key)
+        if origin is None:
+            # add, not set: a concurrent first request may have created either key already
+            cache.add(origin_key, now, timeout)
+            cache.add(taken_key, 0, timeout)
+            origin = cache.get(origin_key, now)
+
+        try:
+            taken = cache.incr(taken_key)
+        except ValueError:
+            # Counter expired in between
+            cache.add(taken_key, 0, timeout)
+            taken = cache.incr(taken_key)
+
+        refilled = (now - origin) * refill
+        if refilled > taken - 1:
+            # Held more than capacity before this take (a quiet period): cap it
+            origin = now - (taken - 1) / refill
+            cache.set(origin_key, origin, timeout)
+            refilled = (now - origin) * refill
+
+        cache.touch(origin_key, timeout)
+        cache.touch(taken_key, timeout)
+
+        tokens_left = capacity + refilled - taken
+        if tokens_left >= 0:
+            return 0
+        cache.decr(taken_key)
+        return (-tokens_left) / refill
+
+    def clear(self):
+        pass
+
+
+_local_store = LocalBucketStore()
+
+
+def get_store():
+    if getattr(settings, "THROTTLE_STORE", "local") == "cache":
+        return CacheBucketStore()
+    return _local_store
+
+
+class BucketThrottle(BaseThrottle):
+    """
+    IP bucket, body size limit and identity bucket of one scope (see the
+    module docstring). Only `throttled_methods` are counted.
+    """
+    scope = None
+    identity_field = None
+    throttled_methods = ("POST",)
+    timer = time.time  # shared by workers (cache store), so not monotonic
+
+    def __init__(self):
+        self._wait = None
+
+    def allow_request(self, request, view):
+        if request.method not in self.throttled_methods:
+            return True
+
+        rates = getattr(settings, "THROTTLE_RATES", {})
+        store = get_store()
+        now = self.timer()
+
+        ip_rate = rates.get(f"{self.scope}_ip")
+        if ip_rate and not self._take(store, f"{self.scope}:ip:{self.get_ident(request)}", ip_rate, now):
+            return False
+
+        max_bytes = getattr(settings, "THROTTLE_MAX_BODY_BYTES", {}).get(self.scope)
+        if max_bytes:
+            try:
+                length = int(request.META.get("CONTENT_LENGTH") or 0)
+            except ValueError:
+                length = 0
+            if length > max_bytes:
+                raise RequestTooLarge(f"Request body is too large (limit {max_bytes // 1024} KB).")
+
+        identity_rate = rates.get(f"{self.scope}_identity")
+        identity = identity_rate and self.get_identity(request)
+        if identity and not self._take(store, f"{self.scope}:id:{identity}", identity_rate, now):
+            return False
+
+        return True
+
+    def get_identity(self, request):
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            return f"user:{user.pk}"
+        if self.identity_field:
+            # Parses the body; everything cheaper has been checked by now
+            data = request.data
+            # A JSON list or scalar body has no identity (the view rejects it)
+            value = data.get(self.identity_field) if isinstance(data, Mapping) else None
+            if isinstance(value, str) and value.strip():
+                return f"{self.identity_field}:{value.strip().lower()}"
+        return None
+
+    def _take(self, store, key, rate, now):
+        capacity, refill = parse_rate(rate)
+        wait = store.take(key, capacity, refill, now)
+        if wait:
+            self._wait = wait
+            return False
+        return True
+
+    def wait(self):
+        return self._wait
+
+
+class BookingThrottle(BucketThrottle):
+    scope = "booking"
+    identity_field = "email"
+
+
+class LoginThrottle(BucketThrottle):
+    scope = "login"
+    identity_field = "username"
@@ -5,10 +5,15 @@ from api.views.room import RoomTypeViewSet
 from api.views.booking import AvailableRoomsView, BookingViewSet, BookingListView, ApproveBookingView, RejectBookingView, CancelBookingView, AvailablePhysicalRoomsView, CheckInGuestView, CheckOutGuestView, CheckedInBookingListView
 from api.views.check_out import BookingDetailView
 from api.views.order import MenuView, OrderViewSet
+from api.views.analytics import HotelKPIView, MenuSalesView
+from api.views.quote import QuoteView
+from api.views.export import ExportView
+from api.views.imports import CSVImportView
 
 from api.views.auth import CustomTokenObtainPairView, CustomTokenRefreshView
 
 from api.views.room_operations import RoomOperationViewSet
+from api.views.housekeeping import HousekeepingTaskViewSet
 
 
 router = DefaultRouter()
@@ -18,6 +23,7 @@ router.register(r'bookings', BookingViewSet, basename='booking')
 router.register(r'menu', MenuView, basename='menu')
 router.register(r'order', OrderViewSet, basename='order')
 router.register(r'room-operations', RoomOperationViewSet, basename='room-operations')
+router.register(r'housekeeping-tasks', HousekeepingTaskViewSet, basename='housekeeping-tasks')
 
 urlpatterns = router.urls
 urlpatterns += [    
@@ -31,6 +37,7 @@ urlpatterns += [
 
 
     path('room-types/<int:pk>/available-rooms/', AvailableRoomsView.as_view(), name='available-rooms'),
+    path('quotes/', QuoteView.as_view(), name='quotes'),
         # ⭐ NEW ENDPOINTS ⭐
     path('room-types/<int:pk>/available-physical-rooms/', AvailablePhysicalRoomsView.as_view(),
          name='available-physical-rooms'),
@@ -49,4 +56,9 @@ urlpatterns += [
         name="checked-in-bookings",
     ),
 
+    path("analytics/kpis/", HotelKPIView.as_view(), name="analytics-kpis"),
+    path("analytics/menu-sales/", MenuSalesView.as_view(), name="analytics-menu-sales"),
+    path("exports/<str:kind>/", ExportView.as_view(), name="export"),
+    path("imports/<str:kind>/", CSVImportView.as_view(), name="csv-import"),
+
     ]
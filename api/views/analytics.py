@@ -0,0 +1,187 @@
+from decimal import Decimal
+
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from api.models import DailyPaymentStats, DailyRoomTypeStats, MenuSalesStats, RoomType
+from api.permissions import INVENTORY, RESTAURANT, HasRole
+from api.rollups import sellable_room_counts
+
+
+MAX_RANGE_DAYS = 3 * 366
+
+
+def parse_date_range(request):
+    """
+    Read ?start=YYYY-MM-DD&end=YYYY-MM-DD (both inclusive).
+    Returns (start, end, error_response).
+    """
+    start = parse_date(request.query_params.get("start") or "")
+    end = parse_date(request.query_params.get("end") or "")
+
+    if not start or not end:
+        return None, None, Response(
+            {"detail": "start and end query parameters are required (YYYY-MM-DD)."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    if start > end:
+        return None, None, Response({"detail": "start must not be after end."}, status=status.HTTP_400_BAD_REQUEST)
+    if (end - start).days >= MAX_RANGE_DAYS:
+        return None, None, Response(
+            {"detail": f"Date range is limited to {MAX_RANGE_DAYS} days."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    return start, end, None
+
+
+def _ratio(numerator, denominator, places=4):
+    if not denominator:
+        return 0.0
+    return round(float(numerator) / float(denominator), places)
+
+
+def _kpis(available, sold, revenue):
+    return {
+        "room_nights_available": available,
+        "room_nights_sold": sold,
+        "occupancy_rate": _ratio(sold, available),
+        "adr": _ratio(revenue, sold, 2),
+        "revpar": _ratio(revenue, available, 2),
+        "room_revenue": float(revenue),
+    }
+
+
+class HotelKPIView(APIView):
+    """
+    GET /api/analytics/kpis/?start=YYYY-MM-DD&end=YYYY-MM-DD
+
+    Occupancy, ADR, RevPAR and room revenue per room type plus the payment
+    mix, read from the daily rollup tables (at most one row per room type
+    per day in the range). Admins only.
+    """
+    permission_classes = [HasRole]
+    allowed_roles = ()
+
+    def get(self, request):
+        start, end, error = parse_date_range(request)
+        if error:
+            return error
+
+        days = (end - start).days + 1
+        today = timezone.localdate()
+        days_ahead = max(0, (end - max(start, today)).days + 1)
+
+        per_type = {
+            row["room_type_id"]: row
+            for row in DailyRoomTypeStats.objects.filter(date__range=(start, end))
+            .values("room_type_id")
+            .annotate(
+                days_ahead=Count("id", filter=Q(date__gte=today)),
+                available=Sum("rooms_available"),
+                sold=Sum("rooms_sold"),
+                revenue=Sum("room_revenue"),
+            )
+        }
+
+        # Days from today on without a rollup row yet (nothing booked) count the
+        # current inventory. Past days count what their rows recorded; the night
+        # audit writes a row for every day it closes (manage.py rebuild_rollups
+        # fills in days before that).
+        room_counts = sellable_room_counts()
+
+        room_types = []
+        total_available = total_sold = 0
+        total_revenue = Decimal("0")
+
+        for room_type_id, name in RoomType.objects.order_by("name").values_list("id", "name"):
+            row = per_type.get(room_type_id, {})
+            available = (row.get("available") or 0) + (days_ahead - (row.get("days_ahead") or 0)) * room_counts.get(room_type_id, 0)
+            sold = row.get("sold") or 0
+            revenue = row.get("revenue") or Decimal("0")
+
+            room_types.append({"room_type_id": room_type_id, "room_type": name, **_kpis(available, sold, revenue)})
+
+            total_available += available
+            total_sold += sold
+            total_revenue += revenue
+
+        payments = list(
+            DailyPaymentStats.objects.filter(date__range=(start, end))
+            .values("payment_type")
+            .annotate(amount=Sum("amount"), count=Sum("count"))
+            .order_by("payment_type")
+        )
+        total_paid = sum((p["amount"] for p in payments), Decimal("0"))
+
+        return Response({
+            "start": start,
+            "end": end,
+            "days": days,
+            "totals": _kpis(total_available, total_sold, total_revenue),
+            "room_types": room_types,
+            "payment_mix": [
+                {
+                    "payment_type": p["payment_type"],
+                    "amount": float(p["amount"]),
+                    "count": p["count"],
+                    "share": _ratio(p["amount"], total_paid),
+                }
+                for p in payments
+            ],
+        })
+
+
+class MenuSalesView(APIView):
+    """
+    GET /api/analytics/menu-sales/?start=YYYY-MM-DD&end=YYYY-MM-DD&group_by=item|day|hour|category
+
+    Restaurant quantity and revenue from the pre-aggregated MenuSalesStats
+    table (see `manage.py aggregate_menu_sales`).
+    """
+    permission_classes = [HasRole]
+    allowed_roles = (RESTAURANT, INVENTORY)
+
+    GROUPINGS = {
+        "item": ("menu_id", "menu__name", "category"),
+        "day": ("date",),
+        "hour": ("hour",),
+        "category": ("category",),
+    }
+
+    def get(self, request):
+        start, end, error = parse_date_range(request)
+        if error:
+            return error
+
+        group_by = request.query_params.get("group_by", "item")
+        if group_by not in self.GROUPINGS:
+            return Response(
+                {"detail": f"group_by must be one of: {', '.join(self.GROUPINGS)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        stats = MenuSalesStats.objects.filter(date__range=(start, end))
+        category = request.query_params.get("category")
+        if category:
+            stats = stats.filter(category=category)
+
+        columns = self.GROUPINGS[group_by]
+        ordering = ("-revenue",) if group_by in ("item", "category") else columns
+        rows = (
+            stats.values(*columns)
+            .annotate(quantity=Sum("quantity"), revenue=Sum("revenue"))
+            .order_by(*ordering)
+        )
+
+        results = []
+        for row in rows:
+            row["revenue"] = float(row["revenue"])
+            if "menu__name" in row:
+                row["name"] = row.pop("menu__name")
+            results.append(row)
+
+        return Response({"start": start, "end": end, "group_by": group_by, "results": results})
@@ -0,0 +1,185 @@
+"""
+Async versions of read-heavy endpoints, served under ASGI only and when
+settings.ASYNC_READ_VIEWS is on (backend/urls_asgi.py, selected by
+api.middleware.ASGIUrlconfMiddleware).
+
+Same URLs, JSON, authentication and `allowed_roles` checks as the DRF
+views, but the queries use the async ORM, so an ASGI worker answers them
+on its event loop instead of handing every request to a thread. DRF views
+are synchronous, so these are plain Django views that reuse the DRF
+serializers and JSON renderer (api/renderers.py).
+"""
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.utils.dateparse import parse_date
+from django.views import View
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+
+from api import availability, kitchen_feed, projections
+from api.authentication import ClaimsJWTAuthentication
+from api.models import Booking, Menu, Room, RoomType
+from api.permissions import FRONT_DESK, PUBLIC, RESTAURANT, RESTAURANT_STAFF, HasRole
+from api.renderers import FastJSONRenderer
+from api.serializers.booking_serializer import RoomSerializer
+from api.serializers.menu_serializer import MenuSerializer, OrderSerializer
+from api.serializers.room_serializers import RoomTypeSerializer
+
+
+class AsyncReadView(View):
+    """
+    GET-only view: authenticates and checks `allowed_roles` like HasRole,
+    then awaits the subclass's `async def read(self, request, *args, **kwargs)`.
+    """
+    http_method_names = ["get", "head", "options"]
+    allowed_roles = PUBLIC
+    authentication = ClaimsJWTAuthentication()
+    renderer = FastJSONRenderer()
+
+    async def get(self, request, *args, **kwargs):
+        # Set before anything reads the session-backed lazy user (a sync query)
+        request.user = AnonymousUser()
+        try:
+            result = await self.authentication.aauthenticate(request)
+        except AuthenticationFailed as exc:
+            # The body DRF's exception handler gives
+            data = exc.detail if isinstance(exc.detail, dict) else {"detail": exc.detail}
+            response = self.respond(data, exc.status_code)
+            response["WWW-Authenticate"] = self.authentication.authenticate_header(request)
+            return response
+        if result is not None:
+            request.user = result[0]
+
+        if not HasRole().has_permission(request, self):
+            if not request.user.is_authenticated:
+                return self.respond({"detail": "Authentication credentials were not provided."}, status.HTTP_401_UNAUTHORIZED)
+            return self.respond({"detail": HasRole.message}, status.HTTP_403_FORBIDDEN)
+
+        return await self.read(request, *args, **kwargs)
+
+    def respond(self, data, status_code=status.HTTP_200_OK):
+        return HttpResponse(self.renderer.render(data), status=status_code, content_type="application/json")
+
+    def not_found(self, model):
+        return self.respond({"detail": f"No {model._meta.object_name} matches the given query."}, status.HTTP_404_NOT_FOUND)
+
+
+def with_sync_fallback(async_view, sync_view):
+    """One URL: GET / HEAD to `async_view`, other methods to the (DRF) `sync_view` in a thread."""
+    async def view(request, *args, **kwargs):
+        if request.method in ("GET", "HEAD"):
+            return await async_view(request, *args, **kwargs)
+        return await sync_to_async(sync_view)(request, *args, **kwargs)
+
+    view.csrf_exempt = getattr(sync_view, "csrf_exempt", False)
+    return view
+
+
+class AsyncAvailableRoomsView(AsyncReadView):
+    """GET /api/room-types/<pk>/available-rooms/?check_in=YYYY-MM-DD&check_out=YYYY-MM-DD (see AvailableRoomsView)."""
+
+    async def read(self, request, pk):
+        check_in = request.GET.get('check_in')
+        check_out = request.GET.get('check_out')
+
+        if not check_in or not check_out:
+            return self.respond({"detail": "check_in and check_out query parameters are required."}, status.HTTP_400_BAD_REQUEST)
+
+        check_in_date = parse_date(check_in)
+        check_out_date = parse_date(check_out)
+
+        if not check_in_date or not check_out_date:
+            return self.respond({"detail": "Invalid date format."}, status.HTTP_400_BAD_REQUEST)
+
+        if availability.is_enabled():
+            rooms = await availability.aavailable_rooms(pk, check_in_date, check_out_date)
+            if rooms is None:
+                return self.not_found(RoomType)
+            return self.respond(rooms)
+
+        if not await RoomType.objects.filter(pk=pk).aexists():
+            return self.not_found(RoomType)
+
+        booked_rooms = Booking.objects.filter(
+            room__room_type_id=pk,
+            status__in=availability.ACTIVE_STATUSES,
+            check_in__lt=check_out_date,
+            check_out__gt=check_in_date,
+        ).values_list('room_id', flat=True)
+        rooms = Room.objects.filter(room_type_id=pk, status=Room.Status.AVAILABLE).exclude(id__in=booked_rooms)
+
+        return self.respond(RoomSerializer([room async for room in rooms], many=True).data)
+
+
+class AsyncCheckedInBookingListView(AsyncReadView):
+    """GET /api/bookings/list/checked-in/ (see CheckedInBookingListView)."""
+    allowed_roles = (FRONT_DESK, RESTAURANT, RESTAURANT_STAFF)
+
+    async def read(self, request):
+        bookings = (
+            Booking.objects
+            .filter(status=Booking.Status.CHECKED_IN)
+            .select_related("assigned_room", "assigned_room__room_type")
+            .order_by("assigned_room__room_number")
+        )
+        return self.respond(
+            [projections.checked_in_booking(row) async for row in bookings.values(*projections.CHECKED_IN_FIELDS)]
+        )
+
+
+class AsyncRoomTypeListView(AsyncReadView):
+    """GET /api/room_type/ (see RoomTypeViewSet)."""
+
+    async def read(self, request):
+        room_types = [room_type async for room_type in RoomType.objects.all()]
+        # The request makes image URLs absolute, as in the viewset
+        return self.respond(RoomTypeSerializer(room_types, many=True, context={"request": request}).data)
+
+
+class AsyncRoomTypeDetailView(AsyncReadView):
+    """GET /api/room_type/<pk>/ (see RoomTypeViewSet)."""
+
+    async def read(self, request, pk):
+        try:
+            room_type = await RoomType.objects.aget(pk=pk)
+        except RoomType.DoesNotExist:
+            return self.not_found(RoomType)
+        except ValueError:
+            # A pk that isn't a number (DRF's get_object_or_404)
+            return self.respond({"detail": "Not found."}, status.HTTP_404_NOT_FOUND)
+        return self.respond(RoomTypeSerializer(room_type, context={"request": request}).data)
+
+
+class AsyncMenuListView(AsyncReadView):
+    """GET /api/menu/ (see MenuView.list)."""
+
+    async def read(self, request):
+        return self.respond(MenuSerializer([menu async for menu in Menu.objects.all()], many=True).data)
+
+
+class AsyncOrderFeedView(AsyncReadView):
+    """
+    GET /api/order/feed/ (see OrderViewSet.feed). A long-poll waits on the
+    event loop, for up to kitchen_feed.MAX_WAIT seconds, instead of holding
+    a worker thread.
+    """
+    allowed_roles = (RESTAURANT, RESTAURANT_STAFF)
+
+    async def read(self, request):
+        since = request.GET.get("since")
+        wait = request.GET.get("wait", "0")
+        if (since is not None and not since.isdigit()) or not wait.isdigit():
+            return self.respond({"detail": "since and wait must be non-negative integers."}, status.HTTP_400_BAD_REQUEST)
+
+        if since is None:
+            cursor, orders = await sync_to_async(kitchen_feed.snapshot)()
+        else:
+            cursor, orders = await kitchen_feed.achanges_since(int(since), int(wait))
+
+        # The orders come with their booking, room and items, so serializing them runs no queries
+        return self.respond({
+            "cursor": cursor,
+            "full": since is None,
+            "orders": OrderSerializer(orders, many=True).data,
+        })
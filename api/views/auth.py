@@ -1,9 +1,11 @@
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from api.serializers.auth import CustomTokenObtainPairSerializer, CustomTokenRefreshSerializer
+from api.throttling import LoginThrottle
 
 
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
+    throttle_classes = [LoginThrottle]
 
 
 class CustomTokenRefreshView(TokenRefreshView):
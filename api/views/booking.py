@@ -1,11 +1,20 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from django.http import Http404
 from django.shortcuts import get_object_or_404
+from django.db import transaction
 from django.utils.dateparse import parse_date
+from api import availability, projections
+from api.permissions import FRONT_DESK, RESTAURANT, RESTAURANT_STAFF, HasRole
+from api.throttling import BookingThrottle
+from api.idempotency import idempotent
+from api.concurrency import apply_if_match
+from api.search import search_booking_ids
 from api.models import RoomType, Room, Booking, Payment
-from api.serializers.booking_serializer import RoomSerializer, BookingCreateSerializer, BookingSerializer, CheckedInBookingSerializer
+from api.serializers.booking_serializer import RoomSerializer, BookingCreateSerializer, BookingSerializer, GroupBookingSerializer
 from rest_framework import viewsets, mixins, parsers
+from rest_framework.decorators import action
 from rest_framework.generics import ListAPIView
 
 from django.conf import settings
@@ -33,6 +42,13 @@ class AvailableRoomsView(APIView):
         if not check_in_date or not check_out_date:
             return Response({"detail": "Invalid date format."}, status=status.HTTP_400_BAD_REQUEST)
 
+        if availability.is_enabled():
+            # Answered from the in-memory interval index (api/availability.py)
+            rooms = availability.available_rooms(pk, check_in_date, check_out_date)
+            if rooms is None:
+                raise Http404("No RoomType matches the given query.")
+            return Response(rooms)
+
         room_type = get_object_or_404(RoomType, pk=pk)
 
         # All rooms for this type
@@ -58,15 +74,67 @@ class BookingViewSet(viewsets.GenericViewSet, mixins.CreateModelMixin, mixins.Re
     queryset = Booking.objects.all()
     serializer_class = BookingCreateSerializer
     parser_classes = (parsers.MultiPartParser, parsers.FormParser)
+    # POSTs only (create, group): per IP, then per email
+    throttle_classes = [BookingThrottle]
+    # Only the search action checks roles; create / retrieve stay public
+    allowed_roles = {"search": (FRONT_DESK,)}
+
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='group',
+        serializer_class=GroupBookingSerializer,
+        parser_classes=(parsers.JSONParser, parsers.MultiPartParser, parsers.FormParser),
+    )
+    @idempotent
+    def group(self, request):
+        """
+        POST /api/bookings/group/
+        Books several rooms at once, all or nothing (see GroupBookingSerializer).
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['get'], url_path='search', permission_classes=[HasRole])
+    def search(self, request):
+        """
+        GET /api/bookings/search/?q=<text>&limit=20
+        Bookings whose guest name, email, phone number or booking ID match,
+        best match first (see api/search.py). Tolerates typos in names.
+        """
+        try:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), 100)
+        except ValueError:
+            return Response({"limit": ["A valid integer is required."]}, status=status.HTTP_400_BAD_REQUEST)
+
+        ids = search_booking_ids(request.query_params.get('q', ''), limit=limit)
+        bookings = Booking.objects.select_related("room__room_type").prefetch_related("payments").in_bulk(ids)
+        serializer = BookingSerializer([bookings[pk] for pk in ids if pk in bookings], many=True)
+        return Response(serializer.data)
 
 
 class BookingListView(ListAPIView):
+    permission_classes = [HasRole]
+    allowed_roles = (FRONT_DESK,)
     queryset = Booking.objects.select_related("room__room_type").prefetch_related("payments")
     serializer_class = BookingSerializer
 
+    def list(self, request, *args, **kwargs):
+        # Same JSON as BookingSerializer, from values() rows (api/projections.py)
+        return Response(projections.bookings(self.filter_queryset(self.get_queryset())))
+
 
 
 class ApproveBookingView(APIView):
+    permission_classes = [HasRole]
+    allowed_roles = (FRONT_DESK,)
+
     def post(self, request, pk):
         try:
             booking = Booking.objects.get(pk=pk)
@@ -75,7 +143,7 @@ class ApproveBookingView(APIView):
 
         # Update booking status
         booking.status = Booking.Status.CONFIRMED
-        booking.save()
+        apply_if_match(request, booking).save(update_fields=["status", "updated_at"])
 
         payment = get_object_or_404(Payment, booking=booking)
         payment.status = Payment.PaymentStatus.PAID
@@ -120,6 +188,9 @@ class RejectBookingView(APIView):
     """
     Reject a booking: update status, send email to guest
     """
+    permission_classes = [HasRole]
+    allowed_roles = (FRONT_DESK,)
+
     def post(self, request, pk):
         reason = request.data.get("reason", "Your booking was rejected.")
 
@@ -130,7 +201,7 @@ class RejectBookingView(APIView):
 
         # Update status
         booking.status = Booking.Status.REJECTED  # mark as cancelled/rejected
-        booking.save()
+        apply_if_match(request, booking).save(update_fields=["status", "updated_at"])
 
         reason = request.data.get("reason", "Your booking was rejected.")
         subject = request.data.get("subject", f"Booking {booking.id} Rejected")
@@ -157,12 +228,15 @@ class CancelBookingView(APIView):
             return Response({"detail": "Booking not found."}, status=status.HTTP_404_NOT_FOUND)
 
         booking.status = Booking.Status.CANCELLED
-        booking.save()
+        apply_if_match(request, booking).save(update_fields=["status", "updated_at"])
         return Response({"detail": f"Booking {booking.id} cancelled successfully."})
     
 
 
 class AvailablePhysicalRoomsView(APIView):
+    permission_classes = [HasRole]
+    allowed_roles = (FRONT_DESK,)
+
     def get(self, request, pk):  # pk = room_type id
         room_type = get_object_or_404(RoomType, id=pk)
 
@@ -183,6 +257,11 @@ class AvailablePhysicalRoomsView(APIView):
 
 
 class CheckInGuestView(APIView):
+    permission_classes = [HasRole]
+    allowed_roles = (FRONT_DESK,)
+
+    @idempotent
+    @transaction.atomic
     def post(self, request, booking_id):
         # 1. Get booking
         booking = get_object_or_404(Booking, id=booking_id)
@@ -199,12 +278,13 @@ class CheckInGuestView(APIView):
             return Response({"error": "Room is not available."}, status=400)
 
         # 3. Assign room and update statuses
+        # Version-checked saves: a concurrent check-in of this booking or into this room gets 409
         booking.assigned_room = room
         booking.status = Booking.Status.CHECKED_IN
-        booking.save()
+        apply_if_match(request, booking).save(update_fields=["assigned_room", "status", "updated_at"])
 
         room.status = Room.Status.OCCUPIED
-        room.save()
+        room.save(update_fields=["status", "updated_at"])
 
 
 
@@ -227,6 +307,11 @@ class CheckInGuestView(APIView):
 
 
 class CheckOutGuestView(APIView):
+    permission_classes = [HasRole]
+    allowed_roles = (FRONT_DESK,)
+
+    @idempotent
+    @transaction.atomic
     def post(self, request, booking_id):
         booking = get_object_or_404(Booking, id=booking_id)
         room = booking.assigned_room
@@ -240,10 +325,10 @@ class CheckOutGuestView(APIView):
 
         # Update booking and room
         booking.status = Booking.Status.CHECKED_OUT
-        booking.save()
+        apply_if_match(request, booking).save(update_fields=["status", "updated_at"])
 
         room.status = Room.Status.DIRTY
-        room.save()
+        room.save(update_fields=["status", "updated_at"])
 
         # Handle additional fees
         additional_fees = booking.additional_fee or []
@@ -271,7 +356,9 @@ class CheckOutGuestView(APIView):
 
 
 class CheckedInBookingListView(APIView):
-   # permission_classes = [IsAuthenticated]
+    # Restaurant staff pick the room for room service orders from this list
+    permission_classes = [HasRole]
+    allowed_roles = (FRONT_DESK, RESTAURANT, RESTAURANT_STAFF)
 
     def get(self, request):
         bookings = (
@@ -281,8 +368,7 @@ class CheckedInBookingListView(APIView):
             .order_by("assigned_room__room_number")
         )
 
-        serializer = CheckedInBookingSerializer(bookings, many=True)
-        return Response(serializer.data)
+        return Response(projections.checked_in_bookings(bookings))
 
 
 
@@ -3,9 +3,13 @@ from rest_framework.response import Response
 from rest_framework import status
 from django.shortcuts import get_object_or_404
 from api.models import Booking
+from api.permissions import FRONT_DESK, HasRole
 from api.serializers.check_out import BookingDetailSerializer
 
 class BookingDetailView(APIView):
+    permission_classes = [HasRole]
+    allowed_roles = (FRONT_DESK,)
+
     def get(self, request, booking_id):
         booking = get_object_or_404(Booking, id=booking_id)
         serializer = BookingDetailSerializer(booking)
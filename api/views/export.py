@@ -0,0 +1,236 @@
+import csv
+import datetime
+import io
+import json
+from collections import namedtuple
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from api.models import Booking, Order, OrderItem, Payment
+from api.permissions import HasRole
+
+
+# Rows fetched per database round trip, and written per chunk of the response
+CHUNK_SIZE = 2000
+
+# columns: (header, lookup) pairs; date_field / status_field are the filter lookups
+Export = namedtuple("Export", "model columns date_field is_datetime status_field")
+
+EXPORTS = {
+    "bookings": Export(
+        Booking,
+        (
+            ("id", "id"),
+            ("guest_name", "guest_name"),
+            ("email", "email"),
+            ("contact_number", "contact_number"),
+            ("room_type", "room__room_type__name"),
+            ("room_number", "room__room_number"),
+            ("assigned_room", "assigned_room__room_number"),
+            ("check_in", "check_in"),
+            ("check_out", "check_out"),
+            ("adults", "adults"),
+            ("children", "children"),
+            ("total_price", "total_price"),
+            ("status", "status"),
+            ("created_at", "created_at"),
+        ),
+        "check_in",
+        False,
+        "status",
+    ),
+    "payments": Export(
+        Payment,
+        (
+            ("id", "id"),
+            ("booking_id", "booking_id"),
+            ("guest_name", "booking__guest_name"),
+            ("payment_type", "payment_type"),
+            ("amount", "amount"),
+            ("status", "status"),
+            ("transaction_reference", "transaction_reference"),
+            ("paid_at", "paid_at"),
+            ("created_at", "created_at"),
+        ),
+        "created_at",
+        True,
+        "status",
+    ),
+    "orders": Export(
+        Order,
+        (
+            ("id", "id"),
+            ("booking_id", "booking_id"),
+            ("order_type", "order_type"),
+            ("order_status", "order_status"),
+            ("total_amount", "total_amount"),
+            ("created_at", "created_at"),
+        ),
+        "created_at",
+        True,
+        "order_status",
+    ),
+    "order-items": Export(
+        OrderItem,
+        (
+            ("id", "id"),
+            ("order_id", "order_id"),
+            ("booking_id", "order__booking_id"),
+            ("order_type", "order__order_type"),
+            ("order_status", "order__order_status"),
+            ("menu_id", "menu_id"),
+            ("menu_name", "menu_name"),
+            ("price", "price"),
+            ("quantity", "quantity"),
+            ("subtotal", "subtotal"),
+            ("created_at", "order__created_at"),
+        ),
+        "order__created_at",
+        True,
+        "order__order_status",
+    ),
+}
+
+
+def _plain(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime.datetime):
+        return timezone.localtime(value).isoformat()
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    return str(value)
+
+
+# A text cell starting with one of these is run as a formula by Excel / Sheets
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _csv_cell(value):
+    text = _plain(value)
+    # Only text from the database (guest names, emails, ...): numbers such as -3 stay numbers
+    if isinstance(value, str) and text.startswith(FORMULA_PREFIXES):
+        return "'" + text
+    return text
+
+
+def _csv_chunks(headers, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(headers)
+    for i, row in enumerate(rows, 1):
+        writer.writerow([_csv_cell(value) for value in row])
+        if i % CHUNK_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _ndjson_chunks(headers, rows):
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(dict(zip(headers, map(_ndjson_value, row))), cls=DjangoJSONEncoder))
+        if len(lines) == CHUNK_SIZE:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def _ndjson_value(value):
+    if isinstance(value, datetime.datetime):
+        return timezone.localtime(value)
+    return value
+
+
+OUTPUTS = {
+    "csv": ("text/csv", _csv_chunks),
+    "ndjson": ("application/x-ndjson", _ndjson_chunks),
+}
+
+
+class ExportView(APIView):
+    """
+    GET /api/exports/<bookings|payments|orders|order-items>/?start=YYYY-MM-DD&end=YYYY-MM-DD&status=...&output=csv|ndjson
+
+    Streams every matching row as CSV (default) or NDJSON. Text cells that
+    a spreadsheet would run as a formula (=, +, -, @) are prefixed with '
+    in the CSV. Rows are read with values_list(...).iterator() and written
+    CHUNK_SIZE at a time, so memory use does not grow with the size of the
+    export. start / end (both inclusive, both optional) filter on check-in
+    for bookings and on the creation date otherwise; status may be given
+    several times. Admins only.
+    """
+    permission_classes = [HasRole]
+    allowed_roles = ()
+
+    def get(self, request, kind):
+        export = EXPORTS.get(kind)
+        if export is None:
+            return Response(
+                {"detail": f"Unknown export. Choose one of: {', '.join(EXPORTS)}."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        # "format" is taken by DRF's content negotiation
+        output = request.query_params.get("output", "csv")
+        if output not in OUTPUTS:
+            return Response(
+                {"detail": f"output must be one of: {', '.join(OUTPUTS)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        rows = export.model.objects.order_by("pk")
+
+        bounds = {}
+        for param in ("start", "end"):
+            value = request.query_params.get(param)
+            if not value:
+                continue
+            bounds[param] = parse_date(value)
+            if bounds[param] is None:
+                return Response(
+                    {"detail": f"{param} must be a date in YYYY-MM-DD format."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+        rows = rows.filter(**self._date_filter(export, bounds.get("start"), bounds.get("end")))
+
+        statuses = request.query_params.getlist("status")
+        if statuses:
+            rows = rows.filter(**{f"{export.status_field}__in": statuses})
+
+        headers = [header for header, _ in export.columns]
+        rows = rows.values_list(*[lookup for _, lookup in export.columns]).iterator(chunk_size=CHUNK_SIZE)
+
+        content_type, chunks = OUTPUTS[output]
+        response = StreamingHttpResponse(chunks(headers, rows), content_type=content_type)
+        filename = f"{kind}-{timezone.localdate().isoformat()}.{output}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+    def _date_filter(self, export, start, end):
+        """
+        Inclusive day range on the export's date field. Datetime fields get
+        aware bounds (not __date) so the filter can use their index.
+        """
+        if export.is_datetime:
+            tz = timezone.get_current_timezone()
+            start = start and datetime.datetime.combine(start, datetime.time.min, tzinfo=tz)
+            end = end and datetime.datetime.combine(end + datetime.timedelta(days=1), datetime.time.min, tzinfo=tz)
+            upper = "lt"
+        else:
+            upper = "lte"
+
+        lookups = {}
+        if start:
+            lookups[f"{export.date_field}__gte"] = start
+        if end:
+            lookups[f"{export.date_field}__{upper}"] = end
+        return lookups
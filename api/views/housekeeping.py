@@ -0,0 +1,87 @@
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from api import housekeeping
+from api.models import HousekeepingTask
+from api.permissions import FRONT_DESK, HOUSEKEEPING, MAINTENANCE, HasRole
+from api.serializers.room_serializers import (
+    ClaimTasksSerializer,
+    ClaimTokenSerializer,
+    HousekeepingTaskSerializer,
+)
+
+
+class HousekeepingTaskViewSet(viewsets.GenericViewSet):
+    """
+    Cleaning / maintenance queue for staff devices (see api/housekeeping.py).
+
+    - GET  /api/housekeeping-tasks/?kind=cleaning&floor=2   open tasks by floor, oldest first
+    - GET  /api/housekeeping-tasks/mine/                     tasks I have claimed
+    - POST /api/housekeeping-tasks/claim/                    {"kind": "cleaning", "count": 5, "floor": 2}
+    - POST /api/housekeeping-tasks/<id>/complete/            {"claim_token": "..."}
+    - POST /api/housekeeping-tasks/<id>/release/             {"claim_token": "..."}
+    """
+    queryset = HousekeepingTask.objects.all()
+    serializer_class = HousekeepingTaskSerializer
+    lookup_value_regex = r"\d+"
+    permission_classes = [HasRole]
+    allowed_roles = {
+        "list": (HOUSEKEEPING, MAINTENANCE, FRONT_DESK),
+        "*": (HOUSEKEEPING, MAINTENANCE),
+    }
+
+    # Longest open queue returned at once
+    queue_limit = 500
+
+    def list(self, request):
+        kind = request.query_params.get("kind")
+        if kind and kind not in HousekeepingTask.Kind.values:
+            return Response({"kind": [f'"{kind}" is not a valid choice.']}, status=status.HTTP_400_BAD_REQUEST)
+        floor = request.query_params.get("floor")
+        if floor is not None and not floor.isdigit():
+            return Response({"floor": ["A valid integer is required."]}, status=status.HTTP_400_BAD_REQUEST)
+
+        tasks = housekeeping.open_queue(kind, int(floor) if floor is not None else None)
+        return Response(list(tasks[:self.queue_limit]))
+
+    @action(detail=False, methods=["get"])
+    def mine(self, request):
+        tasks = HousekeepingTask.objects.filter(
+            claimed_by_id=request.user.id, status=HousekeepingTask.Status.CLAIMED
+        ).order_by("floor", "claimed_at")
+        return Response(HousekeepingTaskSerializer(tasks, many=True).data)
+
+    @action(detail=False, methods=["post"])
+    def claim(self, request):
+        """
+        Claims up to `count` open tasks on one floor. Concurrent claims never
+        get the same task; fewer (or no) tasks come back when the floor runs out.
+        Keep the claim_token to complete or release them.
+        """
+        serializer = ClaimTasksSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        claim = housekeeping.claim_tasks(request.user.id, **serializer.validated_data)
+        return Response({
+            "claim_token": claim.token,
+            "tasks": HousekeepingTaskSerializer(claim.tasks, many=True).data,
+        })
+
+    @action(detail=True, methods=["post"])
+    def complete(self, request, pk=None):
+        return self._finish(request, pk, housekeeping.complete_task)
+
+    @action(detail=True, methods=["post"])
+    def release(self, request, pk=None):
+        return self._finish(request, pk, housekeeping.release_task)
+
+    def _finish(self, request, pk, finish):
+        serializer = ClaimTokenSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        task = finish(pk, serializer.validated_data["claim_token"])
+        if task is None:
+            return Response(
+                {"detail": "This task is not claimed with this claim_token."},
+                status=status.HTTP_409_CONFLICT,
+            )
+        return Response(HousekeepingTaskSerializer(task).data)
@@ -0,0 +1,42 @@
+import io
+
+from rest_framework import parsers, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from api.importers import IMPORTERS, CSVImportError, import_csv
+from api.permissions import HasRole
+
+
+class CSVImportView(APIView):
+    """
+    POST /api/imports/<room-types|rooms|menu>/   (multipart, field "file"; ?dry_run=1 to only validate)
+
+    Same as `manage.py import_csv`: every row is validated first and all
+    errors are returned together (400); otherwise the rows are upserted.
+    """
+    permission_classes = [HasRole]
+    allowed_roles = ()  # admins only
+    parser_classes = (parsers.MultiPartParser,)
+
+    def post(self, request, kind):
+        if kind not in IMPORTERS:
+            return Response(
+                {"detail": f"Unknown import. Choose one of: {', '.join(IMPORTERS)}."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({"file": ["A CSV file is required."]}, status=status.HTTP_400_BAD_REQUEST)
+
+        dry_run = request.query_params.get("dry_run") in ("1", "true")
+        text_file = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+        try:
+            result = import_csv(kind, text_file, dry_run=dry_run)
+        except CSVImportError as exc:
+            return Response({"detail": str(exc), "errors": exc.errors}, status=status.HTTP_400_BAD_REQUEST)
+        except UnicodeDecodeError:
+            return Response({"file": ["The file must be UTF-8 encoded CSV."]}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({**result._asdict(), "dry_run": dry_run})
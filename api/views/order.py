@@ -1,9 +1,20 @@
 import json
 from rest_framework.viewsets import ViewSet
 
-from api.models import Order, Menu, OrderItem, Payment
-
-from api.serializers.menu_serializer import MenuSerializer, OrderSerializer
+from api.models import Order, Menu, OrderItem, Payment, StockMovement
+from api import inventory, kitchen_feed, projections
+from api.concurrency import apply_if_match, set_etag
+from api.idempotency import idempotent
+from api.permissions import FRONT_DESK, INVENTORY, PUBLIC, RESTAURANT, RESTAURANT_STAFF, HasRole
+
+from api.serializers.menu_serializer import (
+    MenuSerializer,
+    OrderSerializer,
+    StockChangeSerializer,
+    StockHistoryQuerySerializer,
+    StockMovementSerializer,
+    StockValuationQuerySerializer,
+)
 from rest_framework.response import Response
 from rest_framework import status
 
@@ -11,12 +22,21 @@ from django.shortcuts import get_object_or_404
 from drf_spectacular.utils import extend_schema
 
 from rest_framework import viewsets, mixins, parsers
+from rest_framework.decorators import action
 from rest_framework.generics import ListAPIView
 from rest_framework.permissions import IsAuthenticated
 from django.db import transaction
 
 
 class MenuView(ViewSet):
+    # Guests browse the menu; restaurant and inventory staff maintain it
+    permission_classes = [HasRole]
+    allowed_roles = {
+        "list": PUBLIC,
+        "retrieve": PUBLIC,
+        "*": (RESTAURANT, INVENTORY),
+    }
+
     def list(self, request):
         menus = Menu.objects.all()
         serializer = MenuSerializer(menus, many=True)
@@ -27,26 +47,74 @@ class MenuView(ViewSet):
         serializer = MenuSerializer(menu)
         return Response(serializer.data)
     
+    @transaction.atomic
     def create(self, request):
         serializer = MenuSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        menu = serializer.save()
+        inventory.record_adjustments({menu.pk: (0, menu.stock)}, user_id=request.user.id, note="Opening stock")
         return Response(serializer.data)
     
+    @transaction.atomic
     def patch(self, request, pk):
-        menu = get_object_or_404(Menu, pk=pk)
+        menu = get_object_or_404(Menu.objects.select_for_update(), pk=pk)
         serializer = MenuSerializer(menu, data=request.data, partial=True)
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
-        return Response(serializer.data)
+        return self._save(request, serializer)
     
+    @transaction.atomic
     def update(self, request, pk):
-        menu = get_object_or_404(Menu, pk=pk)
+        menu = get_object_or_404(Menu.objects.select_for_update(), pk=pk)
         serializer = MenuSerializer(menu, data=request.data)
+        return self._save(request, serializer)
+
+    def _save(self, request, serializer):
+        # Stock set directly goes into the ledger as an adjustment
+        previous_stock = serializer.instance.stock
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        menu = serializer.save()
+        inventory.record_adjustments({menu.pk: (previous_stock, menu.stock)}, user_id=request.user.id, note="Menu edit")
         return Response(serializer.data)
 
+    @action(detail=True, methods=["get", "post"])
+    def stock(self, request, pk=None):
+        """
+        GET  /api/menu/<id>/stock/?since=&until=&limit=   stock movements from `since` (default: the
+                                                         newest `limit`), oldest first, with the stock
+                                                         before them and after each one
+        POST /api/menu/<id>/stock/   {"kind": "restock" | "spoilage" | "adjustment", "quantity": 24, "note": "..."}
+        See api/inventory.py.
+        """
+        menu = get_object_or_404(Menu, pk=pk)
+
+        if request.method == "POST":
+            serializer = StockChangeSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            movement = inventory.change_stock(menu.pk, user_id=request.user.id, **serializer.validated_data)
+            if movement is None:
+                return Response({"quantity": ["Insufficient stock."]}, status=status.HTTP_400_BAD_REQUEST)
+            return Response(StockMovementSerializer(movement).data, status=status.HTTP_201_CREATED)
+
+        query = StockHistoryQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        opening, movements, has_more = inventory.history(menu.pk, params.get("since"), params.get("until"), params["limit"])
+        return Response({
+            "menu_id": menu.pk,
+            "opening_stock": opening,
+            "closing_stock": movements[-1].balance if movements else opening,
+            "movements": StockMovementSerializer(movements, many=True).data,
+            "has_more": has_more,
+        })
+
+    @action(detail=False, methods=["get"])
+    def valuation(self, request):
+        """
+        GET /api/menu/valuation/?as_of=2026-10-01T00:00
+        Stock per the ledger and its value at current prices, by item and category.
+        """
+        query = StockValuationQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        return Response(inventory.valuation(query.validated_data.get("as_of")))
 
     def delete(self, request, pk):
         menu = get_object_or_404(Menu, pk=pk)
@@ -58,12 +126,17 @@ class MenuView(ViewSet):
 
 
 class OrderViewSet(viewsets.ViewSet):
-    #permission_classes = [IsAuthenticated]
+    permission_classes = [HasRole]
+    allowed_roles = {
+        "list": (RESTAURANT, RESTAURANT_STAFF, FRONT_DESK),
+        "retrieve": (RESTAURANT, RESTAURANT_STAFF, FRONT_DESK),
+        "*": (RESTAURANT, RESTAURANT_STAFF),
+    }
 
     def list(self, request):
         orders = Order.objects.all().order_by("-created_at")
-        serializer = OrderSerializer(orders, many=True)
-        return Response(serializer.data)
+        # Same JSON as OrderSerializer, from values() rows (api/projections.py)
+        return Response(projections.orders(orders))
     
 
     def retrieve(self, request, pk=None):
@@ -73,8 +146,37 @@ class OrderViewSet(viewsets.ViewSet):
             return Response({"detail": "Order not found."}, status=status.HTTP_404_NOT_FOUND)
 
         serializer = OrderSerializer(order)
-        return Response(serializer.data)
-
+        return set_etag(Response(serializer.data), order.version)
+
+    @action(detail=False, methods=["get"])
+    def feed(self, request):
+        """
+        GET /api/order/feed/                       open (pending / preparing) orders and a cursor
+        GET /api/order/feed/?since=<cursor>&wait=25
+            orders created or changed status after the cursor, including
+            ones that left the kitchen (served / cancelled). Waits up to
+            `wait` seconds for a change before answering: at most 30 on the
+            ASGI workers (AsyncOrderFeedView), 5 here, where a waiting
+            tablet holds a worker thread.
+        See api/kitchen_feed.py.
+        """
+        since = request.query_params.get("since")
+        wait = request.query_params.get("wait", "0")
+        if (since is not None and not since.isdigit()) or not wait.isdigit():
+            return Response({"detail": "since and wait must be non-negative integers."}, status=status.HTTP_400_BAD_REQUEST)
+
+        if since is None:
+            cursor, orders = kitchen_feed.snapshot()
+        else:
+            cursor, orders = kitchen_feed.changes_since(int(since), int(wait))
+
+        return Response({
+            "cursor": cursor,
+            "full": since is None,
+            "orders": OrderSerializer(orders, many=True).data,
+        })
+
+    @idempotent
     @transaction.atomic
     def create(self, request):
         serializer = OrderSerializer(data=request.data)
@@ -88,6 +190,7 @@ class OrderViewSet(viewsets.ViewSet):
         total_amount = 0
         additional_fee_items = []   # JSON for Booking.additional_fee
         description_parts = []      # Text for Payment.description
+        stock_movements = []        # Inventory ledger, written in one query
 
         for item in items_data:
             menu = item["menu"]
@@ -95,6 +198,13 @@ class OrderViewSet(viewsets.ViewSet):
 
             # Deduct stock
             menu.deduct_stock(quantity)
+            stock_movements.append(StockMovement(
+                menu=menu,
+                kind=StockMovement.Kind.SALE,
+                quantity=-quantity,
+                order=order,
+                created_by_id=request.user.id,
+            ))
 
             price = menu.price
             subtotal = price * quantity
@@ -120,6 +230,8 @@ class OrderViewSet(viewsets.ViewSet):
             # For payment.description (text)
             description_parts.append(f"{menu.name} x{quantity}")
 
+        inventory.record(stock_movements)
+
         # Update order total
         order.total_amount = total_amount
         order.save(update_fields=["total_amount"])
@@ -155,11 +267,12 @@ class OrderViewSet(viewsets.ViewSet):
         except Order.DoesNotExist:
             return Response({"detail": "Order not found."}, status=status.HTTP_404_NOT_FOUND)
 
-        serializer = OrderSerializer(order, data=request.data, partial=True)
+        # Saves only the sent fields, WHERE version matches (If-Match or as read); 409 otherwise
+        serializer = OrderSerializer(apply_if_match(request, order), data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
         serializer.save()
 
-        return Response(serializer.data)
+        return set_etag(Response(serializer.data), order.version)
 
     def patch(self, request, pk=None):
         return self.update(request, pk)
@@ -0,0 +1,34 @@
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from api.pricing import QuoteError, StayRequest, quote_stays
+from api.serializers.quote_serializer import QuoteRequestSerializer, QuoteSerializer
+
+
+class QuoteView(APIView):
+    """
+    POST /api/quotes/
+    {"stays": [{"room_type_id": 1, "check_in": "2026-12-01", "check_out": "2026-12-04", "adults": 2, "children": 1}, ...]}
+
+    Prices every stay from the rate calendar in one query. Quotes come back
+    in request order.
+    """
+
+    def post(self, request):
+        serializer = QuoteRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        stays = [
+            StayRequest(
+                stay['room_type_id'], stay['check_in'], stay['check_out'], stay['adults'], stay['children']
+            )
+            for stay in serializer.validated_data['stays']
+        ]
+
+        try:
+            quotes = quote_stays(stays)
+        except QuoteError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({"quotes": QuoteSerializer(quotes, many=True).data})
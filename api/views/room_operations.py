@@ -1,9 +1,20 @@
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import viewsets, mixins
+from rest_framework.decorators import action
 from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 
+from api import availability, housekeeping, projections, rollups
+from api.concurrency import apply_if_match, set_etag
 from api.models import Room
-from api.serializers.room_serializers import RoomOperationSerializer
+from api.permissions import FRONT_DESK, HOUSEKEEPING, MAINTENANCE, HasRole
+from api.serializers.room_serializers import (
+    BulkRoomStatusSerializer,
+    RoomOperationSerializer,
+    RoomStatusChangeSerializer,
+)
 
 class RoomOperationViewSet(
     mixins.ListModelMixin,
@@ -19,9 +30,12 @@ class RoomOperationViewSet(
     - Filter by floor or status
     - Search by room number
     - Update ONLY status and notes
+    - Bulk update many rooms at once (PATCH /room-operations/bulk/)
     """
     # select_related is vital here to fetch RoomType data in the same query
     queryset = Room.objects.all().select_related('room_type').order_by('floor', 'room_number')
+    permission_classes = [HasRole]
+    allowed_roles = (HOUSEKEEPING, MAINTENANCE, FRONT_DESK)
     serializer_class = RoomOperationSerializer
     
     # Enable Searching and Filtering
@@ -40,6 +54,18 @@ class RoomOperationViewSet(
     # DELETE and POST are intentionally disabled for safety
     http_method_names = ['get', 'patch', 'head', 'options']
 
+    def list(self, request, *args, **kwargs):
+        # Same JSON as RoomOperationSerializer, from values() rows (api/projections.py)
+        return Response(projections.room_operations(self.filter_queryset(self.get_queryset())))
+
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        return set_etag(response, response.data['version'])
+
+    def update(self, request, *args, **kwargs):
+        response = super().update(request, *args, **kwargs)
+        return set_etag(response, response.data['version'])
+
     def perform_update(self, serializer):
         """
         Hook to add extra logic during update if needed.
@@ -47,4 +73,88 @@ class RoomOperationViewSet(
         """
         # user = self.request.user
         # serializer.save(last_modified_by=user)
-        serializer.save()
\ No newline at end of file
+
+        # Saves only status / note, WHERE version matches (If-Match or as read); 409 otherwise
+        apply_if_match(self.request, serializer.instance)
+        serializer.save()
+
+    @action(detail=False, methods=['patch'], url_path='bulk')
+    def bulk(self, request):
+        """
+        PATCH /api/room-operations/bulk/
+        {"changes": [{"room_id": 12, "status": "cleaning", "note": "..."}, ...]}
+
+        Applies every valid change in one transaction and returns one result
+        per row, in request order: "updated", "unchanged" (already in that
+        state, so retrying a request is harmless) or "error" with the reason.
+        Rows that fail do not stop the others.
+        """
+        serializer = BulkRoomStatusSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        rows = serializer.validated_data['changes']
+
+        results = [None] * len(rows)
+        changes = {}  # room_id -> (row index, validated change)
+
+        for i, row in enumerate(rows):
+            change = RoomStatusChangeSerializer(data=row)
+            if not change.is_valid():
+                results[i] = {"room_id": row.get("room_id"), "result": "error", "errors": change.errors}
+                continue
+
+            data = change.validated_data
+            if data['room_id'] in changes:
+                results[i] = {"room_id": data['room_id'], "result": "error", "errors": {"room_id": ["Duplicate room_id in request."]}}
+                continue
+            changes[data['room_id']] = (i, data)
+
+        with transaction.atomic():
+            rooms = Room.objects.select_for_update().in_bulk(list(changes))
+            now = timezone.now()
+            updated = []
+            status_changed = set()
+            inventory_changed = set()
+            rooms_changed = []
+
+            for room_id, (i, data) in changes.items():
+                room = rooms.get(room_id)
+                if room is None:
+                    results[i] = {"room_id": room_id, "result": "error", "errors": {"room_id": ["Room not found."]}}
+                    continue
+                if not Room.can_transition(room.status, data['status']):
+                    results[i] = {
+                        "room_id": room_id,
+                        "result": "error",
+                        "errors": {"status": [f"Cannot change status from '{room.status}' to '{data['status']}'."]},
+                    }
+                    continue
+
+                note = data['note'] if 'note' in data else room.note
+                if room.status == data['status'] and room.note == note:
+                    result = "unchanged"
+                else:
+                    if room.status != data['status']:
+                        status_changed.add(room.room_type_id)
+                        rooms_changed.append(room_id)
+                        if rollups.is_sellable(room.status) != rollups.is_sellable(data['status']):
+                            inventory_changed.add(room.room_type_id)
+                    room.status = data['status']
+                    room.note = note
+                    room.updated_at = now
+                    room.version += 1
+                    updated.append(room)
+                    result = "updated"
+
+                results[i] = {"room_id": room_id, "result": result, "status": room.status, "note": room.note}
+
+            # bulk_update skips save() and the Room signals
+            Room.objects.bulk_update(updated, ['status', 'note', 'updated_at', 'version'])
+            availability.bump_versions(status_changed)
+            rollups.schedule_inventory_refresh(inventory_changed)
+            housekeeping.sync_room_tasks(rooms_changed)
+
+        counts = {"updated": 0, "unchanged": 0, "error": 0}
+        for result in results:
+            counts[result["result"]] += 1
+
+        return Response({**counts, "results": results})
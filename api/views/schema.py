@@ -0,0 +1,29 @@
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from drf_spectacular.views import SpectacularAPIView
+
+from api import openapi
+
+
+class CachedSchemaView(SpectacularAPIView):
+    """
+    GET /api/schema/ from the precomputed schema (api/openapi.py), with an
+    ETag per format. Requests for another API version or language are
+    generated live, as by SpectacularAPIView.
+    """
+
+    def _get_schema_response(self, request):
+        version = self.api_version or request.version or self._get_version_parameter(request)
+        if version or request.GET.get("lang") or self.custom_settings or self.urlconf or self.patterns:
+            return super()._get_schema_response(request)
+
+        renderer = request.accepted_renderer
+        body, etag = openapi.get_cached().render(renderer, request.accepted_media_type)
+        content_type = f"{renderer.media_type}; charset={renderer.charset}" if renderer.charset else renderer.media_type
+
+        response = HttpResponse(body, content_type=content_type)
+        response["Content-Disposition"] = f'inline; filename="{self._get_filename(request, version)}"'
+        response["ETag"] = etag
+        # The format follows the Accept header
+        patch_vary_headers(response, ["Accept"])
+        return get_conditional_response(request, etag=etag, response=response)
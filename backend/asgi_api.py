@@ -0,0 +1,14 @@
+"""
+ASGI config of the API-only workers (backend/settings_api.py).
+
+The admin and the docs are served by a separate process on backend.asgi
+or backend.wsgi.
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings_api')
+
+application = get_asgi_application()
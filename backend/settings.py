@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+from importlib.util import find_spec
 from pathlib import Path
 
+from corsheaders.defaults import default_headers
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -48,6 +51,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Under ASGI, resolve with ASGI_URLCONF (async views of the read-heavy endpoints)
+    'api.middleware.ASGIUrlconfMiddleware',
     "corsheaders.middleware.CorsMiddleware",
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -56,9 +61,16 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.middleware.SlowQueryMiddleware',
 ]
 
 ROOT_URLCONF = 'backend.urls'
+ASGI_URLCONF = 'backend.urls_asgi'
+# Serve the read-heavy endpoints with async views under ASGI (api/views/async_reads.py).
+# Off by default: `manage.py bench_asgi` has them at about 60% of the WSGI
+# throughput. Turn it on for ASGI deployments whose kitchen tablets long-poll
+# /api/order/feed/, where a waiting request then costs no thread.
+ASYNC_READ_VIEWS = False
 
 TEMPLATES = [
     {
@@ -155,11 +167,18 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),  # You can use 'Bearer' if you prefer
 }
 
+# Seconds a worker trusts its cached is_active / role_version of a user
+# before reading them again. Bounds how long a deactivated user's tokens
+# keep working on other workers.
+JWT_USER_STATE_TTL = 30
+
 
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
     "http://127.0.0.1:3000",
 ]
+CORS_ALLOW_HEADERS = (*default_headers, "idempotency-key")
+CORS_EXPOSE_HEADERS = ["Idempotent-Replayed", "Retry-After"]
 
 SPECTACULAR_SETTINGS = {
     'TITLE': ' API',
@@ -167,13 +186,80 @@ SPECTACULAR_SETTINGS = {
     'VERSION': '1.0.0',
     'SERVE_INCLUDE_SCHEMA': False,
 }
+# Precomputed schema served at /api/schema/ (manage.py generate_schema, api/openapi.py)
+API_SCHEMA_FILE = BASE_DIR / 'openapi-schema.json'
 
 
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # JWT verified without loading the user (see api/authentication.py)
+        'api.authentication.ClaimsJWTAuthentication',
+    ),
+    # 409 for saves of rows changed by someone else (see api/concurrency.py)
+    'EXCEPTION_HANDLER': 'api.concurrency.exception_handler',
+    # JSON through orjson; MessagePack for Accept: application/msgpack if
+    # msgpack is installed (see api/renderers.py)
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+        *(('api.renderers.MessagePackRenderer',) if find_spec('msgpack') else ()),
     ),
 }
 
 
+# --- Slow query capture (api.middleware.SlowQueryMiddleware) ---
+# Queries slower than this are recorded with their EXPLAIN plan and can be
+# inspected at /admin/slow-queries/. Works with DEBUG off.
+SLOW_QUERY_THRESHOLD_MS = 200
+SLOW_QUERY_BUFFER_SIZE = 200
+SLOW_QUERY_EXPLAIN = True
+
+
+# --- Restaurant best sellers (manage.py aggregate_menu_sales) ---
+# Menu.isBestSeller is set on the BEST_SELLER_COUNT items that sold the most
+# units over the last BEST_SELLER_WINDOW_DAYS days.
+BEST_SELLER_WINDOW_DAYS = 30
+BEST_SELLER_COUNT = 5
+# Order items younger than this are left to the next aggregation run: ids
+# may commit out of order, and the checkpoint must not pass an uncommitted one
+MENU_SALES_SAFETY_LAG_SECONDS = 60
+
+
+# --- Availability index (api/availability.py) ---
+# Answer room availability from a per-room-type in-memory interval index,
+# kept coherent across workers by AvailabilityVersion. False = always query.
+AVAILABILITY_CACHE_ENABLED = True
+
+
+# --- Throttling of public endpoints (api/throttling.py) ---
+# Token buckets per client IP and per identity (user / email / username).
+# "10/min" = bursts of up to 10, refilled at 10 a minute. "cache" shares the
+# buckets between workers through the Django cache; "local" is per process.
+THROTTLE_STORE = "local"
+THROTTLE_RATES = {
+    "booking_ip": "20/hour",
+    "booking_identity": "5/hour",
+    "login_ip": "30/min",
+    "login_identity": "10/min",
+}
+# Larger requests get 413 before their body (and uploaded images) is parsed
+THROTTLE_MAX_BODY_BYTES = {
+    "booking": 5 * 1024 * 1024,
+    "login": 16 * 1024,
+}
+
+
+# --- Idempotency-Key on booking / order / check-in / check-out POSTs (api/idempotency.py) ---
+# How long a response is replayed for retries with the same key, how long a
+# retry waits for the first request to finish (then 409), and after how long
+# an unfinished request's lock is considered abandoned.
+IDEMPOTENCY_TTL_SECONDS = 24 * 60 * 60
+IDEMPOTENCY_WAIT_SECONDS = 10
+IDEMPOTENCY_LOCK_TIMEOUT_SECONDS = 300
+
+
+# --- Night audit (manage.py night_audit, api/night_audit.py) ---
+# Pending bookings whose downpayment is still unverified this long after
+# booking (or on their check-in date) expire and stop holding rooms.
+PENDING_BOOKING_TTL_HOURS = 48
@@ -0,0 +1,65 @@
+"""
+Settings of the API-only workers (backend/wsgi_api.py, backend/asgi_api.py).
+
+Same as backend/settings.py, without what only the admin and the docs pages
+use: no admin, jazzmin, sessions, messages, staticfiles or drf_spectacular
+apps, no session / CSRF / auth / messages / clickjacking middleware
+(API calls authenticate with a JWT, see api/authentication.py) and only
+the /api/ URLs (backend/urls_api.py).
+
+The admin and the docs keep running in a separate process on
+backend.settings (backend/wsgi.py); route /admin/, /static/ and
+/api/schema/, /api/docs/ there. The slow query buffer is per process, so
+/admin/slow-queries/ only lists the admin process's own queries.
+
+`manage.py bench_settings` compares the startup time, memory and
+middleware overhead of both profiles.
+"""
+from backend.settings import *  # noqa: F401,F403
+from backend.settings import INSTALLED_APPS, REST_FRAMEWORK
+
+
+ADMIN_AND_DOCS_APPS = (
+    'jazzmin',
+    'django.contrib.admin',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'drf_spectacular',
+)
+
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in ADMIN_AND_DOCS_APPS]
+
+MIDDLEWARE = [
+    'api.middleware.ASGIUrlconfMiddleware',
+    "corsheaders.middleware.CorsMiddleware",
+    'django.middleware.security.SecurityMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'api.middleware.SlowQueryMiddleware',
+]
+
+ROOT_URLCONF = 'backend.urls_api'
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.request',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'backend.wsgi_api.application'
+
+REST_FRAMEWORK = {
+    **{key: value for key, value in REST_FRAMEWORK.items() if key != 'DEFAULT_SCHEMA_CLASS'},
+    # No browsable API: it is a page for people, served by the admin process
+    'DEFAULT_RENDERER_CLASSES': tuple(
+        renderer for renderer in REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES']
+        if renderer != 'rest_framework.renderers.BrowsableAPIRenderer'
+    ),
+}
@@ -20,13 +20,18 @@ from django.conf import settings
 from django.conf.urls.static import static
 
 
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
+from drf_spectacular.views import SpectacularSwaggerView, SpectacularRedocView
+
+from api.admin import slow_query_log_view
+from api.views.schema import CachedSchemaView
 
 urlpatterns = [
+    path('admin/slow-queries/', admin.site.admin_view(slow_query_log_view), name='slow-query-log'),
     path('admin/', admin.site.urls),
     path('api/', include('api.urls')),
 
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
+    # Precomputed once per code version (api/openapi.py)
+    path('api/schema/', CachedSchemaView.as_view(), name='schema'),
     path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
     path('api/schema/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
 ]+ static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
@@ -0,0 +1,12 @@
+"""
+URL configuration of the API-only workers (backend/settings_api.py): the
+/api/ endpoints, without the admin and the docs pages (backend/urls.py).
+"""
+from django.conf import settings
+from django.conf.urls.static import static
+from django.urls import include, path
+
+
+urlpatterns = [
+    path('api/', include('api.urls')),
+] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -0,0 +1,36 @@
+"""
+URL configuration under ASGI (settings.ASGI_URLCONF, selected by
+api.middleware.ASGIUrlconfMiddleware): the read-heavy endpoints are served
+by async views (api/views/async_reads.py), everything else as in
+settings.ROOT_URLCONF (backend/urls.py, or backend/urls_api.py for the
+API-only workers).
+"""
+from importlib import import_module
+
+from django.conf import settings
+from django.urls import path
+
+from api.views.async_reads import (
+    AsyncAvailableRoomsView,
+    AsyncCheckedInBookingListView,
+    AsyncMenuListView,
+    AsyncOrderFeedView,
+    AsyncRoomTypeDetailView,
+    AsyncRoomTypeListView,
+    with_sync_fallback,
+)
+from api.views.order import MenuView
+
+
+urlpatterns = [
+    path('api/room-types/<int:pk>/available-rooms/', AsyncAvailableRoomsView.as_view()),
+    path('api/bookings/list/checked-in/', AsyncCheckedInBookingListView.as_view()),
+    path('api/order/feed/', AsyncOrderFeedView.as_view()),
+    path('api/room_type/', AsyncRoomTypeListView.as_view()),
+    path('api/room_type/<str:pk>/', AsyncRoomTypeDetailView.as_view()),
+    # POST (create) still goes to MenuView
+    path('api/menu/', with_sync_fallback(
+        AsyncMenuListView.as_view(),
+        MenuView.as_view({'get': 'list', 'post': 'create'}),
+    )),
+] + import_module(settings.ROOT_URLCONF).urlpatterns
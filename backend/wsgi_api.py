@@ -0,0 +1,13 @@
+"""
+WSGI config of the API-only workers (backend/settings_api.py).
+
+The admin and the docs are served by a separate process on backend.wsgi.
+"""
+
+import os
+
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings_api')
+
+application = get_wsgi_application()